@@ -1,13 +1,14 @@
 import streamlit as st
-from PIL import Image
+
+from core.assets import sidebar_logo
 
 st.set_page_config(page_title="Home", page_icon="🎯", layout='wide')
 
 # Sidebar
-try:
-    image = Image.open('image.png')
-    st.sidebar.image(image, width=120)
-except:
+logo = sidebar_logo()
+if logo is not None:
+    st.sidebar.image(logo, width=120)
+else:
     st.sidebar.markdown('### Logo')
 
 st.sidebar.markdown('# Curry Company')
@@ -30,6 +31,8 @@ st.markdown(
         - Acompanhamento dos indicadores semanais de crescimento.
     - **Visão Restaurante:**
         - Indicadores semanais de crescimento dos restaurantes.
+    - **Visão Horários:**
+        - Pedidos por dia da semana e hora, tempo de preparo e efeito das entregas múltiplas.
     
     ### Ask for Help
     - 
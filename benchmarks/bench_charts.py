@@ -0,0 +1,62 @@
+"""
+Tamanho e tempo de serialização dos gráficos por data, com e sem a
+redução de pontos (`core.downsample`), para séries de vários anos.
+A serialização medida é a mesma do `st.plotly_chart` (to_dict + to_json).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_charts --years 1 5 20
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io
+
+from core.downsample import choose_resolution, lttb_frame, resample_sum
+
+def daily_orders(years, seed=0):
+    """ Pedidos por dia sintéticos (sazonalidade semanal + ruído) """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2022-02-11', periods=365 * years, freq='D')
+    orders = 250 + 60 * np.sin(np.arange(len(dates)) * 2 * np.pi / 7) + rng.normal(0, 20, len(dates))
+    return pd.DataFrame({'Order_Date': dates, 'orders': orders.round().astype('int64')})
+
+def serialize(fig):
+    """ O que o st.plotly_chart faz a cada rerun """
+    start = time.perf_counter()
+    payload = plotly.io.to_json(fig.to_dict(), validate=False)
+    return len(payload), time.perf_counter() - start
+
+def measure(build):
+    start = time.perf_counter()
+    fig = build()
+    t_build = time.perf_counter() - start
+    size, t_json = serialize(fig)
+    return t_build, t_json, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5, 20])
+    args = parser.parse_args()
+
+    for years in args.years:
+        df = daily_orders(years)
+        resolution = choose_resolution(df['Order_Date'].min(), df['Order_Date'].max())
+        charts = {
+            'barras': (lambda: px.bar(df, x='Order_Date', y='orders'),
+                       lambda: px.bar(resample_sum(df, 'Order_Date', ['orders'], resolution),
+                                      x='Order_Date', y='orders')),
+            'linha': (lambda: px.line(df, x='Order_Date', y='orders'),
+                      lambda: px.line(lttb_frame(df, 'Order_Date', 'orders'), x='Order_Date', y='orders')),
+        }
+        print(f'{years:>3} anos  {len(df):>6} dias  resolução das barras: {resolution}')
+        for name, (full, reduced) in charts.items():
+            before, after = measure(full), measure(reduced)
+            print(f'      {name:<7} completo {before[2] / 1024:8.1f} KiB  figura {before[0]:6.3f}s  '
+                  f'json {before[1]:6.3f}s  |  reduzido {after[2] / 1024:7.1f} KiB  '
+                  f'figura {after[0]:6.3f}s  json {after[1]:6.3f}s')
+
+if __name__ == '__main__':
+    main()
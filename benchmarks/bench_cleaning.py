@@ -0,0 +1,54 @@
+"""
+Paridade e tempo da limpeza unificada (`core.cleaning.clean_orders`)
+contra as funções `clean_code` originais das páginas.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_cleaning --scales 1 10 100
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks import legacy
+from benchmarks.synthetic import write_train_csv
+from benchmarks.timing import timed
+from core.cleaning import (REQUIRED_EMPRESA, REQUIRED_ENTREGADORES, REQUIRED_RESTAURANTES,
+                           clean_orders)
+
+PAGES = [
+    ('empresa', legacy.clean_empresa, dict(required=REQUIRED_EMPRESA)),
+    ('entregadores', legacy.clean_entregadores, dict(required=REQUIRED_ENTREGADORES)),
+    ('restaurantes', legacy.clean_restaurantes, dict(required=REQUIRED_RESTAURANTES)),
+]
+
+# ====================================================
+# Benchmark
+# ====================================================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--skip-legacy-distance', action='store_true',
+                        help='não cronometra o haversine linha a linha da Visão Restaurantes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f'train_{scale}x.csv')
+            rows = write_train_csv(path, scale=scale)
+            df_raw = legacy.read_raw(path)
+            print(f'== {scale}x ({rows} linhas)')
+
+            for page, legacy_fn, options in PAGES:
+                if page == 'restaurantes' and args.skip_legacy_distance:
+                    continue
+                df_old, t_old = timed(lambda: legacy_fn(df_raw))
+                df_new, t_new = timed(lambda: clean_orders(df_raw, **options))
+                legacy.assert_parity(df_old, df_new)
+                print(f'{page:<14} legado {t_old:8.3f}s  novo {t_new:8.3f}s  '
+                      f'speedup {t_old / t_new:6.1f}x  '
+                      f'memória {df_old.memory_usage(deep=True).sum() / 2**20:7.1f} -> '
+                      f'{df_new.memory_usage(deep=True).sum() / 2**20:7.1f} MiB')
+
+if __name__ == '__main__':
+    main()
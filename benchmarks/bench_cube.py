@@ -0,0 +1,89 @@
+"""
+Paridade e tempo do cubo de agregados (`core.cube`) contra os groupbys
+feitos direto nas linhas filtradas, como as páginas faziam.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_cube --scales 1 10 100
+"""
+import argparse
+import itertools
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.synthetic import make_raw_orders
+from core.cleaning import REQUIRED_EMPRESA, clean_orders, drop_missing
+from core.cube import build_cube, count_by, distinct_drivers, filter_cube, mean_std
+
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+MEASURES = {'time': 'Time_taken(min)', 'rating': 'Delivery_person_Ratings', 'distance': 'distance'}
+GROUPS = [['Order_Date'], ['week_of_year'], ['Road_traffic_density'], ['City', 'Road_traffic_density'],
+          ['City', 'Type_of_order'], ['Weatherconditions'], ['Festival']]
+
+# ====================================================
+# Consultas equivalentes nas linhas e no cubo
+# ====================================================
+
+def rows_metrics(df, date_max, traffic):
+    df = df.loc[(df['Order_Date'] <= date_max) & df['Road_traffic_density'].isin(traffic), :]
+    out = {'drivers': df['Delivery_person_ID'].nunique(),
+           'age': (df['Delivery_person_Age'].min(), df['Delivery_person_Age'].max())}
+    for keys in GROUPS:
+        grouped = df.groupby(keys, observed=True)
+        out[('count', *keys)] = grouped.size().to_numpy()
+        for name, col in MEASURES.items():
+            out[(name, *keys)] = grouped[col].agg(['mean', 'std']).to_numpy()
+    out['drivers_week'] = df.groupby('week_of_year', observed=True)['Delivery_person_ID'].nunique().to_numpy()
+    return out
+
+def cube_metrics(cube, date_max, traffic):
+    cube = filter_cube(cube, date_max, traffic)
+    out = {'drivers': distinct_drivers(cube.drivers),
+           'age': (cube.cells['age_min'].min(), cube.cells['age_max'].max())}
+    for keys in GROUPS:
+        out[('count', *keys)] = count_by(cube.cells, keys)['orders'].to_numpy()
+        for name in MEASURES:
+            out[(name, *keys)] = mean_std(cube.cells, keys, name)[['mean', 'std']].to_numpy()
+    out['drivers_week'] = distinct_drivers(cube.drivers, 'week_of_year')['Delivery_person_ID'].to_numpy()
+    return out
+
+def assert_same(expected, result):
+    for key, value in expected.items():
+        assert np.allclose(np.asarray(value, dtype='float64'), np.asarray(result[key], dtype='float64'),
+                           rtol=1e-6, equal_nan=True), f'{key} diferente'
+
+# ====================================================
+# Benchmark
+# ====================================================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    filters = list(itertools.product([datetime(2022, 3, 1), datetime(2022, 3, 20), datetime(2022, 4, 13)],
+                                     [TRAFFIC, ['Low', 'Jam'], ['Medium']]))
+    for scale in args.scales:
+        df = drop_missing(clean_orders(make_raw_orders(scale=scale)), REQUIRED_EMPRESA)
+        start = time.perf_counter()
+        cube = build_cube(df)
+        t_build = time.perf_counter() - start
+
+        t_rows = t_cube = 0
+        for date_max, traffic in filters:
+            start = time.perf_counter()
+            expected = rows_metrics(df, date_max, traffic)
+            t_rows += time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = cube_metrics(cube, date_max, traffic)
+            t_cube += time.perf_counter() - start
+            assert_same(expected, result)
+
+        print(f'{scale:>4}x {len(df):>9} linhas  células {len(cube.cells):>6}  '
+              f'construção {t_build:7.3f}s  por filtro: linhas {t_rows / len(filters):7.3f}s  '
+              f'cubo {t_cube / len(filters):7.3f}s')
+
+if __name__ == '__main__':
+    main()
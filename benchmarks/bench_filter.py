@@ -0,0 +1,56 @@
+"""
+Paridade e tempo do filtro da sidebar (`core.store`) contra as máscaras
+booleanas do tamanho da tabela, como o filtro era feito antes, nas duas
+tabelas do cubo e para todas as combinações de trânsito.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_filter --scales 1 10
+"""
+import argparse
+import itertools
+from datetime import date
+
+import numpy as np
+
+from benchmarks.synthetic import make_raw_orders
+from benchmarks.timing import timed
+from core.cleaning import REQUIRED_RESTAURANTES, clean_orders, drop_missing
+from core.columnar import epoch_day, isin_labels
+from core.cube import build_cube
+from core.store import select
+
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+DATES = [date(2022, 2, 11), date(2022, 3, 10), date(2022, 4, 13)]
+
+def mask_filter(frame, date_max, traffic):
+    """ Filtro anterior: duas máscaras do tamanho da tabela e cópia das linhas """
+    selected = (frame['Order_Date'].between(0, epoch_day(date_max)).to_numpy() &
+                isin_labels(frame['Road_traffic_density'], traffic))
+    return frame.loc[selected, :]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    combos = [list(c) for n in range(1, len(TRAFFIC) + 1) for c in itertools.combinations(TRAFFIC, n)]
+    for scale in args.scales:
+        cube = build_cube(drop_missing(clean_orders(make_raw_orders(scale)), REQUIRED_RESTAURANTES))
+        for name, frame in cube._asdict().items():
+            for date_max, traffic in itertools.product(DATES, combos):
+                expected, result = mask_filter(frame, date_max, traffic), select(frame, date_max, traffic)
+                assert expected.equals(result), f'{name} {date_max} {traffic} diferente'
+
+            full = select(frame, DATES[-1], TRAFFIC)
+            zero_copy = np.shares_memory(full['orders'].to_numpy(), frame['orders'].to_numpy())
+            _, t_mask = timed(lambda: [mask_filter(frame, d, t) for d in DATES for t in combos], args.repeat)
+            _, t_store = timed(lambda: [select(frame, d, t) for d in DATES for t in combos], args.repeat)
+            calls = len(DATES) * len(combos)
+            print(f'escala {scale:>3}  {name:<8} {len(frame):>8} linhas  máscaras {t_mask / calls * 1e3:7.3f} ms  '
+                  f'partições {t_store / calls * 1e3:7.3f} ms  ({t_mask / t_store:5.1f}x)  '
+                  f'sem cópia no filtro padrão: {"sim" if zero_copy else "não"}')
+    print('paridade ok')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Tolerância e tempo do haversine vetorizado (`core.geo.haversine_np`)
+contra o pacote `haversine`, nas coordenadas do dataset e em entregas
+curtas (de 1 m a 1 km), onde a precisão do float32 pesa mais.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_geo --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+from haversine import haversine
+
+from benchmarks.synthetic import make_raw_orders
+from core.geo import haversine_np
+
+COORDS = ['Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude', 'Delivery_location_longitude']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_raw_orders()
+    coords = [df[col].astype('float64').to_numpy() for col in COORDS]
+
+    # Entregas curtas: o destino a até ~1 km do restaurante
+    rng = np.random.default_rng(0)
+    offsets = rng.uniform(-0.0065, 0.0065, (2, len(df)))
+    short = [coords[0], coords[1], coords[0] + offsets[0], coords[1] + offsets[1]]
+
+    # Tolerância contra o pacote haversine, linha a linha
+    for name, pairs in (('dataset', coords), ('curtas', short)):
+        expected = np.array([haversine((lat1, lon1), (lat2, lon2)) for lat1, lon1, lat2, lon2 in zip(*pairs)])
+        for dtype, rtol in ((np.float64, 1e-12), (np.float32, 1e-6)):
+            result = haversine_np(*pairs, dtype=dtype)
+            error = np.abs(result - expected) / np.maximum(expected, 1e-9)
+            assert error.max() < rtol, f'{name} {dtype.__name__}: erro relativo {error.max():.2e}'
+            print(f'{name:<8} {dtype.__name__:<8} erro relativo máximo {error.max():.2e} (tolerância {rtol:.0e}, '
+                  f'menor distância {expected.min() * 1000:.0f} m)')
+
+    # Tempo em `rows` linhas
+    reps = -(-args.rows // len(df))
+    big = [np.tile(col, reps)[:args.rows] for col in coords]
+    for dtype in (np.float64, np.float32):
+        start = time.perf_counter()
+        haversine_np(*big, dtype=dtype)
+        print(f'{dtype.__name__:<8} {args.rows} linhas em {time.perf_counter() - start:.3f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Paridade e tempo da Visão Horários (`core.hourly`): conversão dos horários
+na limpeza contra strptime linha a linha, e consultas sobre as células
+filtradas contra filtro + groupby nos pedidos a cada rerun.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_hourly --scales 1 10
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_raw_orders
+from core.cleaning import REQUIRED_HORARIOS, TIME_COLUMNS, clean_orders, drop_missing
+from core.hourly import HOURLY_COLUMNS, WEEKDAYS, batching_impact, build_hourly, orders_heatmap, prep_by
+from core.store import select
+
+FILTERS = [(datetime(2022, 4, 13), ['Low', 'Medium', 'High', 'Jam']), (datetime(2022, 3, 20), ['Low', 'Jam']),
+           (datetime(2022, 3, 6), ['High'])]
+
+def seconds_rowwise(raw):
+    """ Como seria sem a limpeza vetorizada: strptime em cada linha """
+    def parse(value):
+        value = value.strip()
+        if value == 'NaN':
+            return np.nan
+        parsed = datetime.strptime(value, '%H:%M:%S')
+        return parsed.hour * 3600 + parsed.minute * 60 + parsed.second
+    return raw.map(parse)
+
+def queries(cells):
+    """ Todas as consultas da página sobre as células filtradas """
+    return (orders_heatmap(cells), prep_by(cells, 'order_hour'), prep_by(cells, ['City', 'Road_traffic_density']),
+            batching_impact(cells, ['City', 'Road_traffic_density']))
+
+def queries_rowwise(df, date_max, traffic_options):
+    """ Mesmas consultas filtrando e agrupando os pedidos """
+    rows = df.loc[((df['Order_Date'] <= date_max) & df['Road_traffic_density'].isin(traffic_options)).to_numpy(), :]
+    rows = rows.assign(order_hour=rows['order_seconds'] // 3600, weekday=rows['Order_Date'].dt.dayofweek,
+                       prep=((rows['picked_seconds'] - rows['order_seconds']) % 86400 / 60).astype('float64'))
+    heatmap = (pd.crosstab(rows['weekday'], rows['order_hour'])
+                 .reindex(index=range(7), columns=range(24), fill_value=0))
+    aggregated = [rows.groupby(keys, observed=True)[col].agg(['mean', 'std']).reset_index()
+                  for keys, col in (('order_hour', 'prep'), (['City', 'Road_traffic_density'], 'prep'),
+                                    (['City', 'Road_traffic_density', 'multiple_deliveries'], 'Time_taken(min)'))]
+    return heatmap, *aggregated
+
+def assert_parity(result, expected):
+    heatmap, *tables = result
+    expected_heatmap, *expected_tables = expected
+    assert list(heatmap.index) == WEEKDAYS and np.array_equal(heatmap.to_numpy(), expected_heatmap.to_numpy())
+    for table, other in zip(tables, expected_tables):
+        assert len(table) == len(other), 'grupos diferentes'
+        assert np.allclose(table.iloc[:, -2:].to_numpy('float64'), other[['mean', 'std']].to_numpy('float64'),
+                           equal_nan=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        raw = make_raw_orders(scale)
+        start = time.perf_counter()
+        df = drop_missing(clean_orders(raw), REQUIRED_HORARIOS).loc[:, HOURLY_COLUMNS]
+        t_clean = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rowwise = {col: seconds_rowwise(raw[col]) for col in TIME_COLUMNS}
+        t_rowwise = time.perf_counter() - start
+        for col, seconds in TIME_COLUMNS.items():
+            assert np.array_equal(rowwise[col].loc[df.index].to_numpy('float64'),
+                                  df[seconds].to_numpy('float64', na_value=np.nan), equal_nan=True)
+
+        start = time.perf_counter()
+        cells = build_hourly(df)
+        t_build = time.perf_counter() - start
+
+        t_cells, t_rows = [], []
+        for date_max, traffic_options in FILTERS:
+            start = time.perf_counter()
+            result = queries(select(cells, date_max, traffic_options))
+            t_cells.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            expected = queries_rowwise(df, date_max, traffic_options)
+            t_rows.append(time.perf_counter() - start)
+            assert_parity(result, expected)
+
+        print(f'escala {scale:>3}  {len(df):>8} pedidos  limpeza {t_clean:6.3f}s  '
+              f'horários linha a linha {t_rowwise:6.3f}s  células {t_build:6.3f}s ({len(cells)})  '
+              f'rerun: células {np.median(t_cells) * 1e3:6.1f} ms  pedidos {np.median(t_rows) * 1e3:7.1f} ms  '
+              f'paridade ok')
+
+if __name__ == '__main__':
+    main()
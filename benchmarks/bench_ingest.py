@@ -0,0 +1,106 @@
+"""
+Paridade e tempo da ingestão incremental (`core.ingest`): o cubo
+atualizado com os lotes precisa ser igual ao cubo refeito do zero, tanto
+quando o lote é ingerido no próprio processo (`ingest_batch`) quanto
+quando outro processo grava a parte e o servidor só a encontra no disco
+(`core.loader` mescla só as partes novas). Além disso, reconstruir o
+cache (arquivo removido, train.csv tocado ou lotes sem as colunas da
+CACHE_VERSION atual) não pode perder os lotes já ingeridos.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_ingest --scales 1 10
+"""
+import argparse
+import os
+import tempfile
+from datetime import datetime
+
+from benchmarks.bench_cube import TRAFFIC, assert_same, cube_metrics
+from benchmarks.synthetic import make_raw_orders, write_train_csv
+from benchmarks.timing import timed
+from core import loader
+from core.cube import filter_cube
+from core.cleaning import REQUIRED_EMPRESA, REQUIRED_RESTAURANTES, TIME_COLUMNS
+from core.ingest import clean_batch, ingest_batch
+from core.ranking import driver_totals, select_totals, top_k_per_city
+from core.storage import append_part, cache_path, list_parts, load_clean, read_feather
+
+REQUIRED = (REQUIRED_EMPRESA, REQUIRED_RESTAURANTES)
+
+def check_rebuild(path):
+    """
+    Remove o cache, toca o train.csv (novo mtime, como um `git checkout`) e
+    regrava os lotes sem as colunas de segundos e sem os metadados de versão
+    (um Feather gravado fora do `core.storage`): as linhas e as colunas se mantêm
+    """
+    expected = load_clean(path)
+    os.remove(cache_path(path))
+    os.utime(path)
+    for part in list_parts(path):
+        old = read_feather(part).drop(columns=list(TIME_COLUMNS.values()))
+        old.to_feather(f'{part}.tmp')
+        os.replace(f'{part}.tmp', part)  # `expected` ainda lê o lote atual via mmap
+
+    rebuilt = load_clean(path)
+    assert len(rebuilt) == len(expected), f'{len(expected)} -> {len(rebuilt)} linhas'
+    assert list(rebuilt.columns) == list(expected.columns), 'colunas diferentes'
+    assert rebuilt.equals(expected), 'lotes migrados diferentes'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--batch-days', type=int, default=3)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'train.csv')
+            rows = write_train_csv(path, scale=scale)
+
+            # Lotes diários: pedidos de alguns dias, deslocados para depois do histórico
+            raw = make_raw_orders(shift_days=60, seed=1)
+            days, n = raw['Order_Date'].unique(), args.batch_days
+            batch = raw.loc[raw['Order_Date'].isin(days[:n])]
+            batch_path = os.path.join(tmp, 'lote.csv')
+            batch.to_csv(batch_path, index=False)
+            other, last = (clean_batch(raw.loc[raw['Order_Date'].isin(days[i * n:(i + 1) * n])]) for i in (1, 2))
+
+            for required in REQUIRED:
+                loader.load_cube(required, path=path)
+                loader.load_totals(required, path=path)
+
+            # Outro processo (`python -m core.ingest`) grava uma parte antes deste ingerir a sua:
+            # as duas precisam entrar nos cubos
+            append_part(path, other)
+            _, t_incremental = timed(lambda: ingest_batch(batch_path, path=path))
+
+            # Só outro processo grava a parte; o servidor não refaz o histórico
+            append_part(path, last)
+            misses = loader.cache_info()['misses']
+            incremental, t_catch_up = timed(lambda: {required: loader.load_cube(required, path=path)
+                                                     for required in REQUIRED})
+            totals = {required: loader.load_totals(required, path=path) for required in REQUIRED}
+            assert loader.cache_info()['misses'] == misses, 'o servidor reagregou o histórico'
+
+            loader.invalidate()
+            full, t_full = timed(lambda: {required: loader.load_cube(required, path=path) for required in REQUIRED})
+
+            for required in full:
+                for filters in ((datetime(2022, 6, 30), TRAFFIC), (datetime(2022, 6, 30), ['Jam'])):
+                    assert_same(cube_metrics(full[required], *filters),
+                                cube_metrics(incremental[required], *filters))
+                    # Somas por entregador atualizadas com os lotes = somas do cubo refeito
+                    expected = top_k_per_city(driver_totals(filter_cube(full[required], *filters).drivers))
+                    result = top_k_per_city(select_totals(totals[required], filters[1]))
+                    assert result.astype(str).equals(expected.astype(str)), 'ranking diferente'
+
+            check_rebuild(path)
+
+            print(f'{scale:>4}x histórico {rows:>9} linhas  lotes {len(batch) + len(other) + len(last):>5} linhas  '
+                  f'no processo {t_incremental:7.3f}s  de outro processo {t_catch_up:7.3f}s  '
+                  f'recálculo completo {t_full:7.3f}s  '
+                  f'reconstrução do cache mantém os lotes')
+            loader.invalidate()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Paridade e tempo da limpeza + agregação em vários processos
+(`core.parallel`) contra o caminho serial, para cada divisão em shards.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_parallel --scales 10 100 --workers 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_train_csv
+from core.cleaning import REQUIRED_EMPRESA, clean_orders, drop_missing
+from core.cube import build_cube
+from core.parallel import SHARD_COLUMNS, build_cube_parallel
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f'train_{scale}x.csv')
+            rows = write_train_csv(path, scale=scale)
+
+            start = time.perf_counter()
+            serial = build_cube(drop_missing(clean_orders(pd.read_csv(path, low_memory=False)), REQUIRED_EMPRESA))
+            t_serial = time.perf_counter() - start
+            print(f'{scale:>4}x {rows:>9} linhas  serial {t_serial:7.2f}s  ({os.cpu_count()} CPUs)')
+
+            for by in SHARD_COLUMNS:
+                for workers in sorted(set(args.workers)):
+                    start = time.perf_counter()
+                    cube = build_cube_parallel(path, REQUIRED_EMPRESA, workers=workers, by=by)
+                    elapsed = time.perf_counter() - start
+                    for expected, result in zip(serial, cube):
+                        pd.testing.assert_frame_equal(expected, result, check_exact=True)
+                    print(f'      por {by:<10} {workers:>3} processos {elapsed:7.2f}s  '
+                          f'({t_serial / elapsed:4.1f}x)  idêntico ao serial')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Paridade e tempo do índice de perfis (`core.profiles`) contra o groupby
+e o filtro da tabela inteira a cada consulta.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_profiles --scales 1 10 --lookups 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_raw_orders
+from core.cleaning import clean_orders
+from core.profiles import ENTITY_KINDS, PROFILE_COLUMNS, build_index, entity_orders, profile, restaurant_codes
+
+def groupby_profile(df, keys, label):
+    """ O que uma consulta custaria sem o índice: filtro da tabela e agregação """
+    rows = df.loc[(keys == label).to_numpy(), :]
+    return rows, (len(rows), rows['Delivery_person_Ratings'].mean(), rows['Delivery_person_Ratings'].std(),
+                  rows['Time_taken(min)'].mean(), rows['Time_taken(min)'].std(), rows['distance'].mean())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for scale in args.scales:
+        df = clean_orders(make_raw_orders(scale)).loc[:, PROFILE_COLUMNS]
+        for kind in ENTITY_KINDS:
+            keys = df['Delivery_person_ID'] if kind == 'driver' else restaurant_codes(df['Delivery_person_ID'])
+            start = time.perf_counter()
+            index = build_index(df, kind)
+            t_build = time.perf_counter() - start
+            labels = [index.labels[i] for i in rng.integers(len(index.labels), size=args.lookups)]
+
+            start = time.perf_counter()
+            stats = [profile(index, label) for label in labels]
+            t_profile = (time.perf_counter() - start) / len(labels)
+            start = time.perf_counter()
+            orders = [entity_orders(index, df, label) for label in labels]
+            t_orders = (time.perf_counter() - start) / len(labels)
+            start = time.perf_counter()
+            expected = [groupby_profile(df, keys, label) for label in labels]
+            t_scan = (time.perf_counter() - start) / len(labels)
+
+            for found, selected, (rows, values) in zip(stats, orders, expected):
+                assert selected.index.equals(rows.index)
+                result = found[['orders', 'rating_mean', 'rating_std', 'time_mean', 'time_std', 'distance_mean']]
+                assert np.allclose(result.to_numpy('float64'), np.array(values, dtype='float64'), equal_nan=True)
+            print(f'escala {scale:>3}  {kind:<10} {len(index.labels):>6} entidades  índice {t_build:6.3f}s  '
+                  f'perfil {t_profile * 1e6:6.1f} µs  pedidos {t_orders * 1e6:6.1f} µs  '
+                  f'filtro+agregação {t_scan * 1e6:8.1f} µs  paridade ok')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Paridade e tempo do relatório offline (`core.report`): a grade inteira
+contra as métricas das páginas (`core.metrics`) calculadas filtro a
+filtro, como o app faz, numa amostra de pontos da grade.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_report --scales 1 10 --samples 25
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_raw_orders
+from core import metrics, report
+from core.cleaning import REQUIRED_EMPRESA, REQUIRED_ENTREGADORES, REQUIRED_RESTAURANTES, clean_orders, drop_missing
+from core.columnar import from_epoch_days
+from core.cube import build_cube, filter_cube
+
+def page_tables(cubes, date_max, traffic):
+    """ As mesmas tabelas, calculadas pelas funções das páginas para um único filtro """
+    empresa, entregadores, restaurantes = (filter_cube(cube, date_max, traffic) for cube in cubes)
+    age, vehicle = metrics.age_min_max(entregadores), metrics.vehicle_condition_min_max(entregadores)
+    festival = [metrics.avg_std_time_delivery(restaurantes, value, op)
+                for value in ('Yes', 'No') for op in ('avg_time', 'std_time')]
+    top = [metrics.top_delivers(entregadores, top_asc=ascending).assign(ranking=name)
+           for name, ascending in (('fastest', True), ('slowest', False))]
+    return {
+        'orders_by_day': metrics.orders_by_day(empresa),
+        'orders_by_traffic': metrics.orders_by_traffic(empresa),
+        'orders_by_city_traffic': metrics.orders_by_city_traffic(empresa),
+        'orders_by_week': metrics.orders_share_by_week(empresa),
+        'entregadores_overview': pd.DataFrame([[*age, *vehicle]]),
+        'rating_by_traffic': metrics.rating_mean_std(entregadores, 'Road_traffic_density'),
+        'rating_by_weather': metrics.rating_mean_std(entregadores, 'Weatherconditions'),
+        'driver_ratings': metrics.ratings_by_driver(entregadores),
+        'top_drivers': pd.concat(top, ignore_index=True),
+        'restaurantes_overview': pd.DataFrame([[metrics.drivers_count(restaurantes),
+                                                metrics.mean_distance(restaurantes), *festival]]),
+        'time_by_city': metrics.time_mean_std(restaurantes, ['City']),
+        'time_by_city_type': metrics.time_mean_std(restaurantes, ['City', 'Type_of_order']),
+        'time_by_city_traffic': metrics.time_mean_std(restaurantes, ['City', 'Road_traffic_density']),
+        'distance_by_city': metrics.distance_by_city(restaurantes),
+    }
+
+# Colunas do relatório comparadas com cada tabela das páginas (na mesma ordem)
+COLUMNS = {
+    'orders_by_week': ['week_of_year', 'orders', 'Delivery_person_ID', 'order_by_deliverer'],
+    'entregadores_overview': ['age_min', 'age_max', 'vehicle_min', 'vehicle_max'],
+    'top_drivers': ['City', 'Delivery_person_ID', 'Time_taken(min)', 'orders', 'ranking'],
+    'restaurantes_overview': ['drivers', 'mean_distance', 'festival_avg_time', 'festival_std_time',
+                              'no_festival_avg_time', 'no_festival_std_time'],
+}
+
+def assert_same(name, expected, result):
+    result = result.loc[:, COLUMNS.get(name, list(result.columns))].reset_index(drop=True)
+    expected = expected.reset_index(drop=True)
+    assert expected.shape == result.shape, f'{name}: {expected.shape} != {result.shape}'
+    for left, right in zip(expected.columns, result.columns):
+        a, b = expected[left], result[right]
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            assert np.allclose(a.to_numpy('float64'), b.to_numpy('float64'), rtol=1e-6, equal_nan=True), \
+                f'{name}.{right} diferente'
+        else:
+            assert (a.astype(str).to_numpy() == b.astype(str).to_numpy()).all(), f'{name}.{right} diferente'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--samples', type=int, default=25)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for scale in args.scales:
+        df = clean_orders(make_raw_orders(scale))
+        start = time.perf_counter()
+        tables = report.build_report(df)
+        t_grid = time.perf_counter() - start
+
+        cubes = [build_cube(drop_missing(df, required))
+                 for required in (REQUIRED_EMPRESA, REQUIRED_ENTREGADORES, REQUIRED_RESTAURANTES)]
+        grid = report.build_grid(cubes)
+        n_points = len(grid.days) * ((1 << len(grid.levels)) - 1)
+
+        start = time.perf_counter()
+        for _ in range(args.samples):
+            day = from_epoch_days(grid.days[rng.integers(len(grid.days))] + rng.integers(0, 2, size=1))[0]
+            mask = int(rng.integers(1, 1 << len(grid.levels)))
+            traffic = [level for i, level in enumerate(grid.levels) if mask >> i & 1]
+            for name, expected in page_tables(cubes, day, traffic).items():
+                assert_same(name, expected, report.lookup(tables[name], day, traffic))
+        t_pages = (time.perf_counter() - start) / args.samples
+
+        print(f'escala {scale:>3}  {len(df):>8} pedidos  {n_points} pontos na grade  relatório {t_grid:6.2f}s  '
+              f'páginas {t_pages:.3f}s por ponto (~{t_pages * n_points:7.1f}s a grade)  paridade ok')
+
+if __name__ == '__main__':
+    main()
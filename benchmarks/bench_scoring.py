@@ -0,0 +1,59 @@
+"""
+Vazão da pontuação (`core.scoring`) em pedidos/s por tamanho de lote,
+no arquivo e no modo streaming, e paridade entre os dois caminhos.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_scoring --scales 1 10 --batches 64 1024 8192
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_raw_orders
+from core.cleaning import clean_orders
+from core.scoring import SUBMISSION_COLUMNS, fit, score_file, score_stream
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--batches', type=int, nargs='+', default=[64, 1024, 8192])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = fit(clean_orders(make_raw_orders(1, seed=1)))
+    print(f'treino {time.perf_counter() - start:.3f}s')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            raw = make_raw_orders(scale).drop(columns='Time_taken(min)')
+            test_path, out_path = os.path.join(tmp, 'test.csv'), os.path.join(tmp, 'submission.csv')
+            raw.to_csv(test_path, index=False)
+            with open(test_path) as f:
+                lines = f.readlines()
+
+            for batch in args.batches:
+                start = time.perf_counter()
+                scored = score_file(model, test_path, out_path, batch)
+                t_file = time.perf_counter() - start
+                expected = pd.read_csv(out_path)
+
+                out = io.StringIO()
+                start = time.perf_counter()
+                score_stream(model, lines, out, batch)
+                t_stream = time.perf_counter() - start
+                out.seek(0)
+                streamed = pd.read_csv(out)
+
+                assert list(expected.columns) == SUBMISSION_COLUMNS and len(expected) == len(raw)
+                assert (expected['ID'] == streamed['ID']).all()
+                assert np.allclose(expected.iloc[:, 1], streamed.iloc[:, 1], rtol=1e-9)
+                print(f'escala {scale:>3}  lote {batch:>5}  arquivo {scored / t_file:>10,.0f} pedidos/s  '
+                      f'streaming {scored / t_stream:>10,.0f} pedidos/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Teste de carga com N sessões simultâneas: cada sessão é um AppTest do
+Streamlit numa thread própria (como o servidor faz com cada navegador),
+abre uma página e troca os filtros da sidebar a cada rerun. Mede a
+latência dos reruns (p50/p95/p99), o pico de memória do processo e as
+faltas do cache compartilhado de `core.loader`.
+
+Cada nível de concorrência roda num processo novo, para que o pico de
+RSS e o cache de um nível não contaminem o outro. Os filtros saem de um
+conjunto fixo de combinações (`--combos`), como usuários que repetem os
+recortes mais comuns: com o cache do processo, a quantidade de faltas e
+a memória devem ficar quase constantes quando o número de sessões cresce.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_sessions --sessions 1 4 16 --reruns 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+PAGES = ['pages/1visao_empresa.py', 'pages/2visao_entregadores.py', 'pages/3visao_restaurante.py']
+
+DATES = [datetime(2022, 4, 13), datetime(2022, 3, 20), datetime(2022, 3, 6), datetime(2022, 2, 20)]
+TRAFFIC = [['Low', 'Medium', 'High', 'Jam'], ['Low', 'Medium'], ['High', 'Jam'], ['Jam'], ['Low']]
+
+def filter_combos(n, seed=0):
+    """ `n` combinações (data, trânsito) sorteadas; a primeira é o padrão da sidebar """
+    rng = np.random.default_rng(seed)
+    combos = [(DATES[0], TRAFFIC[0])]
+    while len(combos) < min(n, len(DATES) * len(TRAFFIC)):
+        combo = (DATES[rng.integers(len(DATES))], TRAFFIC[rng.integers(len(TRAFFIC))])
+        if combo not in combos:
+            combos.append(combo)
+    return combos
+
+# ====================================================
+# Sessões (dentro do processo de cada nível)
+# ====================================================
+
+def share_runtime():
+    """
+    O AppTest instala um Runtime falso global a cada run e o apaga no fim,
+    o que quebra runs simultâneos em threads. Como no servidor de verdade,
+    todas as sessões passam a usar um Runtime só (o último instalado). A
+    compilação das páginas, que o servidor faz uma vez e o AppTest refaz a
+    cada run, é serializada: `compile` em threads simultâneas falha no
+    Python 3.11.
+    """
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    config.set_option('global.appTest', True)
+    shared = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            shared[:] = [cls._instance]
+        if not shared:
+            raise RuntimeError("Runtime hasn't been created!")
+        return shared[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(shared))
+
+    compiling = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def locked_get_bytecode(self, script_path):
+        with compiling:
+            return get_bytecode(self, script_path)
+
+    ScriptCache.get_bytecode = locked_get_bytecode
+
+def run_session(app, combos, reruns, seed, start, result):
+    """ Uma sessão: primeiro render e `reruns` trocas de filtro sorteadas em `combos` """
+    rng = np.random.default_rng(seed)
+    result['latencies'], result['errors'] = [], 0
+    start.wait()
+    try:
+        clock = time.perf_counter()
+        app.run()
+        result['cold'] = time.perf_counter() - clock
+        result['errors'] += len(app.exception)
+
+        for _ in range(reruns):
+            date_max, traffic = combos[rng.integers(len(combos))]
+            app.sidebar.slider[0].set_value(date_max)
+            app.sidebar.multiselect[0].set_value(traffic)
+            clock = time.perf_counter()
+            app.run()
+            result['latencies'].append(time.perf_counter() - clock)
+            result['errors'] += len(app.exception)
+    except Exception as error:  # a sessão para, mas o nível continua e conta o erro
+        result['errors'] += 1
+        print(f'sessão interrompida: {error!r}', file=sys.stderr)
+
+def run_level(sessions, reruns, combos, pages, seed):
+    """ `sessions` sessões simultâneas, distribuídas entre `pages`; devolve o resumo do nível """
+    from streamlit.testing.v1 import AppTest
+
+    from core import loader
+    from core.streaming import peak_rss_mb
+
+    share_runtime()
+    # Os imports não entram no pico atribuído às sessões
+    baseline = peak_rss_mb()
+    apps = [AppTest.from_file(os.path.abspath(pages[i % len(pages)]), default_timeout=600) for i in range(sessions)]
+    start = threading.Barrier(sessions)
+    results = [{} for _ in range(sessions)]
+    threads = [threading.Thread(target=run_session, args=(apps[i], combos, reruns, seed + i, start, results[i]))
+               for i in range(sessions)]
+    clock = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - clock
+
+    latencies = np.array([t for result in results for t in result.get('latencies', [])])
+    info = loader.cache_info()
+    return {'sessions': sessions, 'reruns': len(latencies), 'wall_s': wall,
+            'cold_p50_s': float(np.median([result['cold'] for result in results if 'cold' in result])),
+            'p50_s': float(np.percentile(latencies, 50)), 'p95_s': float(np.percentile(latencies, 95)),
+            'p99_s': float(np.percentile(latencies, 99)),
+            'baseline_mb': baseline, 'peak_mb': peak_rss_mb(),
+            'misses': info['misses'], 'hits': info['hits'], 'cache_mb': info['bytes'] / 2**20,
+            'errors': sum(result['errors'] for result in results)}
+
+# ====================================================
+# Execução
+# ====================================================
+
+def measure(sessions, args):
+    """ Roda um nível de concorrência num processo novo """
+    command = [sys.executable, '-m', 'benchmarks.bench_sessions', '--worker', str(sessions),
+               '--reruns', str(args.reruns), '--combos', str(args.combos), '--seed', str(args.seed), *args.pages]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', default=PAGES)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--reruns', type=int, default=10, help='trocas de filtro por sessão')
+    parser.add_argument('--combos', type=int, default=6, help='combinações distintas de filtros sorteadas')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--worker', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        combos = filter_combos(args.combos, args.seed)
+        print(json.dumps(run_level(args.worker, args.reruns, combos, args.pages, args.seed)))
+        return
+
+    failed = False
+    for sessions in args.sessions:
+        level = measure(sessions, args)
+        extra = level['peak_mb'] - level['baseline_mb']
+        print(f'{sessions:>3} sessões  {level["reruns"]:>4} reruns  '
+              f'p50 {level["p50_s"] * 1e3:7.1f} ms  p95 {level["p95_s"] * 1e3:7.1f} ms  '
+              f'p99 {level["p99_s"] * 1e3:7.1f} ms  1º render {level["cold_p50_s"]:5.2f}s  '
+              f'pico RSS {level["peak_mb"]:7.1f} MiB (+{extra:6.1f}, {extra / sessions:5.1f}/sessão)  '
+              f'cache {level["cache_mb"]:5.1f} MiB, {level["misses"]} faltas / {level["hits"]} acertos  '
+              f'erros {level["errors"]}')
+        failed = failed or level['errors'] > 0
+
+    if failed:
+        sys.exit('houve exceções nas páginas durante o teste de carga')
+
+if __name__ == '__main__':
+    main()
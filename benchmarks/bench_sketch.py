@@ -0,0 +1,64 @@
+"""
+Erro e tempo da contagem aproximada de entregadores (`core.sketch`)
+contra a contagem exata do cubo, para várias combinações de filtros.
+Em cada réplica do test.csv os IDs recebem um sufixo, então a quantidade
+de entregadores distintos cresce com a escala.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_sketch --scales 1 10 100
+"""
+import argparse
+import itertools
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.bench_cube import TRAFFIC
+from benchmarks.synthetic import make_raw_orders
+from core.cleaning import clean_orders
+from core.cube import build_cube, distinct_drivers, filter_cube
+from core.sketch import approx_distinct_drivers, build_sketches, filter_sketches
+
+def distinct_ids(scale):
+    """ Pedidos sintéticos com `scale` vezes mais entregadores distintos """
+    df = make_raw_orders(scale=scale)
+    replica = np.arange(len(df)) // (len(df) // scale)
+    df['Delivery_person_ID'] = df['Delivery_person_ID'].str.strip() + '-' + replica.astype(str)
+    return clean_orders(df)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    filters = list(itertools.product([datetime(2022, 3, 1), datetime(2022, 3, 20), datetime(2022, 4, 13)],
+                                     [TRAFFIC, ['Low', 'Jam'], ['Medium']]))
+    for scale in args.scales:
+        cube = build_cube(distinct_ids(scale))
+        start = time.perf_counter()
+        sketches = build_sketches(cube.drivers)
+        t_build = time.perf_counter() - start
+
+        t_exact = t_approx = 0
+        errors = []
+        for date_max, traffic in filters:
+            start = time.perf_counter()
+            filtered = filter_cube(cube, date_max, traffic)
+            exact = [distinct_drivers(filtered.drivers),
+                     *distinct_drivers(filtered.drivers, 'week_of_year')['Delivery_person_ID']]
+            t_exact += time.perf_counter() - start
+
+            start = time.perf_counter()
+            selected = filter_sketches(sketches, date_max, traffic)
+            approx = [approx_distinct_drivers(selected),
+                      *approx_distinct_drivers(selected, 'week_of_year')['Delivery_person_ID']]
+            t_approx += time.perf_counter() - start
+            errors.extend(np.abs(np.array(approx) / np.array(exact) - 1))
+
+        print(f'{scale:>4}x {distinct_drivers(cube.drivers):>8} entregadores  sketches {t_build:6.3f}s  '
+              f'por filtro: exato {t_exact / len(filters):6.4f}s  aproximado {t_approx / len(filters):6.4f}s  '
+              f'erro médio {np.mean(errors):6.2%}  máximo {np.max(errors):6.2%}')
+
+if __name__ == '__main__':
+    main()
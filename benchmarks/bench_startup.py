@@ -0,0 +1,70 @@
+"""
+Tempo de inicialização de cada página: primeiro render num processo novo
+(imports + leitura/cache dos dados + render) e um rerun logo em seguida,
+com os módulos pesados que o primeiro render importou (os que o próprio
+harness de teste do Streamlit já importa não contam).
+
+Cada página roda num subprocesso próprio, para que o primeiro render seja
+de fato frio (nenhum import ou cache herdado do processo do benchmark).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_startup [--budget 2.5] [Home.py pages/1visao_empresa.py ...]
+"""
+import argparse
+import glob
+import json
+import subprocess
+import sys
+
+# Módulos pesados acompanhados (carregados só quando a página precisa)
+HEAVY_MODULES = ('plotly', 'folium', 'PIL', 'haversine')
+
+# Roda dentro do subprocesso: mede o import do streamlit, o primeiro render e um rerun
+_PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_import = time.perf_counter() - start
+
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+already = set(sys.modules)
+start = time.perf_counter()
+app.run()
+t_cold = time.perf_counter() - start
+loaded = sorted(m for m in json.loads(sys.argv[2]) if m in sys.modules and m not in already)
+
+start = time.perf_counter()
+app.run()
+t_warm = time.perf_counter() - start
+print(json.dumps({'import_s': t_import, 'cold_s': t_cold, 'warm_s': t_warm,
+                  'heavy': loaded, 'errors': len(app.exception)}))
+'''
+
+def measure(page):
+    """ Tempos da página `page` num processo novo """
+    result = subprocess.run([sys.executable, '-c', _PROBE, page, json.dumps(HEAVY_MODULES)],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', default=None)
+    parser.add_argument('--budget', type=float, default=None,
+                        help='limite (s) para o primeiro render; páginas acima dele fazem o script falhar')
+    args = parser.parse_args()
+    pages = args.pages or ['Home.py'] + sorted(glob.glob('pages/*.py'))
+
+    over_budget = []
+    for page in pages:
+        timing = measure(page)
+        print(f'{page:<32} import {timing["import_s"]:6.2f}s  1º render {timing["cold_s"]:6.2f}s  '
+              f'rerun {timing["warm_s"]:6.2f}s  erros {timing["errors"]}  '
+              f'pesados: {", ".join(timing["heavy"]) or "-"}')
+        if args.budget is not None and timing['cold_s'] > args.budget:
+            over_budget.append(page)
+
+    if over_budget:
+        sys.exit(f'acima do limite de {args.budget}s: {", ".join(over_budget)}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Paridade e pico de memória do pipeline em blocos (`core.streaming`)
+contra o carregamento completo. Cada modo roda num processo separado
+para que o pico de RSS de um não contamine o outro.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_streaming --scales 10 100
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_train_csv
+
+def run(path, *options):
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-m', 'core.streaming', path, *options],
+                            check=True, capture_output=True, text=True).stdout
+    result = json.loads(output)
+    return result, result.pop('peak_rss_mb'), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f'train_{scale}x.csv')
+            rows = write_train_csv(path, scale=scale)
+            for page in ('empresa', 'entregadores', 'restaurantes'):
+                expected, rss_memory, t_memory = run(path, '--page', page, '--in-memory')
+                result, rss_stream, t_stream = run(path, '--page', page, '--chunksize', str(args.chunksize))
+                assert result == expected, f'{page}: resultados diferentes'
+                print(f'{scale:>4}x {rows:>9} linhas  {page:<13} pico RSS: completo {rss_memory:7.1f} MiB '
+                      f'({t_memory:5.1f}s)  em blocos {rss_stream:7.1f} MiB ({t_stream:5.1f}s)')
+
+if __name__ == '__main__':
+    main()
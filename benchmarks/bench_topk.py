@@ -0,0 +1,71 @@
+"""
+Paridade e tempo do top-k por cidade (`core.ranking`) contra a ordenação
+completa seguida de `groupby('City').head(k)`, com centenas de milhares
+de entregadores sintéticos.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_topk --drivers 10000 100000 500000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.timing import timed
+from core.ranking import driver_totals, merge_totals, top_k_per_city
+
+CITIES = ['Metropolitian', 'Semi-Urban', 'Urban']
+
+def make_drivers(n_drivers, rows_per_driver=4, seed=0):
+    """ Tabela `drivers` do cubo com `n_drivers` entregadores (várias linhas por entregador) """
+    rng = np.random.default_rng(seed)
+    ids = np.array([f'DRV{i:07d}' for i in range(n_drivers)])
+    driver = np.repeat(np.arange(n_drivers), rows_per_driver)
+    n = len(driver)
+    time_n = rng.integers(0, 6, n)
+    return pd.DataFrame({
+        'City': pd.Categorical.from_codes(driver % len(CITIES), CITIES),
+        'Delivery_person_ID': pd.Categorical.from_codes(driver, ids),
+        'orders': time_n + rng.integers(0, 2, n),
+        'time_n': time_n,
+        'time_sum': time_n * rng.integers(10, 55, n).astype('float64'),
+    })
+
+def full_sort(drivers, k, ascending, min_orders):
+    """ Referência: médias de todos os entregadores, ordenação completa e head(k) por cidade """
+    df_aux = drivers.groupby(['City', 'Delivery_person_ID'], observed=True)[['time_sum', 'time_n']].sum()
+    df_aux = df_aux.loc[df_aux['time_n'] >= min_orders, :]
+    means = (df_aux['time_sum'] / df_aux['time_n']).rename('Time_taken(min)').reset_index()
+    means['rank'] = means['Time_taken(min)'] if ascending else -means['Time_taken(min)']
+    means = means.sort_values(['City', 'rank', 'Delivery_person_ID'])
+    return means.groupby('City', observed=True).head(k)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--drivers', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--min-orders', type=int, default=3)
+    args = parser.parse_args()
+
+    for n_drivers in args.drivers:
+        drivers = make_drivers(n_drivers)
+        for ascending in (True, False):
+            expected, t_sort = timed(lambda: full_sort(drivers, args.k, ascending, args.min_orders))
+            totals, t_totals = timed(lambda: driver_totals(drivers))
+            result, t_topk = timed(lambda: top_k_per_city(totals, args.k, ascending, args.min_orders))
+
+            assert (result['Delivery_person_ID'].astype(str).tolist() ==
+                    expected['Delivery_person_ID'].astype(str).tolist()), 'ranking diferente'
+            assert np.allclose(result['Time_taken(min)'], expected['Time_taken(min)'])
+            print(f'{n_drivers:>8} entregadores  {"rápidos" if ascending else "lentos ":<8} '
+                  f'ordenação completa {t_sort:7.3f}s  totais {t_totals:7.3f}s  top-k {t_topk:7.3f}s')
+
+        # Lote novo: só as linhas do lote são somadas às totais existentes
+        batch = make_drivers(n_drivers, rows_per_driver=1, seed=1).sample(frac=0.01, random_state=0)
+        merged, t_merge = timed(lambda: merge_totals(totals, driver_totals(batch)))
+        recomputed = driver_totals(pd.concat([drivers, batch], ignore_index=True))
+        assert top_k_per_city(merged, args.k).equals(top_k_per_city(recomputed, args.k))
+        print(f'{n_drivers:>8} entregadores  lote de {len(batch)} linhas: atualização incremental {t_merge:7.3f}s')
+
+if __name__ == '__main__':
+    main()
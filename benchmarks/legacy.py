@@ -0,0 +1,59 @@
+"""
+Cópia das funções `clean_code` originais de cada página, usada como
+referência de paridade e de tempo nos benchmarks e nos testes.
+"""
+import numpy as np
+import pandas as pd
+from haversine import haversine
+
+def read_raw(path):
+    """ Lê o CSV como as páginas liam (colunas texto com dtype object) """
+    if hasattr(pd.options.future, 'infer_string'):
+        with pd.option_context('future.infer_string', False):
+            return pd.read_csv(path, low_memory=False)
+    return pd.read_csv(path, low_memory=False)
+
+def clean_empresa(df):
+    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+    df = df.loc[df['Delivery_person_Age'] != 'NaN', :].copy()
+    df = df.loc[df['City'] != 'NaN', :]
+    df = df.loc[df['Road_traffic_density'] != 'NaN', :]
+    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
+    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1]).astype(int)
+    df['week_of_year'] = df['Order_Date'].dt.strftime('%U')
+    return df
+
+def clean_entregadores(df):
+    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+    df = df.loc[df['Delivery_person_Age'] != 'NaN', :].copy()
+    df['Delivery_person_Age'] = df['Delivery_person_Age'].astype(int)
+    df['Delivery_person_Ratings'] = df['Delivery_person_Ratings'].astype(float)
+    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
+    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1]).astype(int)
+    return df
+
+def clean_restaurantes(df):
+    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+    df = df.loc[df['City'] != 'NaN', :]
+    df = df.loc[df['Festival'] != 'NaN', :]
+    df = df.loc[df['Road_traffic_density'] != 'NaN', :]
+    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
+    df['Time_taken(min)'] = df['Time_taken(min)'].str.extract(r'(\d+)').astype(int)
+    df['distance'] = df.apply(lambda x: haversine(
+        (x['Restaurant_latitude'], x['Restaurant_longitude']),
+        (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1)
+    return df
+
+def assert_parity(df_old, df_new):
+    """ Confere que os valores de cada coluna antiga são iguais na saída nova """
+    assert df_old.index.equals(df_new.index), 'linhas diferentes'
+    for col in df_old.columns:
+        old, new = df_old[col], df_new[col]
+        if pd.api.types.is_datetime64_any_dtype(new):
+            ok = old.equals(new)
+        elif pd.api.types.is_numeric_dtype(new):
+            ok = np.allclose(pd.to_numeric(old, errors='coerce').astype('float64'),
+                             new.astype('float64'), rtol=1e-6, equal_nan=True)
+        else:
+            ok = old.astype(str).equals(new.astype(object).fillna('NaN').astype(str))
+        assert ok, f'coluna {col} diferente'
@@ -0,0 +1,169 @@
+"""
+Suíte de benchmarks do dashboard, sem Streamlit: lê o CSV, limpa para
+cada página, aplica o filtro da sidebar e mede cada agregação das páginas
+(inclusive haversine e mapas) separadamente, em dados sintéticos 1x/10x/100x.
+
+O resultado vai para um JSON (commit, versões e tempos por etapa) que pode
+ser comparado com o de outro commit.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.run --scales 1 10 100 --output bench_output.json
+    python -m benchmarks.run --scales 1 --output novo.json --compare bench_output.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_train_csv
+from benchmarks.timing import timed
+from core import metrics
+from core.cleaning import REQUIRED_EMPRESA, REQUIRED_ENTREGADORES, REQUIRED_RESTAURANTES, clean_orders
+from core.cube import build_cube, filter_cube
+from core.geo import haversine_np
+from core.maps import MAP_MODES, filter_bins, location_bins, median_locations, render_map
+
+# Filtro da sidebar usado em todas as medições (um recorte típico)
+DATE_MAX = datetime(2022, 3, 20)
+TRAFFIC = ['Low', 'Medium', 'Jam']
+
+PAGES = {'empresa': REQUIRED_EMPRESA, 'entregadores': REQUIRED_ENTREGADORES,
+         'restaurantes': REQUIRED_RESTAURANTES}
+
+# Agregações de cada página, sobre o cubo já filtrado
+PAGE_METRICS = {
+    'empresa': {
+        'orders_by_day': metrics.orders_by_day,
+        'orders_by_traffic': metrics.orders_by_traffic,
+        'orders_by_city_traffic': metrics.orders_by_city_traffic,
+        'orders_by_week': metrics.orders_by_week,
+        'orders_share_by_week': metrics.orders_share_by_week,
+    },
+    'entregadores': {
+        'age_min_max': metrics.age_min_max,
+        'vehicle_condition_min_max': metrics.vehicle_condition_min_max,
+        'ratings_by_driver': metrics.ratings_by_driver,
+        'rating_by_traffic': lambda cube: metrics.rating_mean_std(cube, 'Road_traffic_density'),
+        'rating_by_weather': lambda cube: metrics.rating_mean_std(cube, 'Weatherconditions'),
+        'top_delivers_fastest': lambda cube: metrics.top_delivers(cube, top_asc=True),
+        'top_delivers_slowest': lambda cube: metrics.top_delivers(cube, top_asc=False),
+    },
+    'restaurantes': {
+        'drivers_count': metrics.drivers_count,
+        'mean_distance': metrics.mean_distance,
+        'avg_std_time_delivery': lambda cube: [metrics.avg_std_time_delivery(cube, festival, op)
+                                               for festival in ('Yes', 'No')
+                                               for op in ('avg_time', 'std_time')],
+        'time_by_city': lambda cube: metrics.time_mean_std(cube, ['City']),
+        'time_by_city_order': lambda cube: metrics.time_mean_std(cube, ['City', 'Type_of_order']),
+        'time_by_city_traffic': lambda cube: metrics.time_mean_std(cube, ['City', 'Road_traffic_density']),
+        'distance_by_city': metrics.distance_by_city,
+    },
+}
+
+# ====================================================
+# Medição
+# ====================================================
+
+def _rows(result):
+    if isinstance(result, tuple) and hasattr(result, 'cells'):
+        return len(result.cells)
+    return len(result) if hasattr(result, '__len__') and not isinstance(result, str) else None
+
+def run_scale(path, repeat=1, maps=True):
+    """ Tempo de cada etapa para o CSV em `path`: {etapa: {'seconds', 'rows'}} """
+    stages = {}
+
+    def stage(name, fn):
+        result, seconds = timed(fn, repeat)
+        stages[name] = {'seconds': round(seconds, 6), 'rows': _rows(result)}
+        return result
+
+    raw = stage('csv_parse', lambda: pd.read_csv(path, low_memory=False))
+    for page, required in PAGES.items():
+        df = stage(f'{page}.clean', lambda: clean_orders(raw, required))
+        stage(f'{page}.filter_rows',
+              lambda: df.loc[(df['Order_Date'] <= DATE_MAX) & df['Road_traffic_density'].isin(TRAFFIC), :])
+        cube = stage(f'{page}.build_cube', lambda: build_cube(df))
+        cube = stage(f'{page}.filter_cube', lambda: filter_cube(cube, DATE_MAX, TRAFFIC))
+        for name, fn in PAGE_METRICS[page].items():
+            stage(f'{page}.{name}', lambda: fn(cube))
+
+        if page == 'empresa':
+            coords = [df[col].to_numpy() for col in ('Restaurant_latitude', 'Restaurant_longitude',
+                                                      'Delivery_location_latitude', 'Delivery_location_longitude')]
+            stage('haversine', lambda: haversine_np(*coords))
+            empresa = df
+
+    selected = empresa.loc[(empresa['Order_Date'] <= DATE_MAX) & empresa['Road_traffic_density'].isin(TRAFFIC), :]
+    medians = stage('map.median_locations', lambda: median_locations(selected))
+    bins = stage('map.location_bins', lambda: location_bins(empresa))
+    bins = stage('map.filter_bins', lambda: filter_bins(bins, DATE_MAX, TRAFFIC))
+    if maps:
+        for mode in MAP_MODES:
+            stage(f'map.render_{mode}', lambda: render_map(mode, medians=medians, bins=bins))
+    return stages
+
+# ====================================================
+# Saída
+# ====================================================
+
+def environment():
+    """ Commit e versões, para identificar o resultado """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'machine': platform.machine()}
+
+def compare(result, baseline):
+    """ Razão (novo / base) de cada etapa presente nos dois resultados """
+    print(f"\nComparação com {baseline['environment'].get('commit')} (novo / base):")
+    for scale, stages in result['scales'].items():
+        base = baseline['scales'].get(scale, {})
+        for name, value in stages.items():
+            if name in base and base[name]['seconds'] > 0:
+                ratio = value['seconds'] / base[name]['seconds']
+                print(f'{scale:>5}x  {name:<40} {ratio:6.2f}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3, help='repetições por etapa (vale o melhor tempo)')
+    parser.add_argument('--output', help='arquivo JSON com os resultados')
+    parser.add_argument('--compare', help='JSON de outro commit para comparar')
+    parser.add_argument('--no-maps', action='store_true', help='não renderiza os mapas (folium)')
+    args = parser.parse_args()
+
+    result = {'environment': environment(), 'filter': {'date_max': DATE_MAX.isoformat(), 'traffic': TRAFFIC},
+              'scales': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f'train_{scale}x.csv')
+            rows = write_train_csv(path, scale=scale)
+            stages = run_scale(path, repeat=args.repeat, maps=not args.no_maps)
+            result['scales'][str(scale)] = stages
+
+            print(f'{scale:>4}x {rows:>9} linhas')
+            for name, value in stages.items():
+                print(f"      {name:<40} {value['seconds']:9.4f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+if __name__ == '__main__':
+    sys.exit(main())
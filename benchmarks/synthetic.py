@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+# ====================================================
+# Geração de Dados Sintéticos
+# ====================================================
+
+TEST_PATH = 'dataset/test.csv'
+
+def make_raw_orders(scale=1, base=TEST_PATH, seed=0, shift_days=0):
+    """
+    Gera pedidos no formato bruto do train.csv (com os espaços e 'NaN'
+    originais), repetindo o test.csv `scale` vezes. Como o test.csv não
+    tem a coluna alvo, o 'Time_taken(min)' é sorteado no formato '(min) 24'.
+    `shift_days` desloca as datas dos pedidos (ex.: para simular um lote novo).
+    """
+    df = pd.read_csv(base, dtype=str, keep_default_na=False)
+    df = pd.concat([df] * scale, ignore_index=True) if scale > 1 else df
+
+    if shift_days:
+        dates = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y') + pd.Timedelta(days=shift_days)
+        df['Order_Date'] = dates.dt.strftime('%d-%m-%Y')
+
+    rng = np.random.default_rng(seed)
+    if 'Time_taken(min)' not in df.columns:
+        minutes = pd.Series(rng.integers(10, 55, len(df))).astype(str)
+        df['Time_taken(min)'] = '(min) ' + minutes
+    return df
+
+def write_train_csv(path, scale=1, base=TEST_PATH, seed=0):
+    """ Grava os pedidos sintéticos em `path` e devolve o número de linhas """
+    df = make_raw_orders(scale=scale, base=base, seed=seed)
+    df.to_csv(path, index=False)
+    return len(df)
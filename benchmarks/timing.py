@@ -0,0 +1,17 @@
+import time
+
+# ====================================================
+# Medição
+# ====================================================
+
+def timed(fn, repeat=1):
+    """
+    Executa `fn()` `repeat` vezes e devolve (último resultado, melhor tempo
+    em segundos). O melhor tempo descarta o ruído de GC e de outros processos.
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
@@ -0,0 +1,11 @@
+"""
+Camada compartilhada do Curry Company Growth Dashboard.
+
+Reúne o carregamento e a limpeza dos dados usados pelas páginas em
+`pages/`, para que o trabalho pesado seja feito uma única vez por
+versão do dataset e reaproveitado entre reruns, sessões e páginas.
+
+Nada aqui importa Streamlit, Plotly ou folium no import (o folium só é
+carregado ao renderizar um mapa), então as métricas de `core.metrics`
+podem ser usadas em scripts, benchmarks e jobs em lote.
+"""
@@ -0,0 +1,36 @@
+"""
+Arquivos estáticos das páginas, preparados uma única vez por processo.
+"""
+import functools
+import io
+import os
+
+LOGO_PATH = 'image.png'
+
+# Largura do logo na sidebar (px); o PNG é guardado com o dobro, para telas de alta densidade
+LOGO_WIDTH = 120
+
+def sidebar_logo(path=LOGO_PATH, width=LOGO_WIDTH):
+    """
+    PNG do logo já reduzido, pronto para `st.sidebar.image`. O arquivo
+    original (1024x1024, ~840 KB) só é decodificado de novo quando muda.
+    Retorna None se o logo não puder ser lido.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    return _downscaled_png(path, width * 2, mtime)
+
+@functools.lru_cache(maxsize=8)
+def _downscaled_png(path, size, mtime):
+    try:
+        from PIL import Image
+
+        with Image.open(path) as image:
+            image.thumbnail((size, size))
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue()
+    except (OSError, ImportError):
+        return None
@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from core.geo import haversine_np
+from core.profiling import profiled
+
+# ====================================================
+# Esquema do Dataset
+# ====================================================
+
+# Colunas texto com poucos valores distintos, guardadas como category
+CATEGORY_COLUMNS = ['Delivery_person_ID', 'Time_Orderd', 'Time_Order_picked', 'Weatherconditions',
+                    'Road_traffic_density', 'Type_of_order', 'Type_of_vehicle', 'multiple_deliveries',
+                    'Festival', 'City']
+
+# Colunas que precisam ser válidas (diferentes de 'NaN') em cada página
+REQUIRED_EMPRESA = ('Delivery_person_Age', 'City', 'Road_traffic_density')
+REQUIRED_ENTREGADORES = ('Delivery_person_Age',)
+REQUIRED_RESTAURANTES = ('City', 'Festival', 'Road_traffic_density')
+REQUIRED_HORARIOS = ('City', 'Road_traffic_density')
+
+# Horários 'HH:MM:SS' convertidos em segundos desde a meia-noite: coluna bruta -> coluna nova
+TIME_COLUMNS = {'Time_Orderd': 'order_seconds', 'Time_Order_picked': 'picked_seconds'}
+
+# ====================================================
+# Funções Auxiliares
+# ====================================================
+
+def _factorize(col):
+    """
+    Remove espaços e converte 'NaN' em ausente olhando só os valores
+    distintos. Retorna os códigos por linha (-1 = ausente) e os valores.
+    """
+    codes, uniques = pd.factorize(col)
+    uniques = pd.Index(uniques, dtype=object).str.strip()
+    uniques = uniques.where(uniques != 'NaN')
+
+    # Valores que ficaram iguais depois do strip passam a ter o mesmo código;
+    # a ordenação mantém a mesma ordem de groupby das colunas texto
+    new_codes, values = pd.factorize(uniques, sort=True)
+    new_codes = np.append(new_codes, -1)  # o código -1 continua -1
+    return new_codes[codes], pd.Index(values, dtype=object)
+
+def _take(values, codes):
+    """ Expande os valores distintos para as linhas (ausente = NaN) """
+    if not len(values):  # coluna toda ausente (ex.: um lote pequeno)
+        return pd.Index(np.full(len(codes), np.nan)).astype('datetime64[ns]' if values.dtype.kind == 'M' else 'float64')
+    out = values.take(codes)
+    if codes.size and codes.min() < 0:
+        out = out.where(codes >= 0)
+    return out
+
+def _numeric(col, dtype):
+    """ Converte a coluna para número, aceitando texto com espaços e 'NaN' """
+    if pd.api.types.is_numeric_dtype(col):
+        values = col.to_numpy(dtype='float64')
+    else:
+        codes, uniques = _factorize(col)
+        values = _take(pd.Index(pd.to_numeric(uniques), dtype='float64'), codes).to_numpy()
+    return _as_dtype(values, dtype)
+
+def _as_dtype(values, dtype):
+    """ Inteiros com ausentes usam o tipo nullable do pandas (ex.: Int8) """
+    if np.dtype(dtype).kind == 'i' and np.isnan(values).any():
+        return pd.array(values, dtype=np.dtype(dtype).name.capitalize())
+    return values.astype(dtype)
+
+def _seconds_of_day(col):
+    """
+    Horário 'HH:MM:SS' (coluna category) -> segundos desde a meia-noite em
+    int32, convertendo só os rótulos distintos (fora do formato = ausente)
+    """
+    labels = pd.Index(col.cat.categories, dtype=object)
+    seconds = pd.to_timedelta(labels, errors='coerce') / pd.Timedelta(seconds=1)
+    values = np.append(np.asarray(seconds, dtype='float64'), np.nan)[col.cat.codes.to_numpy('int64')]
+    return _as_dtype(values, 'int32')
+
+def _compact(values):
+    """ Volta para o tipo numpy quando a máscara removeu todos os ausentes """
+    if isinstance(values, pd.arrays.IntegerArray) and not values.isna().any():
+        return values.to_numpy(dtype=values.dtype.numpy_dtype)
+    return values
+
+def _parse_column(col):
+    """ Limpa e converte uma coluna bruta do CSV, sem filtrar linhas """
+    name = col.name
+    if name in CATEGORY_COLUMNS:
+        codes, values = _factorize(col)
+        return pd.Categorical.from_codes(codes, categories=values)
+    if name == 'ID':
+        return col.str.strip().to_numpy()
+    if name in ('Delivery_person_Age', 'Vehicle_condition'):
+        return _numeric(col, 'int8')
+    if name == 'Delivery_person_Ratings':
+        return _numeric(col, 'float32')
+    if name == 'Order_Date':
+        codes, uniques = _factorize(col)
+        return _take(pd.DatetimeIndex(pd.to_datetime(uniques, format='%d-%m-%Y')), codes)
+    if name == 'Time_taken(min)':
+        codes, uniques = _factorize(col)
+        minutes = pd.to_numeric(uniques.str.extract(r'(\d+)', expand=False))
+        return _take(pd.Index(minutes, dtype='int16'), codes).to_numpy()
+    return col.to_numpy()
+
+def _week_of_year(dates):
+    """ Equivalente de strftime('%U') (semana começando no domingo) como category """
+    codes, days = pd.factorize(dates)
+    days_from_sunday = (days.dayofweek + 1) % 7
+    weeks = ((days.dayofyear - 1 - days_from_sunday + 7) // 7).map('{:02d}'.format)
+    week_codes, values = pd.factorize(weeks, sort=True)
+    week_codes = np.append(week_codes, -1)
+    return pd.Categorical.from_codes(week_codes[codes], categories=values)
+
+def _valid_rows(columns, required):
+    """ Máscara das linhas sem ausentes nas colunas de `required` (None = todas) """
+    missing = np.zeros(len(next(iter(columns.values()))), dtype=bool)
+    for col in required:
+        missing |= np.asarray(pd.isna(columns[col]))
+    return ~missing if missing.any() else None
+
+def _select(columns, index, mask):
+    """ Monta o dataframe aplicando a máscara uma única vez em cada coluna """
+    if mask is None:
+        return pd.DataFrame({col: _compact(values) for col, values in columns.items()}, index=index)
+    return pd.DataFrame({col: _compact(values[mask]) for col, values in columns.items()}, index=index[mask])
+
+# ====================================================
+# Limpeza Unificada
+# ====================================================
+
+@profiled
+def clean_orders(df, required=()):
+    """
+    Limpa o dataframe bruto do train.csv em uma única passada.
+
+    Remove espaços, descarta as linhas com 'NaN' nas colunas de
+    `required` com uma única máscara e converte os tipos: idades int8,
+    avaliações float32, tempo de entrega int16 e textos como category.
+    Também calcula a distância restaurante-entrega (km) de forma vetorizada
+    e os horários do pedido e da coleta em segundos (int32).
+    """
+    # Strip e parsing feitos só nos valores distintos de cada coluna
+    parsed = {col: _parse_column(df[col]) for col in df.columns}
+
+    # Filtro de NaNs em uma única máscara
+    df_clean = _select(parsed, df.index, _valid_rows(parsed, required))
+    return derive_columns(df_clean)
+
+def derive_columns(df_clean):
+    """
+    Acrescenta (ou refaz) as colunas calculadas a partir das colunas já
+    limpas. Também migra os lotes gravados com uma versão anterior do
+    cache (`core.storage`), que não têm as colunas mais novas.
+    """
+    # Criando coluna de semana para a Visão Tática
+    df_clean['week_of_year'] = _week_of_year(df_clean['Order_Date'])
+
+    # Cálculo de distância usando Haversine
+    df_clean['distance'] = haversine_np(df_clean['Restaurant_latitude'], df_clean['Restaurant_longitude'],
+                                        df_clean['Delivery_location_latitude'],
+                                        df_clean['Delivery_location_longitude'])
+
+    # Horários em segundos desde a meia-noite (Visão Horários e previsão do tempo de entrega)
+    for col, seconds in TIME_COLUMNS.items():
+        df_clean[seconds] = _seconds_of_day(df_clean[col])
+
+    return df_clean
+
+@profiled
+def drop_missing(df, required=()):
+    """ Aplica o filtro de NaNs de `clean_orders` a um dataframe já limpo """
+    columns = {col: df[col].array for col in df.columns}
+    mask = _valid_rows(columns, required)
+    return df if mask is None else _select(columns, df.index, mask)
+
+def concat_orders(frames, ignore_index=False):
+    """
+    Concatena dataframes limpos mantendo as colunas category (o
+    pd.concat viraria object quando as categorias diferem).
+    """
+    frames = [df for df in frames if len(df)] or list(frames)[:1]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True) if ignore_index else frames[0]
+
+    df = pd.concat(frames, ignore_index=ignore_index)
+    for col in df.columns:
+        if all(col in part and isinstance(part[col].dtype, pd.CategoricalDtype) for part in frames):
+            df[col] = union_categoricals([part[col] for part in frames], sort_categories=True)
+    return df
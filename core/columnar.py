@@ -0,0 +1,41 @@
+"""
+Modelo colunar compacto das chaves do cubo.
+
+As dimensões categóricas (cidade, trânsito, clima, veículo, entregador)
+já saem da limpeza como `category`, ou seja, códigos inteiros mais um
+dicionário de rótulos. As datas ficam como dias desde 1970-01-01 em int32
+(4 bytes por valor, comparação inteira no filtro da sidebar) e só viram
+datetime na hora de exibir.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+def to_epoch_days(dates: pd.Series) -> pd.Series:
+    """ datetime64 -> dias desde 1970-01-01 (int32, -1 para datas ausentes) """
+    days = dates.to_numpy(dtype='datetime64[D]')
+    values = np.where(np.isnat(days), -1, (days - EPOCH).astype('int64')).astype('int32')
+    return pd.Series(values, index=dates.index, name=dates.name)
+
+def from_epoch_days(days: pd.Series) -> pd.Series:
+    """ Dias desde 1970-01-01 -> datetime64 (para os eixos dos gráficos) """
+    values = np.asarray(days, dtype='int64').astype('datetime64[D]').astype('datetime64[ns]')
+    return pd.Series(values, index=getattr(days, 'index', None), name=getattr(days, 'name', None))
+
+def epoch_day(value: date) -> int:
+    """ Data do slider da sidebar -> dia inteiro comparável às chaves do cubo """
+    return int((np.datetime64(value, 'D') - EPOCH).astype('int64'))
+
+def category_codes(values: pd.Series, labels: list[str]) -> np.ndarray:
+    """ Códigos dos rótulos `labels` numa coluna categórica (rótulos ausentes ficam de fora) """
+    categories = values.cat.categories
+    return categories.get_indexer(pd.Index(labels).intersection(categories))
+
+def isin_labels(values: pd.Series, labels: list[str]) -> np.ndarray:
+    """ `values.isin(labels)` comparando os códigos inteiros em vez das strings """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.isin(labels).to_numpy()
+    return np.isin(values.cat.codes.to_numpy(), category_codes(values, labels))
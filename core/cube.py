@@ -0,0 +1,167 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.cleaning import concat_orders
+from core.columnar import to_epoch_days
+from core.profiling import profiled
+from core.store import partition, select
+
+# ====================================================
+# Estrutura do Cubo
+# ====================================================
+
+# Dimensões das células (week_of_year depende só da data, não cria células novas).
+# No cubo, Order_Date é guardado em dias desde 1970-01-01 (int32, ver core.columnar)
+DIMENSIONS = ['Order_Date', 'week_of_year', 'Road_traffic_density', 'City', 'Weatherconditions',
+              'Type_of_order', 'Festival']
+
+# Dimensões da tabela por entregador
+DRIVER_DIMENSIONS = ['Order_Date', 'week_of_year', 'Road_traffic_density', 'City', 'Delivery_person_ID']
+
+# Medidas com contagem, soma e soma dos desvios quadráticos (média e desvio padrão)
+MEASURES = {'time': 'Time_taken(min)', 'rating': 'Delivery_person_Ratings', 'distance': 'distance'}
+
+class Cube(NamedTuple):
+    """
+    Agregados parciais do dataset limpo.
+
+    cells: uma linha por dia x trânsito x cidade x clima x tipo de pedido
+        x festival, com contagem, somas, somas dos desvios quadráticos
+        em torno da média da célula (m2) e min/max.
+    drivers: uma linha por dia x trânsito x cidade x entregador, usada nas
+        métricas por entregador e na contagem exata de entregadores distintos.
+
+    As duas tabelas ficam ordenadas por trânsito e data (`core.store`),
+    para o filtro da sidebar virar busca binária.
+    """
+    cells: pd.DataFrame
+    drivers: pd.DataFrame
+
+# ====================================================
+# Construção
+# ====================================================
+
+@profiled
+def build_cube(df):
+    """ Agrega o dataframe limpo no cubo (uma única vez por versão do dataset) """
+    work = df.loc[:, list(dict.fromkeys(DIMENSIONS + DRIVER_DIMENSIONS))]
+    work['Order_Date'] = to_epoch_days(df['Order_Date'])
+    aggs = {'orders': ('time', 'size')}
+    for name, col in MEASURES.items():
+        work[name] = df[col].astype('float64')
+        aggs[f'{name}_n'] = (name, 'count')
+        aggs[f'{name}_sum'] = (name, 'sum')
+
+    work['age'] = df['Delivery_person_Age']
+    work['vehicle'] = df['Vehicle_condition']
+    aggs.update(age_min=('age', 'min'), age_max=('age', 'max'),
+                vehicle_min=('vehicle', 'min'), vehicle_max=('vehicle', 'max'))
+
+    grouped = work.groupby(DIMENSIONS, observed=True, dropna=False)
+    cells = grouped.agg(**aggs)
+    for name in MEASURES:
+        cells[f'{name}_m2'] = (grouped[name].var(ddof=0) * cells[f'{name}_n']).fillna(0.0)
+    cells = cells.reset_index()
+    drivers = (work.groupby(DRIVER_DIMENSIONS, observed=True, dropna=False)
+                   .agg(orders=('time', 'size'), time_n=('time', 'count'), time_sum=('time', 'sum'),
+                        rating_n=('rating', 'count'), rating_sum=('rating', 'sum'))
+                   .reset_index())
+    return Cube(partition(_observed(cells)), partition(_observed(drivers)))
+
+def _observed(part):
+    """ Só as categorias presentes no cubo (linhas descartadas por `required` não deixam rótulos) """
+    for col in part.columns:
+        if isinstance(part[col].dtype, pd.CategoricalDtype):
+            part[col] = part[col].cat.remove_unused_categories()
+    return part
+
+# ====================================================
+# Atualização Incremental
+# ====================================================
+
+@profiled
+def merge_cubes(cube, other):
+    """
+    Junta o cubo de um lote novo ao cubo existente sem voltar às linhas.
+    Só as células dos dias presentes no lote são recombinadas; as demais
+    são reaproveitadas como estão.
+    """
+    return Cube(_merge_part(cube.cells, other.cells, DIMENSIONS, _combine_cells),
+                _merge_part(cube.drivers, other.drivers, DRIVER_DIMENSIONS,
+                            lambda part, keys: part.groupby(keys, observed=True, dropna=False).sum()))
+
+def _merge_part(old, new, keys, combine):
+    touched = old['Order_Date'].isin(new['Order_Date'].unique()).to_numpy()
+    merged = combine(concat_orders([old.loc[touched, :], new], ignore_index=True), keys).reset_index()
+    return partition(concat_orders([old.loc[~touched, :], merged], ignore_index=True))
+
+def _combine_cells(cells, keys):
+    """ Combina células com as mesmas chaves (somas, min/max e m2 pela fórmula de Chan) """
+    cells = cells.copy()
+    grouped = cells.groupby(keys, observed=True, dropna=False)
+    for name in MEASURES:
+        n, total = cells[f'{name}_n'], cells[f'{name}_sum']
+        group_mean = grouped[f'{name}_sum'].transform('sum') / grouped[f'{name}_n'].transform('sum')
+        cells[f'{name}_m2'] += (n * (total / n - group_mean) ** 2).where(n > 0, 0.0)
+
+    sums = ['orders', *(f'{name}_{part}' for name in MEASURES for part in ('n', 'sum', 'm2'))]
+    result = cells.groupby(keys, observed=True, dropna=False)[sums].sum()
+    extremes = grouped.agg(age_min=('age_min', 'min'), age_max=('age_max', 'max'),
+                           vehicle_min=('vehicle_min', 'min'), vehicle_max=('vehicle_max', 'max'))
+    return result.join(extremes)
+
+# ====================================================
+# Consultas
+# ====================================================
+
+@profiled
+def filter_cube(cube, date_max, traffic_options):
+    """
+    Filtro da sidebar aplicado às fatias do cubo em vez das linhas: busca
+    binária nas partições de trânsito (ver `core.store`). O resultado
+    é uma fatia sem cópia quando os trechos selecionados são contíguos.
+    """
+    return Cube(*(select(part, date_max, traffic_options) for part in cube))
+
+def count_by(cells, keys):
+    """ Quantidade de pedidos por `keys` (coluna 'orders') """
+    return cells.groupby(keys, observed=True)['orders'].sum().reset_index()
+
+def mean_std(cells, keys, measure):
+    """
+    Média e desvio padrão amostral (ddof=1, como no pandas) de `measure`
+    por `keys`. As células são combinadas pela fórmula paralela de Chan
+    (m2 = soma dos m2 + n * (média da célula - média do grupo)^2), que
+    não perde precisão como a soma dos quadrados.
+    Com `keys` vazio devolve uma Series com 'mean' e 'std'.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    n, total, m2 = (cells[f'{measure}_{part}'].to_numpy(dtype='float64') for part in ('n', 'sum', 'm2'))
+
+    # Código do grupo de cada célula (-1 = chave ausente, fica de fora)
+    if keys:
+        grouped = cells.groupby(keys, observed=True)
+        codes, index = grouped.ngroup().fillna(-1).to_numpy(dtype='int64'), grouped.size().index
+    else:
+        codes, index = np.zeros(len(cells), dtype='int64'), pd.RangeIndex(1)
+    valid = codes >= 0
+    codes, n, total, m2 = codes[valid], n[valid], total[valid], m2[valid]
+
+    group_n = np.bincount(codes, weights=n, minlength=len(index))
+    group_sum = np.bincount(codes, weights=total, minlength=len(index))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        group_mean = group_sum / group_n
+        deviation = np.where(n > 0, n * (total / n - group_mean[codes]) ** 2, 0.0)
+        group_m2 = np.bincount(codes, weights=m2 + deviation, minlength=len(index))
+        std = np.where(group_n > 1, np.sqrt(group_m2 / (group_n - 1)), np.nan)
+
+    result = pd.DataFrame({'mean': group_mean, 'std': std}, index=index)
+    return result.reset_index() if keys else result.iloc[0]
+
+def distinct_drivers(drivers, keys=None):
+    """ Entregadores distintos no total ou por `keys` (ex.: 'week_of_year') """
+    if keys is None:
+        return drivers['Delivery_person_ID'].nunique()
+    return drivers.groupby(keys, observed=True)['Delivery_person_ID'].nunique().reset_index()
@@ -0,0 +1,81 @@
+"""
+Redução dos pontos enviados aos gráficos do Plotly.
+
+Barras por data mudam de resolução (dia, semana, mês) conforme o período
+selecionado, e linhas longas são reduzidas com LTTB (Largest Triangle
+Three Buckets), que preserva a forma da série com poucos pontos. Assim o
+JSON de cada gráfico fica limitado a `MAX_POINTS` pontos, não importa
+quantos anos de dados o dataset cubra.
+"""
+import numpy as np
+import pandas as pd
+
+# Pontos por série enviados ao navegador
+MAX_POINTS = 400
+
+# Frequências do pandas (semanas começando no domingo, como o strftime('%U'))
+RESOLUTIONS = {'day': None, 'week': 'W-SAT', 'month': 'M'}
+
+RESOLUTION_LABELS = {'day': 'Dia', 'week': 'Semana', 'month': 'Mês'}
+
+# ====================================================
+# Resolução das Barras por Data
+# ====================================================
+
+def choose_resolution(first, last, max_points=MAX_POINTS):
+    """ Menor resolução (dia, semana ou mês) que cabe em `max_points` barras entre `first` e `last` """
+    days = (pd.Timestamp(last) - pd.Timestamp(first)).days + 1
+    if days <= max_points:
+        return 'day'
+    if days / 7 <= max_points:
+        return 'week'
+    return 'month'
+
+def resample_sum(df, date_col, value_cols, resolution):
+    """ Soma `value_cols` por período de `resolution` (a data vira o início do período) """
+    if resolution == 'day':
+        return df
+    periods = df[date_col].dt.to_period(RESOLUTIONS[resolution]).dt.start_time.rename(date_col)
+    return df.groupby(periods)[list(value_cols)].sum().reset_index()
+
+# ====================================================
+# LTTB para Linhas
+# ====================================================
+
+def lttb(x, y, threshold=MAX_POINTS):
+    """
+    Índices dos pontos mantidos pelo LTTB (sempre o primeiro e o último).
+    Em cada balde entra o ponto que forma o maior triângulo com o ponto
+    escolhido no balde anterior e a média do balde seguinte.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Baldes dos pontos internos (o primeiro e o último ficam de fora)
+    edges = np.linspace(1, n - 1, threshold - 1).astype('int64')
+    means_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    means_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    next_x, next_y = np.append(means_x[1:], x[-1]), np.append(means_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(edges[:-1], edges[1:])):
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[previous] - next_x[bucket]) * (by - y[previous]) -
+                      (x[previous] - bx) * (next_y[bucket] - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+def lttb_frame(df, x_col, y_col, threshold=MAX_POINTS):
+    """ Linhas de `df` mantidas pelo LTTB; eixos x não numéricos usam a posição do ponto """
+    x = df[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype('int64')
+    elif not pd.api.types.is_numeric_dtype(x):
+        x = np.arange(len(df))
+    return df.iloc[lttb(x, df[y_col], threshold)]
@@ -0,0 +1,24 @@
+import numpy as np
+
+# ====================================================
+# Distância Geográfica
+# ====================================================
+
+# Mesmo raio médio da Terra usado pelo pacote `haversine` (Unit.KILOMETERS)
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_np(lat1, lon1, lat2, lon2, dtype=np.float64):
+    """
+    Distância de grande círculo em km entre arrays de coordenadas (graus).
+
+    Calcula todas as linhas de uma vez com numpy, no lugar de chamar
+    `haversine` linha a linha. As diferenças e o termo `a` são sempre
+    calculados em float64, que não perde precisão em distâncias curtas, e
+    só o resultado é convertido para `dtype`: a diferença para o pacote
+    `haversine` fica abaixo de 1e-9 km em float64 e o erro relativo abaixo
+    de 1e-6 em float32 (metade da memória na coluna de distância).
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+
+    a = np.sin((lat2 - lat1) * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2
+    return ((2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(a))).astype(dtype, copy=False)
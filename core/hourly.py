@@ -0,0 +1,111 @@
+"""
+Horários dos pedidos: pedidos por dia da semana x hora, tempo de preparo
+(coleta - pedido, em minutos) e efeito das entregas múltiplas no tempo de
+entrega por cidade, trânsito e veículo.
+
+Os horários já saem da limpeza em segundos desde a meia-noite
+(`order_seconds` e `picked_seconds`, ver `core.cleaning`). As células
+abaixo (dia x trânsito x cidade x veículo x entregas múltiplas x hora do
+pedido) são montadas uma vez por versão do dataset
+(`core.loader.load_hourly`) e ficam particionadas por trânsito e data
+como o cubo (`core.store`): o filtro da sidebar é uma busca binária e
+cada gráfico agrega só células, nunca os pedidos.
+"""
+import numpy as np
+import pandas as pd
+
+from core.columnar import to_epoch_days
+from core.cube import count_by, mean_std
+from core.profiling import profiled
+from core.store import partition
+
+# Colunas do dataset limpo usadas pelas células
+HOURLY_COLUMNS = ['Order_Date', 'Road_traffic_density', 'City', 'Type_of_vehicle', 'multiple_deliveries',
+                  'order_seconds', 'picked_seconds', 'Time_taken(min)']
+
+# Dimensões das células (Order_Date em dias desde 1970-01-01, como no cubo)
+HOURLY_DIMENSIONS = ['Order_Date', 'Road_traffic_density', 'City', 'Type_of_vehicle', 'multiple_deliveries',
+                     'order_hour']
+
+# Medidas com contagem, soma e soma dos desvios quadráticos (média e desvio por `mean_std`)
+HOURLY_MEASURES = ('prep', 'time')
+
+WEEKDAYS = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+
+DAY_SECONDS = 24 * 60 * 60
+
+# ====================================================
+# Construção
+# ====================================================
+
+def _floats(col):
+    return pd.to_numeric(col).to_numpy('float64', na_value=np.nan)
+
+def prep_minutes(order_seconds, picked_seconds):
+    """
+    Minutos entre o pedido e a coleta. A coleta depois da meia-noite de um
+    pedido da noite anterior (23:55 -> 00:05) dá a volta no dia: 10 minutos.
+    """
+    return np.mod(_floats(picked_seconds) - _floats(order_seconds), DAY_SECONDS) / 60
+
+@profiled
+def build_hourly(df):
+    """ Células de horários do dataset limpo `df` (uma única vez por versão do dataset) """
+    work = df.loc[:, HOURLY_DIMENSIONS[1:-1]]
+    work.insert(0, 'Order_Date', to_epoch_days(df['Order_Date']))
+    work['order_hour'] = pd.array(np.floor(_floats(df['order_seconds']) / 3600), dtype='Int8')
+    work['prep'] = prep_minutes(df['order_seconds'], df['picked_seconds'])
+    work['time'] = df['Time_taken(min)'].astype('float64')
+
+    aggs = {'orders': ('time', 'size')}
+    for name in HOURLY_MEASURES:
+        aggs[f'{name}_n'] = (name, 'count')
+        aggs[f'{name}_sum'] = (name, 'sum')
+    grouped = work.groupby(HOURLY_DIMENSIONS, observed=True, dropna=False)
+    cells = grouped.agg(**aggs)
+    for name in HOURLY_MEASURES:
+        cells[f'{name}_m2'] = (grouped[name].var(ddof=0) * cells[f'{name}_n']).fillna(0.0)
+    return partition(cells.reset_index())
+
+# ====================================================
+# Consultas (sobre as células já filtradas)
+# ====================================================
+
+def orders_heatmap(cells):
+    """ Pedidos por dia da semana (linhas, WEEKDAYS) e hora do pedido (colunas 0-23) """
+    hours = cells['order_hour'].to_numpy('float64', na_value=np.nan)
+    known = ~np.isnan(hours)
+    weekdays = (cells['Order_Date'].to_numpy('int64')[known] + 3) % 7  # 1970-01-01 foi uma quinta
+    slots = weekdays * 24 + hours[known].astype('int64')
+    counts = np.bincount(slots, weights=cells['orders'].to_numpy('float64')[known], minlength=7 * 24)
+    return pd.DataFrame(counts.reshape(7, 24).astype('int64'), index=pd.Index(WEEKDAYS, name='weekday'),
+                        columns=pd.RangeIndex(24, name='order_hour'))
+
+def _mean_std_orders(cells, keys, measure):
+    """ Pedidos, média e desvio de `measure` por `keys` (como 'avg_<measure>' e 'std_<measure>') """
+    # Os dois agrupamentos têm os mesmos grupos, na mesma ordem
+    result = count_by(cells, keys)
+    stats = mean_std(cells, keys, measure)
+    result[f'avg_{measure}'], result[f'std_{measure}'] = stats['mean'].to_numpy(), stats['std'].to_numpy()
+    return result
+
+def prep_by(cells, keys):
+    """ Tempo de preparo (min) médio e desvio por `keys` (ex.: 'order_hour' ou ['City', 'Road_traffic_density']) """
+    return _mean_std_orders(cells, [keys] if isinstance(keys, str) else list(keys), 'prep')
+
+def batching_impact(cells, keys=('City', 'Road_traffic_density')):
+    """ Tempo de entrega médio e desvio por `keys` e quantidade de entregas múltiplas do entregador """
+    return _mean_std_orders(cells, [*keys, 'multiple_deliveries'], 'time')
+
+def hourly_summary(cells):
+    """ Pedidos, preparo médio (min), hora de pico e fração de pedidos com entregas múltiplas """
+    orders = cells['orders'].to_numpy('float64')
+    prep = mean_std(cells, [], 'prep')
+    by_hour = count_by(cells, 'order_hour')
+    deliveries = pd.to_numeric(cells['multiple_deliveries'].astype(object), errors='coerce').to_numpy('float64')
+    known = ~np.isnan(deliveries)
+    with np.errstate(invalid='ignore'):
+        batched = orders[known & (deliveries > 0)].sum() / orders[known].sum()
+    return {'orders': int(orders.sum()), 'prep_mean': float(prep['mean']),
+            'peak_hour': int(by_hour.loc[by_hour['orders'].idxmax(), 'order_hour']) if len(by_hour) else None,
+            'batched_share': float(batched)}
@@ -0,0 +1,57 @@
+"""
+Ingestão incremental de lotes de pedidos (arquivos no formato do test.csv).
+
+Cada lote vira uma parte em dataset/train.parts. O dashboard em execução
+percebe as partes novas na próxima consulta e mescla só elas nos cubos e
+sketches em cache (`core.loader`), sem reagregar o histórico. As partes
+só são apagadas com --reset (ex.: train.csv novo que já inclui os lotes).
+
+Uso (na raiz do repositório):
+    python -m core.ingest dataset/lotes/2022-04-14.csv [...]
+    python -m core.ingest --reset
+"""
+import argparse
+
+import pandas as pd
+
+from core.cleaning import clean_orders
+from core.loader import TRAIN_PATH, apply_batch
+from core.storage import append_part, reset_parts
+
+# ====================================================
+# Funções de Ingestão
+# ====================================================
+
+def clean_batch(df):
+    """
+    Limpa um lote bruto com as mesmas regras do train.csv. Lotes sem o
+    'Time_taken(min)' (como o test.csv) entram com o tempo ausente, que
+    fica de fora das médias de tempo mas conta nos pedidos.
+    """
+    df = clean_orders(df)
+    if 'Time_taken(min)' not in df.columns:
+        df['Time_taken(min)'] = pd.array([pd.NA] * len(df), dtype='Int16')
+    return df
+
+def ingest_batch(batch_path, path=TRAIN_PATH):
+    """
+    Limpa só o lote, grava ele como mais uma parte do dataset e atualiza
+    os agregados em memória deste processo (outros processos mesclam a
+    parte quando a encontram). O custo é proporcional ao lote, não ao
+    histórico. Retorna a quantidade de pedidos ingeridos.
+    """
+    batch = clean_batch(pd.read_csv(batch_path, low_memory=False))
+    append_part(path, batch)
+    apply_batch(batch, path)
+    return len(batch)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('batches', nargs='*', help='lotes no formato do test.csv')
+    parser.add_argument('--reset', action='store_true', help='apaga os lotes já ingeridos antes de ingerir')
+    args = parser.parse_args()
+
+    if args.reset:
+        print(f'{reset_parts(TRAIN_PATH)} lotes apagados')
+    for batch_path in args.batches:
+        print(f'{batch_path}: {ingest_batch(batch_path)} pedidos')
@@ -0,0 +1,313 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.cleaning import concat_orders, drop_missing
+from core.cube import build_cube, filter_cube, merge_cubes
+from core.hourly import HOURLY_COLUMNS, build_hourly
+from core.parallel import build_cube_parallel
+from core.profiles import PROFILE_COLUMNS, build_index
+from core.profiling import count_cache, row_count, stage
+from core.ranking import merge_traffic_totals, traffic_totals
+from core.sketch import build_sketches, merge_sketches
+from core.storage import data_version, list_parts, load_clean, read_part
+from core.streaming import build_cube_streaming
+
+# ====================================================
+# Configuração do Cache
+# ====================================================
+
+TRAIN_PATH = 'dataset/train.csv'
+
+# Limites do cache em memória (política LRU)
+MAX_ENTRIES = 256
+MAX_BYTES = 1024 * 1024 * 1024  # 1 GiB
+
+# CSVs maiores que isto montam o cubo em blocos (`core.streaming`)
+STREAM_ABOVE_BYTES = 512 * 1024 * 1024
+
+# Processos usados para limpar e agregar o CSV (`core.parallel`); 1 = serial
+PARALLEL_WORKERS = 1
+
+_cache = OrderedDict()  # chave -> (dataframe, tamanho em bytes)
+_lock = threading.RLock()
+_building = {}  # chave -> trava da montagem em andamento (uma por chave)
+_MISSING = object()
+# Tipos de entrada que recebem os lotes novos por mescla (`_merge_batch`)
+_MERGEABLE = ('cube', 'sketch', 'totals')
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+# ====================================================
+# Funções de Carregamento
+# ====================================================
+
+def file_fingerprint(path):
+    """ Identifica a versão do dataset (mtime/tamanho do CSV e lotes incrementais) """
+    return data_version(path)
+
+def load_data(required=(), columns=None, path=TRAIN_PATH):
+    """
+    Carrega o dataset limpo (cache colunar ou CSV + `clean_orders`) e
+    memoriza o resultado, inclusive a coluna de distância, calculada uma
+    única vez por versão do dataset. Só as colunas em `columns` (mais as
+    de `required`) são lidas; as linhas com 'NaN' em `required` saem.
+
+    O cache é do processo, então é compartilhado entre reruns, sessões
+    e páginas. A chave inclui a versão do arquivo (mtime/tamanho), logo
+    um novo train.csv é relido automaticamente. O dataframe devolvido é
+    compartilhado: não altere ele in-place.
+    """
+    path = os.path.abspath(path)
+    key = (path, file_fingerprint(path), 'data', tuple(required),
+           None if columns is None else tuple(columns))
+
+    def build():
+        read_columns = None if columns is None else list(dict.fromkeys([*columns, *required]))
+        df = drop_missing(load_clean(path, read_columns), required)
+        return df if columns is None else df.loc[:, list(columns)]
+
+    return _memoize(key, build)
+
+def load_cube(required=(), path=TRAIN_PATH):
+    """
+    Cubo de agregados (`core.cube.build_cube`) das linhas válidas em
+    `required`, memorizado como o dataset. Filtrar e agregar o cubo não
+    depende da quantidade de pedidos. CSVs grandes são agregados em
+    blocos, sem carregar o dataset inteiro; com `PARALLEL_WORKERS` > 1 a
+    limpeza e a agregação são divididas entre processos.
+    """
+    path = os.path.abspath(path)
+    key = (path, file_fingerprint(path), 'cube', tuple(required))
+
+    def build():
+        if os.path.exists(path) and os.path.getsize(path) > STREAM_ABOVE_BYTES:
+            return build_cube_streaming(path, required)
+        if os.path.exists(path) and PARALLEL_WORKERS > 1:
+            return build_cube_parallel(path, required, workers=PARALLEL_WORKERS)
+        return build_cube(load_data(required, path=path))
+
+    return _memoize(key, build)
+
+def load_sketches(required=(), path=TRAIN_PATH):
+    """
+    Sketches HyperLogLog de entregadores distintos por dia x trânsito
+    (`core.sketch`), montados a partir do cubo e memorizados como ele.
+    """
+    path = os.path.abspath(path)
+    key = (path, file_fingerprint(path), 'sketch', tuple(required))
+    return _memoize(key, lambda: build_sketches(load_cube(required, path=path).drivers))
+
+def load_totals(required=(), path=TRAIN_PATH):
+    """
+    Somas por cidade x entregador de cada trânsito, com todas as datas
+    (`core.ranking.traffic_totals`), memorizadas como o cubo. Os lotes
+    novos são somados a elas sem refazer as somas do histórico.
+    """
+    path = os.path.abspath(path)
+    key = (path, file_fingerprint(path), 'totals', tuple(required))
+    return _memoize(key, lambda: traffic_totals(load_cube(required, path=path).drivers))
+
+def load_profiles(kind='driver', path=TRAIN_PATH):
+    """
+    Índice de perfis por entregador ou restaurante (`core.profiles`) de todos
+    os pedidos, memorizado como o cubo. As posições dos pedidos no índice
+    se referem a `load_data(columns=PROFILE_COLUMNS, path=path)`.
+    """
+    path = os.path.abspath(path)
+    key = (path, file_fingerprint(path), 'profile', kind)
+    return _memoize(key, lambda: build_index(load_data(columns=PROFILE_COLUMNS, path=path), kind))
+
+def load_hourly(required=(), path=TRAIN_PATH):
+    """
+    Células de horários (`core.hourly`) das linhas válidas em `required`,
+    memorizadas como o cubo. Só as colunas usadas pelas células são lidas.
+    """
+    path = os.path.abspath(path)
+    key = (path, file_fingerprint(path), 'hourly', tuple(required))
+    return _memoize(key, lambda: build_hourly(load_data(required, columns=HOURLY_COLUMNS, path=path)))
+
+def cached_view(name, build, state=(), required=(), path=TRAIN_PATH):
+    """
+    Memoriza um artefato derivado (gráfico, mapa, tabela) por versão do
+    dataset e estado dos filtros. `build` só roda quando a combinação
+    ainda não está no cache, então abas e gráficos não exibidos não
+    custam nada e reruns com os mesmos filtros reaproveitam o resultado.
+    """
+    path = os.path.abspath(path)
+    key = (path, file_fingerprint(path), 'view', name, tuple(required), state)
+    return _memoize(key, build)
+
+def filtered_view(name, build, date_max, traffic_options, required=(), state=(), path=TRAIN_PATH):
+    """
+    `cached_view` com o filtro da sidebar (data e trânsito) mais `state`
+    (outros controles dos quais `build` depende) na chave.
+    """
+    return cached_view(name, build, (date_max, tuple(sorted(traffic_options)), *state), required=required, path=path)
+
+def load_filtered_cube(date_max, traffic_options, required=(), path=TRAIN_PATH):
+    """ Cubo de `load_cube` com o filtro da sidebar, memorizado por versão do dataset e filtros """
+    return filtered_view('cube', lambda: filter_cube(load_cube(required, path=path), date_max, traffic_options),
+                         date_max, traffic_options, required=required, path=path)
+
+def apply_batch(batch, path=TRAIN_PATH):
+    """
+    Atualiza os cubos, sketches e somas por entregador em memória com um
+    lote recém-gravado (ver `core.ingest`), mesclando só o lote em vez de
+    reagregar o histórico.
+    Dataframes e gráficos da versão anterior saem do cache e são
+    recalculados sob demanda.
+    """
+    path = os.path.abspath(path)
+    _catch_up(path, file_fingerprint(path), batch)
+
+def _catch_up(path, version, batch=None):
+    """
+    Lotes gravados por outro processo (`python -m core.ingest`) só mudam a
+    quantidade de partes na versão do dataset. Quando o cache tem cubos de
+    uma versão com o mesmo train.csv e menos partes, lê só as partes novas
+    e mescla elas, em vez de reagregar o histórico inteiro. `batch` é a
+    última parte, já em memória (`apply_batch`). Cubos de qualquer outra
+    versão (outro train.csv, lotes removidos) saem do cache.
+    """
+    with _lock:
+        previous = {key[1] for key in _cache if key[0] == path and key[2] in _MERGEABLE}
+        if previous == {version} or not previous:
+            return
+        old = next(iter(previous)) if len(previous) == 1 else None
+        behind = old is not None and old[:2] == version[:2] and old[2] < version[2]
+        parts = list_parts(path)[old[2]:version[2]] if behind else []
+        if not behind or len(parts) != version[2] - old[2]:
+            _drop_stale(path, version)  # sem como mesclar: reconstrução normal
+            return
+        with stage('catch_up') as record:
+            if batch is None or len(parts) > 1:
+                batch = concat_orders([read_part(part) for part in parts], ignore_index=True)
+            record['rows_out'] = len(batch)
+            _merge_batch(path, version, batch)
+
+def _merge_batch(path, version, batch):
+    """ Mescla `batch` nos cubos, sketches e somas de `path` em cache, que passam para `version` """
+    batch_cubes = {}
+    with _lock:
+        for key, (value, _) in list(_cache.items()):
+            if key[0] == path and key[1] != version and key[2] in _MERGEABLE:
+                kind, required = key[2], key[3]
+                if required not in batch_cubes:
+                    batch_cubes[required] = build_cube(drop_missing(batch, required))
+                if kind == 'cube':
+                    value = merge_cubes(value, batch_cubes[required])
+                elif kind == 'sketch':
+                    value = merge_sketches(value, build_sketches(batch_cubes[required].drivers))
+                else:
+                    value = merge_traffic_totals(value, traffic_totals(batch_cubes[required].drivers))
+                _cache[(path, version, kind, required)] = (value, _size(value))
+        _drop_stale(path, version)
+
+def _drop_stale(path, version):
+    """ Tira do cache as entradas de `path` de versões diferentes de `version` """
+    with _lock:
+        for key in [k for k in _cache if k[0] == path and k[1] != version]:
+            del _cache[key]
+        _evict()
+
+def _memoize(key, build):
+    """
+    Busca `key` no cache LRU ou chama `build` e guarda o resultado. A trava
+    global só protege o dicionário, nunca o `build`: cada chave é montada
+    uma única vez, pela primeira sessão que a pede, enquanto as outras
+    sessões que pedem a mesma chave esperam por esse resultado e as que
+    pedem chaves diferentes (ou já prontas) seguem sem esperar.
+    """
+    value = _lookup(key)
+    if value is not _MISSING:
+        return value
+
+    _catch_up(key[0], key[1])
+    with _lock:
+        building = _building.setdefault(key, threading.Lock())
+    with building:
+        # Outra sessão pode ter montado a chave enquanto esta esperava
+        value = _lookup(key)
+        if value is not _MISSING:
+            return value
+
+        with _lock:
+            _stats['misses'] += 1
+        count_cache(hit=False)
+        try:
+            with stage(f'{key[2]}:{key[3]}' if key[2] == 'view' else key[2]) as record:
+                value = build()
+                record['rows_out'] = row_count(value)
+
+            with _lock:
+                # Versões antigas do mesmo arquivo não serão mais usadas
+                for old_key in [k for k in _cache if k[0] == key[0] and k[1] != key[1]]:
+                    del _cache[old_key]
+
+                _cache[key] = (value, _size(value))
+                _evict()
+        finally:
+            with _lock:
+                _building.pop(key, None)
+        return value
+
+def _lookup(key):
+    """ Valor de `key` no cache (marcado como usado) ou `_MISSING` """
+    with _lock:
+        if key not in _cache:
+            return _MISSING
+        _cache.move_to_end(key)
+        _stats['hits'] += 1
+        value = _cache[key][0]
+    count_cache(hit=True)
+    return value
+
+def _size(value):
+    """
+    Memória aproximada de um valor do cache: dataframes e arrays pelos
+    dados, figuras do plotly pelos arrays dos traces (sem serializar a
+    figura), HTML pelo tamanho do texto, e tuplas/listas/dicts somando os
+    itens. Só o que não se encaixa em nenhum desses cai no tamanho raso
+    do objeto.
+    """
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size(key) + _size(item) for key, item in value.items())
+    if hasattr(value, 'memory_usage'):  # DataFrame, Series e Index
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if hasattr(value, 'to_plotly_json'):
+        return sys.getsizeof(value) + sum(_size(trace.to_plotly_json()) for trace in value.data)
+    return sys.getsizeof(value)
+
+def _evict():
+    """ Remove as entradas menos usadas até respeitar os limites """
+    total = sum(size for _, size in _cache.values())
+    while len(_cache) > 1 and (len(_cache) > MAX_ENTRIES or total > MAX_BYTES):
+        _, (_, size) = _cache.popitem(last=False)
+        total -= size
+        _stats['evictions'] += 1
+
+def invalidate(path=None):
+    """ Descarta o cache de um arquivo (ou todo o cache) quando chegam dados novos """
+    with _lock:
+        if path is None:
+            _cache.clear()
+            return
+        path = os.path.abspath(path)
+        for key in [k for k in _cache if k[0] == path]:
+            del _cache[key]
+
+def cache_info():
+    """ Estatísticas do cache para diagnóstico """
+    with _lock:
+        return dict(_stats,
+                    entries=len(_cache),
+                    bytes=sum(size for _, size in _cache.values()))
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from core.columnar import to_epoch_days
+from core.profiling import profiled
+from core.store import partition, select
+
+# ====================================================
+# Camadas do Mapa
+# ====================================================
+
+LOCATION_COLUMNS = ['Order_Date', 'Road_traffic_density', 'City',
+                    'Delivery_location_latitude', 'Delivery_location_longitude']
+
+# Casas decimais da grade de entregas (2 casas ~ 1,1 km)
+BIN_PRECISION = 2
+
+MAP_MODES = ['Medianas', 'Agrupado', 'Calor']
+
+# Cada marcador do modo 'Agrupado' é uma célula da grade com o total de entregas dela
+_CLUSTER_MARKER = ("function (row) {"
+                   " var marker = L.marker(new L.LatLng(row[0], row[1]), {deliveries: row[2]});"
+                   " marker.bindPopup(row[2] + ' entregas');"
+                   " return marker; }")
+
+# O número de cada cluster soma as entregas das células, não a quantidade de células
+_CLUSTER_ICON = ("function (cluster) {"
+                 " var total = 0;"
+                 " cluster.getAllChildMarkers().forEach(function (marker) { total += marker.options.deliveries; });"
+                 " var size = total < 100 ? 'small' : (total < 1000 ? 'medium' : 'large');"
+                 " return L.divIcon({html: '<div><span>' + total + '</span></div>',"
+                 " className: 'marker-cluster marker-cluster-' + size, iconSize: new L.Point(40, 40)}); }")
+
+@profiled
+def median_locations(df):
+    """ Localização mediana das entregas por cidade e tráfego """
+    return (df.loc[:, ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']]
+              .groupby(['City', 'Road_traffic_density'], observed=True)
+              .median()
+              .reset_index())
+
+@profiled
+def location_bins(df, precision=BIN_PRECISION):
+    """
+    Entregas agregadas numa grade de lat/long por dia e tráfego.
+    Calculado uma vez por versão do dataset; cada filtro da sidebar só
+    soma as células da grade em vez de enviar todas as entregas. A grade
+    fica ordenada por trânsito e data (`core.store`).
+    """
+    bins = (pd.DataFrame({'Order_Date': to_epoch_days(df['Order_Date']),
+                          'Road_traffic_density': df['Road_traffic_density'],
+                          'lat': df['Delivery_location_latitude'].round(precision),
+                          'lon': df['Delivery_location_longitude'].round(precision)})
+              .groupby(['Order_Date', 'Road_traffic_density', 'lat', 'lon'], observed=True)
+              .size()
+              .rename('deliveries')
+              .reset_index())
+    return partition(bins)
+
+@profiled
+def filter_bins(bins, date_max, traffic_options):
+    """ Soma as células da grade que passam no filtro da sidebar """
+    return select(bins, date_max, traffic_options).groupby(['lat', 'lon'])['deliveries'].sum().reset_index()
+
+# ====================================================
+# Renderização (HTML pronto para o iframe)
+# ====================================================
+
+def _points_geojson(df_aux):
+    """ Todos os marcadores numa única FeatureCollection (um só layer) """
+    return {'type': 'FeatureCollection',
+            'features': [{'type': 'Feature',
+                          'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                          'properties': {'City': city, 'Road_traffic_density': traffic}}
+                         for city, traffic, lat, lon in zip(
+                             df_aux['City'].astype(str), df_aux['Road_traffic_density'].astype(str),
+                             df_aux['Delivery_location_latitude'].tolist(),
+                             df_aux['Delivery_location_longitude'].tolist())]}
+
+@profiled
+def render_map(mode, medians=None, bins=None, height=600):
+    """
+    Monta o mapa e devolve o HTML já serializado, para ser guardado em
+    cache e reenviado sem reconstruir o folium a cada rerun.
+    mode: 'Medianas' (um marcador por cidade x tráfego), 'Agrupado'
+    (clusters no navegador, contando entregas) ou 'Calor' (heatmap), os
+    dois últimos sobre a grade de `location_bins`.
+    """
+    import folium
+    from folium import plugins
+
+    map = folium.Map()
+    if mode == 'Medianas':
+        # Seleção vazia (ex.: nenhum trânsito marcado): mapa sem camada, como no original
+        if len(medians):
+            folium.GeoJson(_points_geojson(medians),
+                           popup=folium.GeoJsonPopup(fields=['City'], labels=False)).add_to(map)
+    elif len(bins):
+        points = bins[['lat', 'lon']].to_numpy()
+        weights = bins['deliveries'].to_numpy()
+        if mode == 'Agrupado':
+            plugins.FastMarkerCluster(np.column_stack([points, weights]).tolist(), callback=_CLUSTER_MARKER,
+                                      icon_create_function=_CLUSTER_ICON).add_to(map)
+        else:
+            plugins.HeatMap(np.column_stack([points, weights / weights.max()]).tolist(),
+                            radius=12).add_to(map)
+        map.fit_bounds([points.min(axis=0).tolist(), points.max(axis=0).tolist()])
+
+    figure = folium.Figure(height=height).add_child(map)
+    return figure.render()
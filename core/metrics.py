@@ -0,0 +1,133 @@
+"""
+Métricas das páginas do dashboard, sem Streamlit nem bibliotecas de
+gráfico: cada função recebe o cubo (já filtrado pela sidebar) e devolve
+um DataFrame ou escalar pronto para exibir.
+"""
+import pandas as pd
+
+from core.columnar import from_epoch_days
+from core.cube import Cube, count_by, distinct_drivers, mean_std
+from core.profiling import profiled
+from core.ranking import driver_totals, top_k_per_city
+from core.sketch import Sketches, approx_distinct_drivers
+
+# ====================================================
+# Visão Empresa
+# ====================================================
+
+@profiled
+def orders_by_day(cube: Cube) -> pd.DataFrame:
+    """ Pedidos por dia (Order_Date volta a ser data para o eixo do gráfico) """
+    df_aux = count_by(cube.cells, 'Order_Date')
+    df_aux['Order_Date'] = from_epoch_days(df_aux['Order_Date'])
+    return df_aux
+
+@profiled
+def orders_by_traffic(cube: Cube) -> pd.DataFrame:
+    """ Pedidos por condição de trânsito """
+    return count_by(cube.cells, 'Road_traffic_density')
+
+@profiled
+def orders_by_city_traffic(cube: Cube) -> pd.DataFrame:
+    """ Pedidos por cidade e trânsito """
+    return count_by(cube.cells, ['City', 'Road_traffic_density'])
+
+@profiled
+def orders_by_week(cube: Cube) -> pd.DataFrame:
+    """ Pedidos por semana do ano """
+    return count_by(cube.cells, 'week_of_year')
+
+@profiled
+def orders_share_by_week(cube: Cube, sketches: Sketches | None = None) -> pd.DataFrame:
+    """ Pedidos por entregador em cada semana (entregadores estimados pelos `sketches`, se dados) """
+    df_aux01 = count_by(cube.cells, 'week_of_year')
+    if sketches is None:
+        df_aux02 = distinct_drivers(cube.drivers, 'week_of_year')
+    else:
+        df_aux02 = approx_distinct_drivers(sketches, 'week_of_year')
+
+    df_aux = pd.merge(df_aux01, df_aux02, how='inner', on='week_of_year')
+    df_aux['order_by_deliverer'] = df_aux['orders'] / df_aux['Delivery_person_ID']
+    return df_aux
+
+# ====================================================
+# Visão Entregadores
+# ====================================================
+
+@profiled
+def age_min_max(cube: Cube) -> tuple[int, int]:
+    """ Menor e maior idade dos entregadores """
+    return cube.cells['age_min'].min(), cube.cells['age_max'].max()
+
+@profiled
+def vehicle_condition_min_max(cube: Cube) -> tuple[int, int]:
+    """ Pior e melhor condição de veículo """
+    return cube.cells['vehicle_min'].min(), cube.cells['vehicle_max'].max()
+
+@profiled
+def ratings_by_driver(cube: Cube) -> pd.DataFrame:
+    """ Avaliação média de cada entregador """
+    df_aux = cube.drivers.groupby('Delivery_person_ID', observed=True)[['rating_sum', 'rating_n']].sum()
+    return (df_aux['rating_sum'] / df_aux['rating_n']).rename('Delivery_person_Ratings').reset_index()
+
+@profiled
+def rating_mean_std(cube: Cube, key: str) -> pd.DataFrame:
+    """ Média e desvio padrão das avaliações por `key` """
+    df_aux = mean_std(cube.cells, key, 'rating')
+    df_aux.columns = [key, 'delivery_mean', 'delivery_std']
+    return df_aux
+
+@profiled
+def top_delivers(cube: Cube, top_asc: bool, k: int = 10, min_orders: int = 1,
+                 totals: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Os k entregadores mais rápidos (`top_asc=True`) ou mais lentos de cada
+    cidade. `totals` são as somas já calculadas para este cubo (ex.:
+    `core.loader.load_totals` quando o filtro mantém o cubo inteiro).
+    """
+    if totals is None:
+        totals = driver_totals(cube.drivers)
+    return top_k_per_city(totals, k=k, ascending=top_asc, min_orders=min_orders)
+
+# ====================================================
+# Visão Restaurantes
+# ====================================================
+
+@profiled
+def drivers_count(cube: Cube, sketches: Sketches | None = None) -> int:
+    """ Quantidade de entregadores distintos (estimada pelos `sketches`, se dados) """
+    if sketches is None:
+        return distinct_drivers(cube.drivers)
+    return approx_distinct_drivers(sketches)
+
+@profiled
+def mean_distance(cube: Cube) -> float:
+    """ Distância média restaurante-entrega (km) """
+    return mean_std(cube.cells, [], 'distance')['mean']
+
+@profiled
+def distance_by_city(cube: Cube) -> pd.DataFrame:
+    """ Distância média por cidade """
+    return mean_std(cube.cells, ['City'], 'distance').rename(columns={'mean': 'distance'})
+
+@profiled
+def time_mean_std(cube: Cube, keys: list[str]) -> pd.DataFrame:
+    """ Tempo médio e desvio padrão de entrega por `keys` """
+    df_aux = mean_std(cube.cells, keys, 'time')
+    df_aux.columns = [*keys, 'avg_time', 'std_time']
+    return df_aux
+
+@profiled
+def avg_std_time_delivery(cube: Cube, festival: str, op: str) -> float:
+    """
+    Calcula o tempo médio ou desvio padrão durante ou fora de festivais
+    festival: 'Yes' ou 'No'
+    op: 'avg_time' ou 'std_time'
+    """
+    cells = cube.cells
+    df_aux = mean_std(cells.loc[cells['Festival'] == festival, :], [], 'time')
+
+    if op == 'avg_time':
+        return df_aux['mean']
+    elif op == 'std_time':
+        return df_aux['std']
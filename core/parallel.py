@@ -0,0 +1,122 @@
+"""
+Limpeza e agregação em paralelo, em vários processos.
+
+O CSV bruto é dividido em shards por data (ou cidade). Cada processo limpa
+o seu shard (strip, datas, distância) e monta o cubo parcial. Como os
+shards não compartilham dias (ou cidades), as células do cubo também são
+disjuntas. Assim os cubos parciais são só concatenados e ordenados, e o
+resultado é idêntico ao do caminho serial (`build_cube(load_data(...))`).
+
+Uso (na raiz do repositório):
+    python -m core.parallel [dataset/train.csv] --workers 8 --by Order_Date
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.cleaning import clean_orders, concat_orders, drop_missing
+from core.cube import DIMENSIONS, DRIVER_DIMENSIONS, Cube, build_cube, merge_cubes
+from core.storage import list_parts, read_part
+from core.store import partition
+
+# Colunas pelas quais o dataset pode ser dividido (são dimensões do cubo)
+SHARD_COLUMNS = ('Order_Date', 'City')
+
+# Shards por processo, para equilibrar a carga entre eles
+SHARDS_PER_WORKER = 4
+
+# CSV bruto herdado pelos processos (fork): cada um recebe só os índices do seu shard
+_raw = None
+
+# ====================================================
+# Divisão em Shards
+# ====================================================
+
+def shard_rows(raw, n_shards, by='Order_Date'):
+    """
+    Índices das linhas de cada shard. Cada valor de `by` vai inteiro para
+    um único shard; os valores são distribuídos do maior para o menor,
+    sempre para o shard com menos linhas até o momento.
+    """
+    keys = raw[by].astype(str).str.strip()
+    codes, _ = pd.factorize(keys)
+    counts = np.bincount(codes, minlength=codes.max() + 1)
+
+    shard_of = np.empty(len(counts), dtype='int64')
+    loads = np.zeros(n_shards, dtype='int64')
+    for code in np.argsort(-counts, kind='stable'):
+        shard_of[code] = loads.argmin()
+        loads[shard_of[code]] += counts[code]
+
+    order = np.argsort(shard_of[codes], kind='stable')
+    bounds = np.searchsorted(shard_of[codes][order], np.arange(n_shards + 1))
+    return [order[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def _build_shard(shard, required):
+    """ Limpa um shard e monta o seu cubo parcial (roda dentro do processo) """
+    if isinstance(shard, np.ndarray):
+        shard = _raw.take(shard)
+    return build_cube(drop_missing(clean_orders(shard), required))
+
+def _concat(parts, keys):
+    """ Junta partes com chaves disjuntas na ordem do caminho serial (groupby e depois partições) """
+    return partition(concat_orders(parts, ignore_index=True).sort_values(keys, kind='stable'))
+
+# ====================================================
+# Cubo em Paralelo
+# ====================================================
+
+def build_cube_parallel(path, required=(), workers=None, by='Order_Date'):
+    """
+    Mesmo cubo de `build_cube(load_data(required))`, com a limpeza e a
+    agregação divididas entre `workers` processos (padrão: um por CPU).
+    Os lotes incrementais de `core.ingest` são mesclados no fim.
+    """
+    global _raw
+    if by not in SHARD_COLUMNS:
+        raise ValueError(f'by deve ser um de {SHARD_COLUMNS}')
+    workers = workers or os.cpu_count() or 1
+    raw = pd.read_csv(path, low_memory=False)
+
+    if workers == 1:
+        cube = _build_shard(raw, required)
+    else:
+        shards = shard_rows(raw, workers * SHARDS_PER_WORKER, by)
+        fork = 'fork' in multiprocessing.get_all_start_methods()
+        if fork:
+            _raw = raw
+            context = multiprocessing.get_context('fork')
+        else:  # sem fork (Windows/macOS) os shards vão serializados para os processos
+            shards = [raw.take(rows) for rows in shards]
+            context = None
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                cubes = list(pool.map(_build_shard, shards, [required] * len(shards)))
+        finally:
+            _raw = None
+        cube = Cube(_concat([part.cells for part in cubes], DIMENSIONS),
+                    _concat([part.drivers for part in cubes], DRIVER_DIMENSIONS))
+
+    for part in list_parts(path):
+        cube = merge_cubes(cube, build_cube(drop_missing(read_part(part), required)))
+    return cube
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', default='dataset/train.csv')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--by', choices=SHARD_COLUMNS, default='Order_Date')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cube = build_cube_parallel(args.path, workers=args.workers, by=args.by)
+    print(f'{len(cube.cells)} células, {len(cube.drivers)} linhas por entregador '
+          f'em {time.perf_counter() - start:.2f}s')
+
+if __name__ == '__main__':
+    main()
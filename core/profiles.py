@@ -0,0 +1,132 @@
+"""
+Índice de perfis por entregador e por restaurante.
+
+Cada entidade (entregador, ou restaurante extraído do ID do entregador:
+'BANGRES15DEL01' -> 'BANGRES15') recebe uma linha de estatísticas
+(pedidos, avaliação e tempo com média/desvio, distância média, veículo
+mais usado) e o trecho dos seus pedidos numa lista de posições ordenada
+por entidade, no formato CSR: os pedidos da entidade i são as linhas
+`rows[offsets[i]:offsets[i + 1]]` do dataset limpo.
+
+O índice é montado uma vez por versão do dataset (`core.loader.load_profiles`),
+com np.bincount em vez de groupby. Depois disso, o perfil de uma entidade é
+uma busca num dict, e os seus pedidos são uma fatia, sem percorrer a tabela.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.profiling import profiled
+
+# Colunas do dataset limpo usadas pelo índice e pelo detalhamento dos pedidos
+PROFILE_COLUMNS = ['Delivery_person_ID', 'Order_Date', 'City', 'Road_traffic_density', 'Type_of_order',
+                   'Type_of_vehicle', 'Vehicle_condition', 'Delivery_person_Ratings', 'Time_taken(min)',
+                   'distance']
+
+ENTITY_KINDS = ('driver', 'restaurant')
+
+class EntityIndex(NamedTuple):
+    """
+    labels: rótulo de cada entidade (ID do entregador ou código do restaurante).
+    positions: rótulo -> posição em `labels`/`stats` (busca O(1)).
+    stats: uma linha por entidade, na ordem de `labels`.
+    rows, offsets: posições dos pedidos no dataset limpo, agrupadas por entidade (CSR).
+    """
+    labels: pd.Index
+    positions: dict
+    stats: pd.DataFrame
+    rows: np.ndarray
+    offsets: np.ndarray
+
+# ====================================================
+# Construção
+# ====================================================
+
+def restaurant_codes(driver_ids):
+    """
+    Código do restaurante embutido no ID do entregador ('BANGRES15DEL01' ->
+    'BANGRES15'), como category. Só os rótulos distintos são processados.
+    """
+    labels = pd.Index(driver_ids.cat.categories, dtype=object).str.rsplit('DEL', n=1).str[0]
+    label_codes, restaurants = pd.factorize(labels, sort=True)
+    codes = np.append(label_codes, -1)[driver_ids.cat.codes.to_numpy('int64')]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=restaurants), index=driver_ids.index,
+                     name='restaurant')
+
+def _entity_codes(df, kind):
+    """ Código da entidade de cada pedido (-1 = sem entregador) e os rótulos """
+    if kind not in ENTITY_KINDS:
+        raise ValueError(f'kind deve ser um de {ENTITY_KINDS}')
+    values = df['Delivery_person_ID'] if kind == 'driver' else restaurant_codes(df['Delivery_person_ID'])
+    return values.cat.codes.to_numpy('int64'), pd.Index(values.cat.categories, dtype=object)
+
+def _mean_std(codes, values, n_entities):
+    """ Média e desvio padrão amostral (ddof=1, como o pandas) de `values` por código, ignorando NaN """
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    n = np.bincount(codes, minlength=n_entities)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.bincount(codes, weights=values, minlength=n_entities) / n
+        m2 = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n_entities)
+        std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+    return mean, std
+
+def _most_common(codes, values, n_entities):
+    """ Valor mais frequente de uma coluna category por código (NaN se não houver) """
+    labels, value_codes = values.cat.categories, values.cat.codes.to_numpy('int64')
+    valid = value_codes >= 0
+    if not len(labels):
+        return np.full(n_entities, np.nan, dtype=object)
+    counts = np.bincount(codes[valid] * len(labels) + value_codes[valid],
+                         minlength=n_entities * len(labels)).reshape(n_entities, len(labels))
+    result = np.asarray(labels, dtype=object)[counts.argmax(axis=1)]
+    result[counts.max(axis=1) == 0] = np.nan
+    return result
+
+def _floats(col):
+    return pd.to_numeric(col).to_numpy('float64', na_value=np.nan)
+
+@profiled
+def build_index(df, kind='driver'):
+    """ Índice de perfis (`kind`: 'driver' ou 'restaurant') do dataset limpo `df` """
+    codes, labels = _entity_codes(df, kind)
+    with_entity = np.flatnonzero(codes >= 0)
+    rows = with_entity[np.argsort(codes[with_entity], kind='stable')]
+    offsets = np.searchsorted(codes[rows], np.arange(len(labels) + 1))
+
+    valid = codes >= 0
+    codes_v, n = codes[valid], len(labels)
+    stats = pd.DataFrame({'orders': np.diff(offsets)}, index=pd.Index(labels, name=kind))
+    for name, col in (('rating', 'Delivery_person_Ratings'), ('time', 'Time_taken(min)')):
+        stats[f'{name}_mean'], stats[f'{name}_std'] = _mean_std(codes_v, _floats(df[col])[valid], n)
+    stats['distance_mean'] = _mean_std(codes_v, _floats(df['distance'])[valid], n)[0]
+    stats['vehicle_condition_mean'] = _mean_std(codes_v, _floats(df['Vehicle_condition'])[valid], n)[0]
+    stats['vehicle'] = _most_common(codes_v, df['Type_of_vehicle'][valid], n)
+    stats['city'] = _most_common(codes_v, df['City'][valid], n)
+    if kind == 'restaurant':
+        n_drivers = len(df['Delivery_person_ID'].cat.categories)
+        pairs = np.unique(codes_v * n_drivers + df['Delivery_person_ID'].cat.codes.to_numpy('int64')[valid])
+        stats.insert(1, 'drivers', np.bincount(pairs // n_drivers, minlength=n))
+
+    return EntityIndex(labels, {label: i for i, label in enumerate(labels)}, stats, rows, offsets)
+
+# ====================================================
+# Consultas
+# ====================================================
+
+def profile(index, label):
+    """ Estatísticas de uma entidade (None se o rótulo não existir), em tempo constante """
+    position = index.positions.get(label)
+    return None if position is None else index.stats.iloc[position]
+
+def entity_rows(index, label):
+    """ Posições (no dataset limpo) dos pedidos de uma entidade """
+    position = index.positions.get(label)
+    if position is None:
+        return index.rows[:0]
+    return index.rows[index.offsets[position]:index.offsets[position + 1]]
+
+def entity_orders(index, df, label):
+    """ Pedidos de uma entidade, a partir do mesmo dataset usado para montar o índice """
+    return df.iloc[entity_rows(index, label)]
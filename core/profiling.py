@@ -0,0 +1,163 @@
+"""
+Instrumentação leve dos reruns das páginas.
+
+Com CURRY_COMPANY_PROFILE=1 no ambiente, cada etapa instrumentada
+(`stage` ou funções com `@profiled`) registra tempo de parede, linhas de
+entrada/saída e variação de memória residente. O cache de `core.loader`
+soma acertos e faltas por rerun. `finish_render` devolve o registro do
+rerun e o escreve como uma linha JSON no logger 'curry_company.profiling'.
+Com CURRY_COMPANY_PROFILE_LOG=<arquivo>, a linha também vai para esse
+arquivo (JSONL).
+
+Desligada, a instrumentação custa uma checagem de flag por chamada.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+ENABLED = os.environ.get('CURRY_COMPANY_PROFILE') == '1'
+LOG_PATH = os.environ.get('CURRY_COMPANY_PROFILE_LOG')
+
+logger = logging.getLogger('curry_company.profiling')
+
+# Registro do rerun em andamento, um por thread (cada sessão do Streamlit roda na sua)
+_local = threading.local()
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+def enable(flag=True):
+    """ Liga ou desliga a instrumentação em tempo de execução """
+    global ENABLED
+    ENABLED = flag
+
+def _rss_mb():
+    """ Memória residente atual em MiB (None fora do Linux) """
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2**20
+    except OSError:
+        return None
+
+def row_count(value):
+    """ Linhas de um dataframe ou da tabela de células de um cubo """
+    if hasattr(value, 'cells'):
+        value = value.cells
+    if hasattr(value, 'shape') and len(getattr(value, 'shape', ())) > 0:
+        return int(value.shape[0])
+    return None
+
+# ====================================================
+# Registro do Rerun
+# ====================================================
+
+def start_render(page):
+    """ Começa o registro de um rerun da página `page` """
+    if not ENABLED:
+        return
+    _local.trace = {'page': page, 'started': time.time(), 'stages': [], 'cache': {'hits': 0, 'misses': 0},
+                    'depth': 0, 'clock': time.perf_counter()}
+
+def finish_render():
+    """ Fecha o registro do rerun, escreve o log JSON e devolve o registro (None se desligado) """
+    trace = getattr(_local, 'trace', None)
+    if not ENABLED or trace is None:
+        return None
+    _local.trace = None
+    trace.pop('depth')
+    trace['total_s'] = round(time.perf_counter() - trace.pop('clock'), 6)
+
+    line = json.dumps(trace, ensure_ascii=False, default=str)
+    logger.info(line)
+    if LOG_PATH:
+        with open(LOG_PATH, 'a') as f:
+            f.write(line + '\n')
+    return trace
+
+def count_cache(hit):
+    """ Acerto (`hit=True`) ou falta no cache durante o rerun atual """
+    trace = getattr(_local, 'trace', None) if ENABLED else None
+    if trace is not None:
+        trace['cache']['hits' if hit else 'misses'] += 1
+
+class stage:
+    """
+    Mede um trecho do rerun:
+        with stage('orders_by_day', rows_in=len(df)) as record:
+            ...
+            record['rows_out'] = len(result)
+    """
+    __slots__ = ('name', 'record', 'trace', 'start', 'rss')
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.record = {'name': name, 'rows_in': rows_in, 'rows_out': None}
+        self.trace = getattr(_local, 'trace', None) if ENABLED else None
+
+    def __enter__(self):
+        if self.trace is not None:
+            self.record['depth'] = self.trace['depth']
+            self.trace['depth'] += 1
+            self.trace['stages'].append(self.record)
+            self.rss = _rss_mb()
+            self.start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            self.record['seconds'] = round(time.perf_counter() - self.start, 6)
+            rss = _rss_mb()
+            self.record['memory_mb'] = None if rss is None else round(rss - self.rss, 3)
+            self.trace['depth'] -= 1
+        return False
+
+def profiled(fn=None, name=None):
+    """ Decorador: registra a função como etapa, com as linhas do 1º argumento e do resultado """
+    if fn is None:
+        return functools.partial(profiled, name=name)
+    label = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not ENABLED or getattr(_local, 'trace', None) is None:
+            return fn(*args, **kwargs)
+        with stage(label, rows_in=row_count(args[0]) if args else None) as record:
+            result = fn(*args, **kwargs)
+            record['rows_out'] = row_count(result)
+        return result
+    return wrapper
+
+# ====================================================
+# Exibição
+# ====================================================
+
+def trace_table(trace):
+    """ Etapas do rerun como dataframe (nome indentado pela profundidade), para o painel """
+    import pandas as pd
+
+    rows = [{'etapa': '· ' * record.get('depth', 0) + record['name'],
+             'segundos': record.get('seconds'),
+             'linhas (entrada)': record['rows_in'],
+             'linhas (saída)': record['rows_out'],
+             'memória (MiB)': record.get('memory_mb')} for record in trace['stages']]
+    return pd.DataFrame(rows, columns=['etapa', 'segundos', 'linhas (entrada)', 'linhas (saída)', 'memória (MiB)'])
+
+def render_panel(st, trace):
+    """
+    Painel 'Desempenho do rerun' na sidebar com o registro de
+    `finish_render` (nada se o registro estiver desligado). As páginas
+    passam o módulo `st`, que o core não importa.
+    """
+    if trace is None:
+        return
+    with st.sidebar.expander('Desempenho do rerun'):
+        st.caption(f"Total {trace['total_s']:.3f}s · cache: {trace['cache']['hits']} acertos, "
+                   f"{trace['cache']['misses']} faltas")
+        st.dataframe(trace_table(trace), hide_index=True)
@@ -0,0 +1,162 @@
+"""
+Ranking dos entregadores mais rápidos/lentos por cidade.
+
+As somas por cidade x entregador (`driver_totals`) saem da tabela de
+entregadores do cubo. As de cada trânsito, com todas as datas
+(`traffic_totals`), são calculadas uma vez por versão do dataset
+(`core.loader.load_totals`) e atualizadas com os lotes novos
+(`merge_totals`); com a data da sidebar no fim do histórico, o ranking só
+soma as dos trânsitos selecionados (`select_totals`). O top-k de cada cidade sai de uma seleção
+parcial (np.argpartition, O(n)) em vez de ordenar todos os entregadores.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+
+TOTAL_COLUMNS = ['orders', 'time_n', 'time_sum']
+
+# ====================================================
+# Somas por Entregador
+# ====================================================
+
+def driver_totals(drivers: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pedidos, tempos com valor e soma dos tempos por cidade x entregador, a
+    partir da tabela `drivers` do cubo (já filtrada ou não). As chaves são
+    os códigos das categorias, somados com np.bincount; o resultado sai
+    ordenado pelos códigos (cidade, entregador), como `merge_totals` espera.
+    """
+    city, driver = drivers['City'], drivers['Delivery_person_ID']
+    city_codes, driver_codes = city.cat.codes.to_numpy('int64'), driver.cat.codes.to_numpy('int64')
+    n_drivers = len(driver.cat.categories)
+    valid = (city_codes >= 0) & (driver_codes >= 0)
+    keys = city_codes[valid] * n_drivers + driver_codes[valid]
+
+    size = len(city.cat.categories) * n_drivers
+    sums = {name: np.bincount(keys, weights=drivers[name].to_numpy('float64')[valid], minlength=size)
+            for name in TOTAL_COLUMNS}
+    present = np.flatnonzero(sums['orders'])
+    return _totals_frame(present // n_drivers, present % n_drivers, city.dtype, driver.dtype,
+                         {name: values[present] for name, values in sums.items()})
+
+def _totals_frame(city_codes, driver_codes, city_dtype, driver_dtype, sums):
+    return pd.DataFrame({
+        'City': pd.Categorical.from_codes(city_codes, dtype=city_dtype),
+        'Delivery_person_ID': pd.Categorical.from_codes(driver_codes, dtype=driver_dtype),
+        'orders': sums['orders'].astype('int64'),
+        'time_n': sums['time_n'].astype('int64'),
+        'time_sum': sums['time_sum'].astype('float64'),
+    })
+
+def merge_totals(totals: pd.DataFrame, other: pd.DataFrame) -> pd.DataFrame:
+    """
+    Soma os totais de um lote novo (`driver_totals` do lote) aos existentes.
+    Entregadores já conhecidos são atualizados no lugar (busca binária nas
+    chaves ordenadas) e os novos são inseridos na posição certa, então o
+    custo depende do lote e de uma cópia linear, não de um novo groupby.
+    """
+    city_categories, batch_city = _recode(totals['City'], other['City'])
+    driver_categories, batch_driver = _recode(totals['Delivery_person_ID'], other['Delivery_person_ID'])
+    n_drivers = len(driver_categories)
+    # As categorias novas entram no fim, então a ordem das chaves antigas se mantém
+    old_keys = (totals['City'].cat.codes.to_numpy('int64') * n_drivers +
+                totals['Delivery_person_ID'].cat.codes.to_numpy('int64'))
+    batch_keys = batch_city * n_drivers + batch_driver
+
+    new_keys, inverse = np.unique(batch_keys, return_inverse=True)
+    batch = {name: np.bincount(inverse, weights=other[name].to_numpy('float64'), minlength=len(new_keys))
+             for name in TOTAL_COLUMNS}
+    sums = {name: totals[name].to_numpy('float64').copy() for name in TOTAL_COLUMNS}
+
+    positions = np.searchsorted(old_keys, new_keys)
+    found = positions < len(old_keys)
+    found[found] = old_keys[positions[found]] == new_keys[found]
+    for name in TOTAL_COLUMNS:
+        sums[name][positions[found]] += batch[name][found]
+        sums[name] = np.insert(sums[name], positions[~found], batch[name][~found])
+    keys = np.insert(old_keys, positions[~found], new_keys[~found])
+
+    return _totals_frame(keys // n_drivers, keys % n_drivers, pd.CategoricalDtype(city_categories),
+                         pd.CategoricalDtype(driver_categories), sums)
+
+def _recode(values, other):
+    """ Categorias de `values` acrescidas das novas de `other` e os códigos de `other` nelas """
+    categories, codes = values.cat.categories, other.cat.codes.to_numpy('int64')
+    if other.cat.categories.equals(categories):
+        return categories, codes
+    indexer = categories.get_indexer(other.cat.categories)
+    missing = indexer < 0
+    indexer[missing] = len(categories) + np.arange(missing.sum())
+    return categories.append(other.cat.categories[missing]), indexer[codes]
+
+def traffic_totals(drivers: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    `driver_totals` de cada condição de trânsito, com todas as datas. As
+    linhas sem trânsito ou sem data ficam de fora, como no filtro da sidebar.
+    """
+    codes = drivers['Road_traffic_density'].cat.codes.to_numpy()
+    dated = drivers['Order_Date'].to_numpy() >= 0
+    totals = {}
+    for code, label in enumerate(drivers['Road_traffic_density'].cat.categories):
+        rows = (codes == code) & dated
+        if rows.any():
+            totals[label] = driver_totals(drivers.loc[rows])
+    return totals
+
+def merge_traffic_totals(totals: dict[str, pd.DataFrame], other: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """ Soma as `traffic_totals` de um lote novo às existentes (`merge_totals` em cada trânsito) """
+    merged = dict(totals)
+    for label, part in other.items():
+        merged[label] = merge_totals(merged[label], part) if label in merged else part
+    return merged
+
+def select_totals(totals: dict[str, pd.DataFrame], traffic_options: list[str]) -> pd.DataFrame | None:
+    """ Somas dos trânsitos em `traffic_options` (None se nenhum deles tiver pedidos) """
+    selected = [totals[label] for label in dict.fromkeys(traffic_options) if label in totals]
+    return reduce(merge_totals, selected) if selected else None
+
+# ====================================================
+# Top-k por Cidade
+# ====================================================
+
+def _select(values, ids, k):
+    """
+    Posições dos k menores `values`, em ordem. np.partition acha o k-ésimo
+    valor em O(n); só os candidatos até ele são ordenados, com empates
+    decididos pelo rótulo do entregador (`ids`).
+    """
+    if len(values) > k:
+        threshold = np.partition(values, k - 1)[k - 1]
+        candidates = np.flatnonzero(values <= threshold)
+    else:
+        candidates = np.arange(len(values))
+    order = sorted(range(len(candidates)), key=lambda i: (values[candidates[i]], ids[candidates[i]]))
+    return candidates[order[:k]]
+
+def top_k_per_city(totals: pd.DataFrame, k: int = 10, ascending: bool = True,
+                   min_orders: int = 1) -> pd.DataFrame:
+    """
+    Os k entregadores de menor (`ascending=True`) ou maior tempo médio de
+    entrega em cada cidade, considerando só quem tem pelo menos
+    `min_orders` pedidos com tempo registrado.
+    Colunas: City, Delivery_person_ID, Time_taken(min), orders.
+    """
+    eligible = (totals['time_n'] >= max(min_orders, 1)).to_numpy()
+    totals = totals.loc[eligible, :]
+    means = (totals['time_sum'] / totals['time_n']).to_numpy('float64')
+    ranked = means if ascending else -means
+    city_codes = totals['City'].cat.codes.to_numpy()
+    driver_labels = totals['Delivery_person_ID'].to_numpy()
+
+    positions = []
+    for code in np.argsort(totals['City'].cat.categories):
+        rows = np.flatnonzero(city_codes == code)
+        if len(rows):
+            positions.append(rows[_select(ranked[rows], driver_labels[rows], k)])
+    positions = np.concatenate(positions) if positions else np.array([], dtype='int64')
+
+    result = totals.iloc[positions, :].loc[:, ['City', 'Delivery_person_ID', 'orders']]
+    result.insert(2, 'Time_taken(min)', means[positions])
+    return result.reset_index(drop=True)
@@ -0,0 +1,435 @@
+"""
+Relatório offline das três páginas para toda a grade de filtros da sidebar.
+
+A grade é formada por todos os dias com pedidos ("até qual data?") e
+todos os subconjuntos não vazios das condições de trânsito. O dataset é
+carregado uma única vez. Cada página usa o seu cubo, e as métricas da
+grade inteira saem de uma só passada vetorizada:
+
+- somas (pedidos, tempos, avaliações, distâncias) são acumuladas por dia
+  dentro de cada nível de trânsito (cumsum) e depois somadas por
+  subconjunto de níveis, cada subconjunto a partir de um menor;
+- médias e desvios usam somas centradas na média geral de cada grupo,
+  que são aditivas e não perdem precisão como a soma dos quadrados;
+- entregadores distintos saem do primeiro dia de cada entregador por
+  subconjunto de níveis (contado a partir desse dia);
+- o top-k por cidade é uma única ordenação de todos os pontos da grade.
+
+O filtro "até a data X" de um dia sem pedidos equivale ao do último dia
+com pedidos antes dele, e `lookup` devolve a fatia de qualquer tabela
+para o estado da sidebar. O mapa da Visão Empresa fica de fora.
+
+Uso (na raiz do repositório):
+    python -m core.report [dataset/train.csv] --out reports/2022-04-13 --formats parquet csv html
+"""
+import argparse
+import html
+import os
+import time
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.cleaning import REQUIRED_EMPRESA, REQUIRED_ENTREGADORES, REQUIRED_RESTAURANTES, drop_missing
+from core.columnar import from_epoch_days
+from core.cube import build_cube
+from core.loader import TRAIN_PATH
+from core.ranking import TOTAL_COLUMNS
+from core.storage import load_clean
+
+try:
+    import pyarrow
+except ImportError:  # sem pyarrow o relatório sai só em CSV/HTML
+    pyarrow = None
+
+# ====================================================
+# Configuração
+# ====================================================
+
+# Níveis de trânsito na ordem da sidebar; o bit i de `traffic_mask` é TRAFFIC_LEVELS[i]
+TRAFFIC_LEVELS = ('Low', 'Medium', 'High', 'Jam')
+
+FORMATS = ('parquet', 'csv', 'html')
+
+# Tabelas de cada página, na ordem do relatório HTML
+PAGES = {
+    'Visão Empresa': ['orders_by_day', 'orders_by_traffic', 'orders_by_city_traffic', 'orders_by_week'],
+    'Visão Entregadores': ['entregadores_overview', 'rating_by_traffic', 'rating_by_weather',
+                           'driver_ratings', 'top_drivers'],
+    'Visão Restaurantes': ['restaurantes_overview', 'time_by_city', 'time_by_city_type',
+                           'time_by_city_traffic', 'distance_by_city'],
+}
+
+class Grid(NamedTuple):
+    """
+    days: dias com pedidos (desde 1970-01-01), em ordem.
+    levels: níveis de trânsito; os subconjuntos são os bitmasks 1 .. 2^len(levels) - 1.
+    """
+    days: np.ndarray
+    levels: tuple
+
+def build_grid(cubes, levels=TRAFFIC_LEVELS):
+    """ Grade de filtros que cobre os dias de todos os `cubes` """
+    days = np.unique(np.concatenate([cube.cells['Order_Date'].to_numpy() for cube in cubes]))
+    return Grid(days[days >= 0], tuple(levels))
+
+def traffic_mask(traffic_options, levels=TRAFFIC_LEVELS):
+    """ Bitmask do subconjunto de trânsito selecionado na sidebar """
+    return sum(1 << i for i, level in enumerate(levels) if level in traffic_options)
+
+def _masks(grid):
+    return np.arange(1, 1 << len(grid.levels))
+
+def _mask_labels(grid):
+    return np.array([', '.join(level for i, level in enumerate(grid.levels) if mask >> i & 1)
+                     for mask in _masks(grid)], dtype=object)
+
+# ====================================================
+# Acumulação na Grade
+# ====================================================
+
+def _coordinates(part, grid):
+    """ Nível de trânsito, posição na grade de dias e validade de cada linha de `part` """
+    traffic = part['Road_traffic_density']
+    # O código -1 (trânsito ausente) cai no último elemento, que também é -1
+    level = np.append(pd.Index(grid.levels).get_indexer(traffic.cat.categories), -1)
+    t = level[traffic.cat.codes.to_numpy('int64')]
+    days = part['Order_Date'].to_numpy()
+    d = np.searchsorted(grid.days, days)
+    return t, d, (t >= 0) & (days >= 0)
+
+def _subsets(per_level, combine, empty):
+    """ Valor de cada subconjunto de níveis, montado a partir do subconjunto sem o menor bit """
+    out = np.empty((1 << len(per_level), *per_level.shape[1:]), dtype=per_level.dtype)
+    out[0] = empty
+    for mask in range(1, len(out)):
+        low = mask & -mask
+        out[mask] = combine(out[mask ^ low], per_level[low.bit_length() - 1])
+    return out[1:]
+
+def _cumulative_sums(values, t, d, g, n_groups, grid):
+    """ Soma de `values` por subconjunto x dia da grade (acumulada até o dia) x grupo """
+    n_levels, n_days = len(grid.levels), len(grid.days)
+    sums = np.bincount((t * n_days + d) * n_groups + g, weights=values,
+                       minlength=n_levels * n_days * n_groups).reshape(n_levels, n_days, n_groups)
+    return _subsets(np.cumsum(sums, axis=1), np.add, 0.0)
+
+def _cumulative_extremes(values, t, d, g, n_groups, grid, ufunc):
+    """ Mínimo (`np.fmin`) ou máximo (`np.fmax`) acumulado, ignorando NaN; inf vira NaN """
+    fill = np.inf if ufunc is np.fmin else -np.inf
+    n_levels, n_days = len(grid.levels), len(grid.days)
+    extremes = np.full(n_levels * n_days * n_groups, fill)
+    ufunc.at(extremes, (t * n_days + d) * n_groups + g, values)
+    extremes = ufunc.accumulate(extremes.reshape(n_levels, n_days, n_groups), axis=1)
+    result = _subsets(extremes, ufunc, fill)
+    result[np.isinf(result)] = np.nan
+    return result
+
+def _group_codes(part, keys):
+    """ Código do grupo de cada linha (-1 = chave ausente) e as chaves dos grupos """
+    if not keys:
+        return np.zeros(len(part), dtype='int64'), None
+    grouped = part.groupby(keys, observed=True)
+    return grouped.ngroup().fillna(-1).to_numpy('int64'), grouped.size().index.to_frame(index=False)
+
+def _long_frame(grid, keys, columns, present):
+    """ Tabela longa: uma linha por subconjunto x dia x grupo presente """
+    mask_i, day_i, group_i = np.nonzero(present)
+    frame = pd.DataFrame({'date_max': from_epoch_days(grid.days[day_i]).to_numpy(),
+                          'traffic': _mask_labels(grid)[mask_i],
+                          'traffic_mask': _masks(grid)[mask_i]})
+    if keys is not None:
+        frame = pd.concat([frame, keys.iloc[group_i].reset_index(drop=True)], axis=1)
+    for name, values in columns.items():
+        frame[name] = values[mask_i, day_i, group_i]
+    return frame
+
+def grouped_metrics(cells, grid, keys=(), measures=()):
+    """
+    Pedidos e média/desvio padrão amostral de `measures` por `keys` em todos
+    os pontos da grade (mesmos números de `core.cube.count_by`/`mean_std`).
+    Sem `keys`, há uma linha por ponto da grade, mesmo sem pedidos.
+    Colunas: date_max, traffic, traffic_mask, *keys, orders, <medida>_mean, <medida>_std.
+    """
+    keys = list(keys)
+    t, d, valid = _coordinates(cells, grid)
+    g, groups = _group_codes(cells, keys)
+    valid &= g >= 0
+    t, d, g = t[valid], d[valid], g[valid]
+    n_groups = 1 if groups is None else len(groups)
+
+    def column(name):
+        return cells[name].to_numpy('float64')[valid]
+
+    orders = _cumulative_sums(column('orders'), t, d, g, n_groups, grid)
+    columns = {'orders': orders.astype('int64')}
+    for measure in measures:
+        n, total, m2 = column(f'{measure}_n'), column(f'{measure}_sum'), column(f'{measure}_m2')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Centro de cada grupo: média geral do grupo (constante em toda a grade)
+            centers = np.nan_to_num(np.bincount(g, weights=total, minlength=n_groups) /
+                                    np.bincount(g, weights=n, minlength=n_groups))
+            center = centers[g]
+            deviation = np.where(n > 0, total / n - center, 0.0)
+            group_n = _cumulative_sums(n, t, d, g, n_groups, grid)
+            shifted = _cumulative_sums(total - n * center, t, d, g, n_groups, grid)
+            squares = _cumulative_sums(m2 + n * deviation ** 2, t, d, g, n_groups, grid)
+            group_m2 = squares - shifted ** 2 / group_n
+            # Resíduo do cancelamento quando todos os valores do grupo são iguais
+            group_m2[group_m2 <= 1e-12 * squares] = 0.0
+            columns[f'{measure}_mean'] = np.where(group_n > 0, shifted / group_n + centers, np.nan)
+            columns[f'{measure}_std'] = np.where(group_n > 1, np.sqrt(group_m2 / (group_n - 1)), np.nan)
+
+    present = orders > 0 if keys else np.ones(orders.shape, dtype=bool)
+    return _long_frame(grid, groups, columns, present)
+
+def distinct_drivers(drivers, grid, keys=()):
+    """
+    Entregadores distintos por `keys` em todos os pontos da grade (mesmos
+    números de `core.cube.distinct_drivers`). Cada par grupo x entregador
+    conta a partir do primeiro dia em que aparece num dos níveis do
+    subconjunto. Colunas: date_max, traffic, traffic_mask, *keys, Delivery_person_ID.
+    """
+    keys = list(keys)
+    t, d, valid = _coordinates(drivers, grid)
+    driver = drivers['Delivery_person_ID'].cat.codes.to_numpy('int64')
+    g, groups = _group_codes(drivers, keys)
+    valid &= (driver >= 0) & (g >= 0)
+    n_groups, n_drivers = 1 if groups is None else len(groups), len(drivers['Delivery_person_ID'].cat.categories)
+    n_levels, n_days = len(grid.levels), len(grid.days)
+
+    pairs, pair = np.unique(g[valid] * n_drivers + driver[valid], return_inverse=True)
+    first = np.full(n_levels * len(pairs), n_days, dtype='int64')
+    np.minimum.at(first, t[valid] * len(pairs) + pair, d[valid])
+    first = _subsets(first.reshape(n_levels, len(pairs)), np.minimum, n_days)
+
+    n_masks = len(first)
+    slots = (np.arange(n_masks)[:, None] * (n_days + 1) + first) * n_groups + pairs // n_drivers
+    counts = np.bincount(slots.ravel(), minlength=n_masks * (n_days + 1) * n_groups)
+    counts = np.cumsum(counts.reshape(n_masks, n_days + 1, n_groups), axis=1)[:, :n_days]
+
+    present = counts > 0 if keys else np.ones(counts.shape, dtype=bool)
+    return _long_frame(grid, groups, {'Delivery_person_ID': counts}, present)
+
+def driver_ratings(drivers, grid):
+    """ Avaliação média de cada entregador em todos os pontos da grade (`core.metrics.ratings_by_driver`) """
+    t, d, valid = _coordinates(drivers, grid)
+    g, groups = _group_codes(drivers, ['Delivery_person_ID'])
+    valid &= g >= 0
+    t, d, g = t[valid], d[valid], g[valid]
+    sums = {name: _cumulative_sums(drivers[name].to_numpy('float64')[valid], t, d, g, len(groups), grid)
+            for name in ('orders', 'rating_sum', 'rating_n')}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratings = sums['rating_sum'] / sums['rating_n']
+    return _long_frame(grid, groups, {'Delivery_person_Ratings': ratings}, sums['orders'] > 0)
+
+def top_drivers(drivers, grid, k=10, min_orders=1):
+    """
+    Os k entregadores mais rápidos e os k mais lentos de cada cidade em
+    todos os pontos da grade (`core.ranking.top_k_per_city`, com o mesmo
+    desempate pelo rótulo do entregador), numa só ordenação.
+    Colunas: date_max, traffic, traffic_mask, ranking, position, City,
+    Delivery_person_ID, Time_taken(min), orders.
+    """
+    city, driver = drivers['City'], drivers['Delivery_person_ID']
+    t, d, valid = _coordinates(drivers, grid)
+    city_codes, driver_codes = city.cat.codes.to_numpy('int64'), driver.cat.codes.to_numpy('int64')
+    valid &= (city_codes >= 0) & (driver_codes >= 0)
+    n_drivers = len(driver.cat.categories)
+
+    pairs, pair = np.unique(city_codes[valid] * n_drivers + driver_codes[valid], return_inverse=True)
+    sums = {name: _cumulative_sums(drivers[name].to_numpy('float64')[valid], t[valid], d[valid], pair,
+                                   len(pairs), grid)
+            for name in TOTAL_COLUMNS}
+    mask_i, day_i, pair_i = np.nonzero(sums['time_n'] >= max(min_orders, 1))
+    means = sums['time_sum'][mask_i, day_i, pair_i] / sums['time_n'][mask_i, day_i, pair_i]
+
+    # Cidades e entregadores na ordem dos rótulos, como em `top_k_per_city`
+    city_rank = np.argsort(np.argsort(city.cat.categories))[pairs // n_drivers][pair_i]
+    driver_rank = np.argsort(np.argsort(driver.cat.categories))[pairs % n_drivers][pair_i]
+
+    frames = []
+    for ranking, sign in (('fastest', 1.0), ('slowest', -1.0)):
+        order = np.lexsort((driver_rank, sign * means, city_rank, day_i, mask_i))
+        group = ((mask_i * len(grid.days) + day_i) * len(city.cat.categories) + city_rank)[order]
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        position = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        rows, position = order[position < k], position[position < k]
+
+        frames.append(pd.DataFrame({
+            'date_max': from_epoch_days(grid.days[day_i[rows]]).to_numpy(),
+            'traffic': _mask_labels(grid)[mask_i[rows]],
+            'traffic_mask': _masks(grid)[mask_i[rows]],
+            'ranking': ranking,
+            'position': position + 1,
+            'City': pd.Categorical.from_codes(pairs[pair_i[rows]] // n_drivers, dtype=city.dtype),
+            'Delivery_person_ID': pd.Categorical.from_codes(pairs[pair_i[rows]] % n_drivers, dtype=driver.dtype),
+            'Time_taken(min)': means[rows],
+            'orders': sums['orders'][mask_i[rows], day_i[rows], pair_i[rows]].astype('int64'),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+# ====================================================
+# Tabelas das Páginas
+# ====================================================
+
+def _renamed(frame, columns):
+    return frame.rename(columns=columns)
+
+def empresa_tables(cube, grid):
+    """ Visão Empresa. `orders_by_day` não repete a série por data: filtre Order_Date <= date_max """
+    daily = grouped_metrics(cube.cells, grid, ['Order_Date'])
+    last_day = daily['date_max'] == from_epoch_days(grid.days[-1:])[0]
+    orders_by_day = daily.loc[last_day.to_numpy(), ['traffic', 'traffic_mask', 'Order_Date', 'orders']]
+    orders_by_day['Order_Date'] = from_epoch_days(orders_by_day['Order_Date']).to_numpy()
+
+    weekly = grouped_metrics(cube.cells, grid, ['week_of_year'])
+    drivers = distinct_drivers(cube.drivers, grid, ['week_of_year'])
+    weekly = weekly.merge(drivers, how='inner', on=['date_max', 'traffic', 'traffic_mask', 'week_of_year'])
+    weekly['order_by_deliverer'] = weekly['orders'] / weekly['Delivery_person_ID']
+    return {
+        'orders_by_day': orders_by_day.reset_index(drop=True),
+        'orders_by_traffic': grouped_metrics(cube.cells, grid, ['Road_traffic_density']),
+        'orders_by_city_traffic': grouped_metrics(cube.cells, grid, ['City', 'Road_traffic_density']),
+        'orders_by_week': weekly,
+    }
+
+def entregadores_tables(cube, grid, k=10, min_orders=1):
+    """ Visão Entregadores """
+    t, d, valid = _coordinates(cube.cells, grid)
+    g = np.zeros(valid.sum(), dtype='int64')
+    overview = grouped_metrics(cube.cells, grid)
+    for name, ufunc in (('age_min', np.fmin), ('age_max', np.fmax),
+                        ('vehicle_min', np.fmin), ('vehicle_max', np.fmax)):
+        values = cube.cells[name].to_numpy('float64')[valid]
+        overview[name] = _cumulative_extremes(values, t[valid], d[valid], g, 1, grid, ufunc).ravel()
+
+    def ratings(key):
+        return _renamed(grouped_metrics(cube.cells, grid, [key], ['rating']).drop(columns='orders'),
+                        {'rating_mean': 'delivery_mean', 'rating_std': 'delivery_std'})
+
+    return {
+        'entregadores_overview': overview,
+        'rating_by_traffic': ratings('Road_traffic_density'),
+        'rating_by_weather': ratings('Weatherconditions'),
+        'driver_ratings': driver_ratings(cube.drivers, grid),
+        'top_drivers': top_drivers(cube.drivers, grid, k=k, min_orders=min_orders),
+    }
+
+def restaurantes_tables(cube, grid):
+    """ Visão Restaurantes """
+    overview = grouped_metrics(cube.cells, grid, measures=['distance'])
+    overview = _renamed(overview.drop(columns='distance_std'), {'distance_mean': 'mean_distance'})
+    overview.insert(4, 'drivers', distinct_drivers(cube.drivers, grid)['Delivery_person_ID'].to_numpy())
+
+    festival = grouped_metrics(cube.cells, grid, ['Festival'], ['time'])
+    for value, prefix in (('Yes', 'festival'), ('No', 'no_festival')):
+        rows = festival.loc[(festival['Festival'] == value).to_numpy(), :]
+        rows = overview[['date_max', 'traffic_mask']].merge(rows, how='left', on=['date_max', 'traffic_mask'])
+        overview[f'{prefix}_avg_time'] = rows['time_mean'].to_numpy()
+        overview[f'{prefix}_std_time'] = rows['time_std'].to_numpy()
+
+    def times(keys):
+        return _renamed(grouped_metrics(cube.cells, grid, keys, ['time']).drop(columns='orders'),
+                        {'time_mean': 'avg_time', 'time_std': 'std_time'})
+
+    return {
+        'restaurantes_overview': overview,
+        'time_by_city': times(['City']),
+        'time_by_city_type': times(['City', 'Type_of_order']),
+        'time_by_city_traffic': times(['City', 'Road_traffic_density']),
+        'distance_by_city': _renamed(grouped_metrics(cube.cells, grid, ['City'], ['distance']).drop(columns='orders'),
+                                     {'distance_mean': 'distance', 'distance_std': 'std'}),
+    }
+
+def build_report(df, k=10, min_orders=1, levels=TRAFFIC_LEVELS):
+    """ Todas as tabelas do relatório a partir do dataset limpo (um cubo por página) """
+    cubes = {page: build_cube(drop_missing(df, required))
+             for page, required in (('empresa', REQUIRED_EMPRESA), ('entregadores', REQUIRED_ENTREGADORES),
+                                    ('restaurantes', REQUIRED_RESTAURANTES))}
+    grid = build_grid(cubes.values(), levels)
+    return {**empresa_tables(cubes['empresa'], grid),
+            **entregadores_tables(cubes['entregadores'], grid, k=k, min_orders=min_orders),
+            **restaurantes_tables(cubes['restaurantes'], grid)}
+
+# ====================================================
+# Consulta (para servir o estado da sidebar)
+# ====================================================
+
+def lookup(table, date_max, traffic_options, levels=TRAFFIC_LEVELS):
+    """
+    Linhas de uma tabela do relatório para o filtro da sidebar: o último
+    dia da grade até `date_max` e o subconjunto `traffic_options`.
+    """
+    selected = (table['traffic_mask'] == traffic_mask(traffic_options, levels)).to_numpy()
+    limit = pd.Timestamp(date_max)
+    if 'date_max' in table:
+        dates = table['date_max']
+        day = dates[dates <= limit].max()
+        selected &= (dates == day).to_numpy()
+    else:
+        selected &= (table['Order_Date'] <= limit).to_numpy()
+    return table.loc[selected, :].drop(columns=['date_max', 'traffic', 'traffic_mask'], errors='ignore')
+
+# ====================================================
+# Gravação
+# ====================================================
+
+def write_report(tables, out_dir, formats=FORMATS):
+    """ Grava as tabelas em `out_dir` (um arquivo por tabela e formato; HTML com o retrato mais recente) """
+    if 'parquet' in formats and pyarrow is None:
+        raise RuntimeError('exportar em Parquet precisa do pyarrow')
+    os.makedirs(out_dir, exist_ok=True)
+    for name, table in tables.items():
+        if 'parquet' in formats:
+            table.to_parquet(os.path.join(out_dir, f'{name}.parquet'), index=False)
+        if 'csv' in formats:
+            table.to_csv(os.path.join(out_dir, f'{name}.csv'), index=False)
+    if 'html' in formats:
+        with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(snapshot_html(tables))
+
+def snapshot_html(tables, date_max=None, traffic_options=TRAFFIC_LEVELS):
+    """ Página HTML com as tabelas de cada visão para um filtro (padrão: último dia, todo o trânsito) """
+    if date_max is None:
+        date_max = tables['restaurantes_overview']['date_max'].max()
+    title = f"Curry Company - até {pd.Timestamp(date_max):%d-%m-%Y} ({', '.join(traffic_options)})"
+    sections = []
+    for page, names in PAGES.items():
+        sections.append(f'<h2>{html.escape(page)}</h2>')
+        for name in names:
+            snapshot = lookup(tables[name], date_max, traffic_options)
+            sections.append(f'<h3>{name}</h3>')
+            sections.append(snapshot.to_html(index=False, float_format='{:.2f}'.format, border=0))
+    return ('<!DOCTYPE html>\n<html lang="pt-BR"><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title>'
+            '<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1.5em}'
+            'th,td{padding:2px 10px;text-align:right;border-bottom:1px solid #ddd}</style></head><body>'
+            f'<h1>{html.escape(title)}</h1>' + '\n'.join(sections) + '</body></html>\n')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', default=TRAIN_PATH)
+    parser.add_argument('--out', default=os.path.join('reports', date.today().isoformat()))
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--min-orders', type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = load_clean(args.path)
+    loaded = time.perf_counter()
+    tables = build_report(df, k=args.top_k, min_orders=args.min_orders)
+    computed = time.perf_counter()
+    write_report(tables, args.out, args.formats)
+    written = time.perf_counter()
+
+    for name, table in tables.items():
+        print(f'{name:<24} {len(table):>9} linhas')
+    print(f'{len(df)} pedidos  carga {loaded - start:.2f}s  grade {computed - loaded:.2f}s  '
+          f'gravação {written - computed:.2f}s  -> {args.out}')
+
+if __name__ == '__main__':
+    main()
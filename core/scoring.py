@@ -0,0 +1,220 @@
+"""
+Previsão do tempo de entrega (Time_taken(min)) dos pedidos do test.csv.
+
+As features saem da mesma limpeza do dashboard (`clean_orders`, com a
+distância restaurante-entrega): números padronizados pela média e desvio
+do treino (ausentes ficam na média) e categorias em one-hot com as
+categorias vistas no treino. O modelo é uma regressão linear com
+regularização ridge, resolvida com numpy (uma equação normal), leve o
+bastante para ser treinada a cada execução.
+
+A pontuação é feita em lotes vetorizados: cada lote do CSV é limpo,
+vira uma matriz de features e é multiplicado pelos coeficientes. A saída
+segue o formato do Sample_Submission.csv (ID,Time_taken (min)), na ordem
+dos pedidos. No modo streaming os pedidos chegam pela entrada padrão
+(CSV com cabeçalho) e cada lote é gravado assim que é pontuado.
+
+Uso (na raiz do repositório):
+    python -m core.scoring                                  # grava dataset/submission.csv
+    python -m core.scoring --validate                       # erro numa parte do train.csv
+    tail -n +1 -f novos.csv | python -m core.scoring --stream --batch-size 64
+"""
+import argparse
+import io
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.cleaning import CATEGORY_COLUMNS, clean_orders
+from core.loader import TRAIN_PATH
+from core.storage import load_clean
+
+# ====================================================
+# Configuração
+# ====================================================
+
+TEST_PATH = 'dataset/test.csv'
+SUBMISSION_PATH = 'dataset/submission.csv'
+SUBMISSION_COLUMNS = ['ID', 'Time_taken (min)']
+
+TARGET = 'Time_taken(min)'
+
+NUMERIC_FEATURES = ['Delivery_person_Age', 'Delivery_person_Ratings', 'Vehicle_condition', 'distance',
+                    'multiple_deliveries', 'order_hour']
+CATEGORICAL_FEATURES = ['Weatherconditions', 'Road_traffic_density', 'Type_of_order', 'Type_of_vehicle',
+                        'Festival', 'City']
+
+# Peso da regularização ridge (o intercepto não é regularizado)
+RIDGE = 1.0
+
+# Pedidos por lote na pontuação do CSV
+BATCH_ROWS = 8192
+
+# Colunas lidas sempre como texto: num lote pequeno, uma coluna category sem
+# nenhum 'NaN' (ex.: multiple_deliveries) seria inferida como número
+TEXT_COLUMNS = {col: str for col in ['ID', *CATEGORY_COLUMNS]}
+
+class Model(NamedTuple):
+    """
+    means, scales: padronização das features numéricas (do treino).
+    categories: categorias vistas no treino para cada feature categórica.
+    coef: intercepto, pesos das numéricas e pesos do one-hot, nessa ordem.
+    """
+    means: np.ndarray
+    scales: np.ndarray
+    categories: dict
+    coef: np.ndarray
+
+# ====================================================
+# Features
+# ====================================================
+
+def _from_labels(values, parse):
+    """ Converte uma coluna category olhando só os rótulos distintos (ausente = NaN) """
+    parsed = np.append(np.asarray(parse(values.cat.categories), dtype='float64'), np.nan)
+    return parsed[values.cat.codes.to_numpy('int64')]
+
+def numeric_features(df):
+    """ Matriz (pedidos x NUMERIC_FEATURES) com NaN nos ausentes """
+    columns = {
+        'Delivery_person_Age': pd.to_numeric(df['Delivery_person_Age']).to_numpy('float64', na_value=np.nan),
+        'Delivery_person_Ratings': df['Delivery_person_Ratings'].to_numpy('float64'),
+        'Vehicle_condition': pd.to_numeric(df['Vehicle_condition']).to_numpy('float64', na_value=np.nan),
+        'distance': df['distance'].to_numpy('float64'),
+        'multiple_deliveries': _from_labels(df['multiple_deliveries'], lambda x: pd.to_numeric(x, errors='coerce')),
+        'order_hour': pd.to_numeric(df['order_seconds']).to_numpy('float64', na_value=np.nan) / 3600,
+    }
+    return np.column_stack([columns[name] for name in NUMERIC_FEATURES])
+
+def design_matrix(model, df):
+    """ Intercepto, numéricas padronizadas e one-hot (categorias fora do treino ficam zeradas) """
+    numeric = (numeric_features(df) - model.means) / model.scales
+    numeric[np.isnan(numeric)] = 0.0
+
+    widths = [len(model.categories[col]) for col in CATEGORICAL_FEATURES]
+    onehot = np.zeros((len(df), sum(widths)))
+    rows = np.arange(len(df))
+    for col, offset in zip(CATEGORICAL_FEATURES, np.cumsum([0, *widths[:-1]])):
+        codes = model.categories[col].get_indexer(df[col].astype(object))
+        known = codes >= 0
+        onehot[rows[known], offset + codes[known]] = 1.0
+    return np.hstack([np.ones((len(df), 1)), numeric, onehot])
+
+# ====================================================
+# Treino e Previsão
+# ====================================================
+
+def fit(df, ridge=RIDGE):
+    """ Ajusta o modelo nos pedidos limpos de `df` com tempo de entrega registrado """
+    df = df.loc[df[TARGET].notna().to_numpy(), :]
+    numeric = numeric_features(df)
+    means = np.nan_to_num(np.nanmean(numeric, axis=0))
+    scales = np.nan_to_num(np.nanstd(numeric, axis=0))
+    scales[scales == 0] = 1.0
+    categories = {col: pd.Index(df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype)
+                                else df[col].dropna().unique(), dtype=object)
+                  for col in CATEGORICAL_FEATURES}
+    model = Model(means, scales, categories, None)
+
+    X = design_matrix(model, df)
+    y = df[TARGET].to_numpy('float64')
+    penalty = np.full(X.shape[1], ridge)
+    penalty[0] = 0.0
+    coef = np.linalg.solve(X.T @ X + np.diag(penalty), X.T @ y)
+    return model._replace(coef=coef)
+
+def predict(model, df):
+    """ Tempo de entrega previsto (min) para cada pedido limpo de `df` """
+    return design_matrix(model, df) @ model.coef
+
+def score_frame(model, raw):
+    """ Lote bruto (formato do test.csv) -> dataframe no formato do Sample_Submission """
+    return pd.DataFrame({SUBMISSION_COLUMNS[0]: raw['ID'].to_numpy(),
+                         SUBMISSION_COLUMNS[1]: predict(model, clean_orders(raw))})
+
+def validate(df, fraction=0.2, ridge=RIDGE, seed=0):
+    """ RMSE/MAE numa parte sorteada de `df` com o modelo treinado no resto (e a média como referência) """
+    df = df.loc[df[TARGET].notna().to_numpy(), :]
+    holdout = np.random.default_rng(seed).random(len(df)) < fraction
+    train, test = df.loc[~holdout, :], df.loc[holdout, :]
+    error = predict(fit(train, ridge), test) - test[TARGET].to_numpy('float64')
+    baseline = train[TARGET].mean() - test[TARGET].to_numpy('float64')
+    return {'rmse': float(np.sqrt(np.mean(error ** 2))), 'mae': float(np.mean(np.abs(error))),
+            'rmse_media': float(np.sqrt(np.mean(baseline ** 2))), 'pedidos': int(holdout.sum())}
+
+# ====================================================
+# Pontuação em Lote e em Streaming
+# ====================================================
+
+def score_file(model, path=TEST_PATH, out=SUBMISSION_PATH, batch_rows=BATCH_ROWS):
+    """ Pontua o CSV `path` em lotes e grava a submissão em `out`; retorna os pedidos pontuados """
+    scored = 0
+    with (pd.read_csv(path, chunksize=batch_rows, dtype=TEXT_COLUMNS, low_memory=False) as reader,
+          open(out, 'w', newline='') as f):
+        for raw in reader:
+            score_frame(model, raw).to_csv(f, header=scored == 0, index=False)
+            scored += len(raw)
+    return scored
+
+def score_stream(model, lines, out, batch_size=64):
+    """
+    Pontua pedidos que chegam como linhas CSV (a primeira é o cabeçalho),
+    gravando em `out` cada lote de `batch_size` pedidos assim que fica
+    pronto. Retorna os pedidos pontuados.
+    """
+    lines = iter(lines)
+    header = next(lines, None)
+    if header is None:
+        return 0
+    scored, batch = 0, []
+    for line in lines:
+        if line.strip():
+            batch.append(line)
+        if len(batch) >= batch_size:
+            scored += _flush(model, header, batch, out, scored == 0)
+            batch = []
+    if batch:
+        scored += _flush(model, header, batch, out, scored == 0)
+    return scored
+
+def _flush(model, header, batch, out, write_header):
+    raw = pd.read_csv(io.StringIO(header + ''.join(batch)), dtype=TEXT_COLUMNS, low_memory=False)
+    score_frame(model, raw).to_csv(out, header=write_header, index=False)
+    out.flush()
+    return len(raw)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train', default=TRAIN_PATH)
+    parser.add_argument('--test', default=TEST_PATH)
+    parser.add_argument('--out', default=SUBMISSION_PATH)
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help=f'pedidos por lote (padrão: {BATCH_ROWS} no arquivo, 64 no streaming)')
+    parser.add_argument('--ridge', type=float, default=RIDGE)
+    parser.add_argument('--stream', action='store_true', help='lê pedidos da entrada padrão e escreve na saída')
+    parser.add_argument('--validate', action='store_true', help='só mede o erro numa parte do treino')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    train = load_clean(args.train)
+    if args.validate:
+        print(validate(train, ridge=args.ridge))
+        return
+    model = fit(train, args.ridge)
+    trained = time.perf_counter()
+
+    if args.stream:
+        scored = score_stream(model, sys.stdin, sys.stdout, args.batch_size or 64)
+        log = sys.stderr
+    else:
+        scored = score_file(model, args.test, args.out, args.batch_size or BATCH_ROWS)
+        log = sys.stdout
+    seconds = time.perf_counter() - trained
+    print(f'treino {trained - start:.2f}s  {scored} pedidos pontuados em {seconds:.3f}s '
+          f'({scored / max(seconds, 1e-9):,.0f} pedidos/s)', file=log)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Cache colunar (Feather/Arrow) do dataset já limpo.
+
+O dataset é o train.csv limpo (dataset/cache/train.feather) mais os lotes
+incrementais gravados por `core.ingest` (dataset/train.parts/). Os lotes
+são dados de origem, como o train.csv, e não ficam no cache: reconstruir
+o cache ou trocar o train.csv nunca apaga nenhum lote (só
+`python -m core.ingest --reset`). Os gravados com outra CACHE_VERSION são
+migrados na leitura.
+
+Uso (na raiz do repositório), para pré-processar depois de trocar o train.csv:
+    python -m core.storage
+"""
+import glob
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from core.cleaning import clean_orders, concat_orders, derive_columns
+from core.profiling import profiled
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # sem pyarrow o dashboard continua lendo o CSV
+    pa = None
+
+# ====================================================
+# Configuração
+# ====================================================
+
+# Aumente quando `clean_orders` mudar o formato da saída. Os lotes já
+# gravados só têm as colunas calculadas refeitas (`derive_columns`)
+CACHE_VERSION = 2
+
+_METADATA_KEY = b'curry_company'
+
+# ====================================================
+# Funções do Cache
+# ====================================================
+
+def cache_path(path):
+    """ Arquivo de cache correspondente a um CSV (dataset/cache/<nome>.feather) """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(path)), 'cache', name + '.feather')
+
+def parts_dir(path):
+    """ Diretório dos lotes incrementais de um CSV (dataset/<nome>.parts, ao lado do CSV) """
+    return os.path.splitext(os.path.abspath(path))[0] + '.parts'
+
+def _move_legacy_parts(path):
+    """ Lotes gravados dentro do cache (dataset/cache/<nome>.parts) passam para `parts_dir` """
+    legacy = os.path.splitext(cache_path(path))[0] + '.parts'
+    if os.path.isdir(legacy) and not os.path.exists(parts_dir(path)):
+        try:
+            os.replace(legacy, parts_dir(path))
+        except OSError:  # outro processo já moveu (ou diretório somente leitura)
+            pass
+
+def list_parts(path):
+    """ Lotes incrementais em ordem de chegada """
+    _move_legacy_parts(path)
+    return sorted(glob.glob(os.path.join(parts_dir(path), 'part-*.feather')))
+
+def reset_parts(path):
+    """
+    Apaga todos os lotes incrementais de um CSV (ex.: train.csv novo que
+    já inclui os pedidos ingeridos). Retorna quantos lotes foram apagados.
+    """
+    parts = list_parts(path)
+    shutil.rmtree(parts_dir(path), ignore_errors=True)
+    return len(parts)
+
+def data_version(path):
+    """
+    Versão do dataset: mtime/tamanho do train.csv (ou do cache, se o CSV
+    não existir) mais a quantidade de lotes incrementais.
+    """
+    stat = os.stat(path if os.path.exists(path) else cache_path(path))
+    return (stat.st_mtime_ns, stat.st_size, len(list_parts(path)))
+
+def _source_info(path):
+    stat = os.stat(path)
+    return {'version': CACHE_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+@profiled
+def read_csv_clean(path):
+    """ Caminho sem cache: lê o CSV e limpa todas as linhas """
+    return clean_orders(pd.read_csv(path, low_memory=False))
+
+def _write_feather(df, target, info):
+    """
+    Grava o dataframe tipado em Feather sem compressão (category vira
+    dictionary encoding), para poder ser lido via mmap. A gravação é
+    atômica, então leitores concorrentes nunca veem um arquivo pela metade.
+    """
+    table = pa.Table.from_pandas(df)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_METADATA_KEY] = json.dumps(info).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    tmp = f'{target}.{os.getpid()}.tmp'
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    feather.write_feather(table, tmp, compression='uncompressed')
+    os.replace(tmp, target)
+
+def build_cache(path):
+    """
+    Limpa o CSV e grava o cache colunar (os lotes incrementais não são
+    tocados). Retorna o dataframe limpo.
+    """
+    df = read_csv_clean(path)
+    if pa is None:
+        return df
+
+    try:
+        _write_feather(df, cache_path(path), _source_info(path))
+    except OSError:  # diretório somente leitura: segue sem cache
+        pass
+    return df
+
+def append_part(path, df):
+    """ Grava um lote já limpo como um novo arquivo em dataset/<nome>.parts """
+    if pa is None:
+        raise RuntimeError('a ingestão incremental precisa do pyarrow')
+    target = os.path.join(parts_dir(path), f'part-{len(list_parts(path)):06d}.feather')
+    _write_feather(df, target, {'version': CACHE_VERSION})
+    return target
+
+def _read_info(target):
+    """ Metadados gravados por `_write_feather` (None se o arquivo não pode ser lido) """
+    try:
+        with pa.memory_map(target) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if _METADATA_KEY not in metadata:
+        return None
+    return json.loads(metadata[_METADATA_KEY])
+
+def _cache_is_fresh(path, target):
+    """ O cache vale enquanto o train.csv (mtime/tamanho) e a versão não mudarem """
+    info = _read_info(target)
+    if info is None:
+        return False
+    if not os.path.exists(path):
+        return True  # sem o CSV, o cache é a única cópia dos dados
+    return info == _source_info(path)
+
+@profiled
+def load_clean(path, columns=None):
+    """
+    Carrega o dataset limpo, lendo só `columns` do cache colunar via mmap.
+    Reconstrói o cache quando o CSV mudou e cai para o CSV quando o
+    cache não pode ser usado (ex.: pyarrow ausente).
+    """
+    if pa is None:
+        df = read_csv_clean(path)
+        return df if columns is None else df.loc[:, list(columns)]
+
+    target = cache_path(path)
+    if _cache_is_fresh(path, target):
+        df = read_feather(target, columns)
+    else:
+        df = build_cache(path)
+        df = df if columns is None else df.loc[:, list(columns)]
+
+    parts = list_parts(path)
+    if not parts:
+        return df
+    return concat_orders([df, *(read_part(part, columns) for part in parts)], ignore_index=True)
+
+def read_feather(target, columns=None):
+    """ Lê um arquivo do cache colunar (base ou lote) via mmap """
+    table = feather.read_table(target, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+def read_part(part, columns=None):
+    """
+    Lê um lote incremental. Lotes gravados com outra CACHE_VERSION têm as
+    colunas calculadas refeitas (`derive_columns`) e são regravados, então
+    a migração acontece uma única vez por lote.
+    """
+    info = _read_info(part)
+    if info is not None and info.get('version') == CACHE_VERSION:
+        return read_feather(part, columns)
+
+    df = derive_columns(read_feather(part))
+    try:
+        _write_feather(df, part, {'version': CACHE_VERSION})
+    except OSError:  # diretório somente leitura: migra só em memória
+        pass
+    return df if columns is None else df.loc[:, list(columns)]
+
+if __name__ == '__main__':
+    from core.loader import TRAIN_PATH
+    build_cache(TRAIN_PATH)
+    print(f'cache gravado em {cache_path(TRAIN_PATH)}')
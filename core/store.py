@@ -0,0 +1,76 @@
+"""
+Tabelas ordenadas e particionadas para o filtro da sidebar.
+
+As tabelas filtradas a cada rerun (células e entregadores do cubo, grade
+do mapa, chaves dos sketches) ficam ordenadas por trânsito (código da
+categoria) e, dentro de cada nível de trânsito, por Order_Date. Cada
+nível é então uma partição contígua, e "até a data X" é um prefixo dela:
+o filtro vira duas buscas binárias por nível selecionado, sem máscaras
+do tamanho da tabela.
+
+Quando os trechos selecionados são vizinhos (por exemplo todos os níveis
+de trânsito com a data máxima do slider), o resultado é uma fatia da
+tabela, sem cópia. Nos demais casos só as linhas selecionadas são
+copiadas. O resultado continua ordenado e particionado.
+"""
+import numpy as np
+
+from core.columnar import category_codes, epoch_day
+
+PARTITION_COLUMN = 'Road_traffic_density'
+
+# Dentro da partição (dias desde 1970-01-01, -1 para data ausente)
+SORT_COLUMN = 'Order_Date'
+
+# ====================================================
+# Ordenação
+# ====================================================
+
+def partition_order(frame):
+    """ Posições que ordenam `frame` por trânsito e data (estável: o resto da ordem é mantido) """
+    codes = frame[PARTITION_COLUMN].cat.codes.to_numpy()
+    return np.lexsort((frame[SORT_COLUMN].to_numpy(), codes))
+
+def partition(frame):
+    """ `frame` ordenado por trânsito e data, com índice 0..n-1 """
+    return frame.take(partition_order(frame)).reset_index(drop=True)
+
+# ====================================================
+# Seleção
+# ====================================================
+
+def select_ranges(frame, date_max, traffic_options):
+    """
+    Trechos [início, fim) das linhas com data entre 1970-01-01 e `date_max`
+    e trânsito em `traffic_options`, em ordem, com os vizinhos já unidos.
+    `frame` precisa estar particionado (ver `partition`).
+    """
+    codes = frame[PARTITION_COLUMN].cat.codes.to_numpy()
+    days = frame[SORT_COLUMN].to_numpy()
+    day = epoch_day(date_max)
+
+    ranges = []
+    for code in np.sort(category_codes(frame[PARTITION_COLUMN], traffic_options)):
+        start, end = np.searchsorted(codes, [code, code + 1])
+        part = days[start:end]
+        first = start + int(np.searchsorted(part, 0, side='left'))
+        last = start + int(np.searchsorted(part, day, side='right'))
+        if last <= first:
+            continue
+        if ranges and ranges[-1][1] == first:
+            ranges[-1] = (ranges[-1][0], last)
+        else:
+            ranges.append((first, last))
+    return ranges
+
+def positions(ranges):
+    """ Uma fatia (sem cópia) se houver um único trecho; senão os índices das linhas """
+    if len(ranges) == 1:
+        return slice(*ranges[0])
+    if not ranges:
+        return slice(0, 0)
+    return np.concatenate([np.arange(start, end) for start, end in ranges])
+
+def select(frame, date_max, traffic_options):
+    """ Linhas de `frame` que passam no filtro da sidebar (fatia sem cópia quando possível) """
+    return frame.iloc[positions(select_ranges(frame, date_max, traffic_options))]
@@ -0,0 +1,108 @@
+"""
+Pipeline em blocos (load -> clean -> aggregate) para datasets maiores
+que a memória: o CSV é lido em pedaços, cada pedaço vira um cubo parcial
+e os cubos são mesclados, então a memória depende do tamanho do cubo e
+não da quantidade de pedidos.
+
+Uso (na raiz do repositório):
+    python -m core.streaming [dataset/train.csv] --chunksize 200000
+    python -m core.streaming --in-memory   # mesmo resumo, carregando tudo
+"""
+import argparse
+import json
+import sys
+
+import pandas as pd
+
+from core.cleaning import (REQUIRED_EMPRESA, REQUIRED_ENTREGADORES, REQUIRED_RESTAURANTES, clean_orders,
+                           drop_missing)
+from core.cube import build_cube, distinct_drivers, mean_std, merge_cubes
+from core.ranking import driver_totals, top_k_per_city
+from core.storage import list_parts, load_clean, read_part
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CHUNK_ROWS = 200_000
+
+PAGES = {'empresa': REQUIRED_EMPRESA, 'entregadores': REQUIRED_ENTREGADORES,
+         'restaurantes': REQUIRED_RESTAURANTES}
+
+# ====================================================
+# Leitura em Blocos
+# ====================================================
+
+def iter_chunks(path, chunksize=CHUNK_ROWS):
+    """ Gera o dataset limpo em pedaços: o CSV em blocos e depois os lotes incrementais """
+    with pd.read_csv(path, chunksize=chunksize, low_memory=False) as reader:
+        for chunk in reader:
+            yield clean_orders(chunk)
+    for part in list_parts(path):
+        yield read_part(part)
+
+def build_cube_streaming(path, required=(), chunksize=CHUNK_ROWS):
+    """ Mesmo cubo de `build_cube(load_data(required))`, sem ter o dataset inteiro em memória """
+    cube = None
+    for chunk in iter_chunks(path, chunksize):
+        partial = build_cube(drop_missing(chunk, required))
+        cube = partial if cube is None else merge_cubes(cube, partial)
+    return cube
+
+def peak_rss_mb():
+    """ Pico de memória residente do processo em MiB (None fora do Unix) """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != 'darwin' else peak / 2**20
+
+# ====================================================
+# Resumo das Métricas
+# ====================================================
+
+def summary(cube, k=10):
+    """ Métricas das páginas (sem filtro) a partir de um cubo, em tipos Python """
+    cells, drivers = cube
+    totals = driver_totals(drivers)
+    ratings = drivers.groupby('Delivery_person_ID', observed=True)[['rating_sum', 'rating_n']].sum()
+
+    def top(ascending):
+        ranked = top_k_per_city(totals, k=k, ascending=ascending)
+        return {str(city): rows['Delivery_person_ID'].astype(str).tolist()
+                for city, rows in ranked.groupby('City', observed=True)}
+
+    festival = {str(value): mean_std(cells.loc[cells['Festival'] == value, :], [], 'time').round(9).tolist()
+                for value in cells['Festival'].dropna().unique()}
+    return {
+        'orders': int(cells['orders'].sum()),
+        'age': [float(cells['age_min'].min()), float(cells['age_max'].max())],
+        'vehicle_condition': [int(cells['vehicle_min'].min()), int(cells['vehicle_max'].max())],
+        'drivers': int(distinct_drivers(drivers)),
+        'rating_by_driver': round(float((ratings['rating_sum'] / ratings['rating_n']).mean()), 9),
+        'festival_time': festival,
+        'fastest': top(True),
+        'slowest': top(False),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path', nargs='?', default='dataset/train.csv')
+    parser.add_argument('--page', choices=PAGES, default='restaurantes')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--in-memory', action='store_true', help='carrega tudo de uma vez (referência)')
+    args = parser.parse_args()
+
+    required = PAGES[args.page]
+    if args.in_memory:
+        cube = build_cube(drop_missing(load_clean(args.path), required))
+    else:
+        cube = build_cube_streaming(args.path, required, args.chunksize)
+
+    result = summary(cube)
+    result['peak_rss_mb'] = peak_rss_mb()
+    json.dump(result, sys.stdout, ensure_ascii=False)
+    print()
+
+if __name__ == '__main__':
+    main()
@@ -1,70 +1,32 @@
-import pandas as pd
-import numpy as np
-import plotly.express as px
 import streamlit as st
-import folium
 from datetime import datetime
-from PIL import Image
-from streamlit_folium import folium_static
-
-# ====================================================
-# Funções de Processamento (Lógica)
-# ====================================================
-
-def clean_code(df):
-    """ 
-    Limpa o dataframe: remove espaços, filtra NaNs, 
-    converte datas e tipos numéricos. 
-    """
-    # Removendo espaços vazios
-    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
-
-    # Filtros de NaNs
-    df = df.loc[df['Delivery_person_Age'] != 'NaN', :].copy()
-    df = df.loc[df['City'] != 'NaN', :]
-    df = df.loc[df['Road_traffic_density'] != 'NaN', :]
-
-    # Conversão de tipos
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
-    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1]).astype(int)
-    
-    # Criando coluna de semana para a Visão Tática
-    df['week_of_year'] = df['Order_Date'].dt.strftime('%U')
-    
-    return df
-
-def country_maps(df):
-    """ Cria o mapa com as localizações medianas por cidade e tráfego """
-    df_aux = (df.loc[:, ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']]
-                .groupby(['City', 'Road_traffic_density'])
-                .median()
-                .reset_index())
-    
-    map = folium.Map()
-    for index, location_info in df_aux.iterrows():
-        folium.Marker([location_info['Delivery_location_latitude'], 
-                       location_info['Delivery_location_longitude']],
-                       popup=location_info['City']).add_to(map)
-    
-    folium_static(map, width=1024, height=600)
+from functools import partial
+
+from core.assets import sidebar_logo
+from core.cleaning import REQUIRED_EMPRESA
+from core.downsample import RESOLUTION_LABELS, choose_resolution, lttb_frame, resample_sum
+from core.loader import cached_view, filtered_view, load_data, load_filtered_cube, load_sketches
+from core.maps import (LOCATION_COLUMNS, MAP_MODES, filter_bins, location_bins, median_locations,
+                       render_map)
+from core.metrics import (orders_by_city_traffic, orders_by_day, orders_by_traffic, orders_by_week,
+                          orders_share_by_week)
+from core.profiling import finish_render, render_panel, stage, start_render
+from core.sketch import filter_sketches
 
 # ====================================================
 # Configuração da Página
 # ====================================================
 st.set_page_config(page_title='Visão Empresa', layout='wide')
-
-# Carregamento dos dados
-df_raw = pd.read_csv('dataset/train.csv', low_memory=False)
-df = clean_code(df_raw)
+start_render('Visão Empresa')
 
 # ====================================================
 # Barra Lateral (Sidebar)
 # ====================================================
 
-try:
-    image = Image.open('image.png') # Certifique-se do nome do arquivo
-    st.sidebar.image(image, width=120)
-except:
+logo = sidebar_logo()
+if logo is not None:
+    st.sidebar.image(logo, width=120)
+else:
     st.sidebar.markdown('### [Logo J]')
 
 st.sidebar.markdown('# Curry Company')
@@ -86,54 +48,116 @@ traffic_options = st.sidebar.multiselect(
     default=['Low', 'Medium', 'High', 'Jam'] 
 )
 
-# Aplicando Filtros
-linhas_selecionadas = (df['Order_Date'] <= date_slider) & (df['Road_traffic_density'].isin(traffic_options))
-df = df.loc[linhas_selecionadas, :]
+contagem_aproximada = st.sidebar.toggle('Contagem aproximada de entregadores', value=False,
+                                        help='Estima os entregadores distintos com HyperLogLog (erro ~2%)')
+
+# Cada gráfico é memorizado pelos filtros da sidebar e só é calculado quando
+# a aba que o exibe está aberta. A contagem aproximada só entra na chave
+# (`state`) do gráfico que depende dela, então trocar o toggle não refaz o mapa
+view = partial(filtered_view, date_max=date_slider, traffic_options=traffic_options, required=REQUIRED_EMPRESA)
+filtered_cube = partial(load_filtered_cube, date_slider, traffic_options, required=REQUIRED_EMPRESA)
+
+def filtered_sketches():
+    """ Sketches de entregadores com os filtros da sidebar (None = contagem exata) """
+    if not contagem_aproximada:
+        return None
+    return view('sketches', lambda: filter_sketches(load_sketches(required=REQUIRED_EMPRESA),
+                                                    date_slider, traffic_options))
+
+def filtered_map(mode):
+    """ HTML do mapa para os filtros atuais (a mediana não sai do cubo) """
+    def build():
+        if mode == 'Medianas':
+            df = load_data(required=REQUIRED_EMPRESA, columns=LOCATION_COLUMNS)
+            linhas_selecionadas = (df['Order_Date'] <= date_slider) & (df['Road_traffic_density'].isin(traffic_options))
+            return render_map(mode, medians=median_locations(df.loc[linhas_selecionadas, :]))
+
+        # Grade de entregas calculada uma única vez por versão do dataset
+        bins = cached_view('location_bins',
+                           lambda: location_bins(load_data(required=REQUIRED_EMPRESA, columns=LOCATION_COLUMNS)),
+                           required=REQUIRED_EMPRESA)
+        return render_map(mode, bins=filter_bins(bins, date_slider, traffic_options))
+    return view(f'country_maps_{mode}', build)
+
+# Os gráficos importam o plotly só quando são desenhados (abas fechadas não o carregam)
+
+def orders_by_day_chart():
+    """ Barras por dia, semana ou mês, conforme o período selecionado """
+    import plotly.express as px
+
+    df_aux = orders_by_day(filtered_cube())
+    resolution = choose_resolution(df_aux['Order_Date'].min(), df_aux['Order_Date'].max()) if len(df_aux) else 'day'
+    df_aux = resample_sum(df_aux, 'Order_Date', ['orders'], resolution)
+    return px.bar(df_aux, x='Order_Date', y='orders', labels={'Order_Date': RESOLUTION_LABELS[resolution]})
+
+def traffic_pie():
+    """ Pedidos por condição de trânsito """
+    import plotly.express as px
+
+    return px.pie(orders_by_traffic(filtered_cube()), values='orders', names='Road_traffic_density')
+
+def city_traffic_scatter():
+    """ Pedidos por cidade e trânsito """
+    import plotly.express as px
+
+    return px.scatter(orders_by_city_traffic(filtered_cube()),
+                      x='City', y='Road_traffic_density', size='orders', color='City')
+
+def line_chart(df_aux, x, y):
+    """ Linha com no máximo `MAX_POINTS` pontos (LTTB) """
+    import plotly.express as px
+
+    return px.line(lttb_frame(df_aux, x, y), x=x, y=y)
 
 # ====================================================
 # Layout das Abas (Visualização)
 # ====================================================
 st.header('Marketplace - Visão Empresa')
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'])
+tab1, tab2, tab3 = st.tabs(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'],
+                           key='abas_empresa', on_change='rerun')
 
 with tab1:
-    with st.container():
-        st.markdown('### Orders by Day')
-        df_aux = df.loc[:, ['ID', 'Order_Date']].groupby('Order_Date').count().reset_index()
-        fig = px.bar(df_aux, x='Order_Date', y='ID')
-        st.plotly_chart(fig, use_container_width=True)
-
-    with st.container():
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown('### Pedidos por Tráfego')
-            df_aux = df.loc[:, ['ID', 'Road_traffic_density']].groupby('Road_traffic_density').count().reset_index()
-            fig = px.pie(df_aux, values='ID', names='Road_traffic_density')
-            st.plotly_chart(fig, use_container_width=True)
-        with col2:
-            st.markdown('### Tráfego por Cidade')
-            df_aux = df.loc[:, ['ID', 'City', 'Road_traffic_density']].groupby(['City', 'Road_traffic_density']).count().reset_index()
-            fig = px.scatter(df_aux, x='City', y='Road_traffic_density', size='ID', color='City')
+    if tab1.open:
+        with st.container():
+            st.markdown('### Orders by Day')
+            fig = view('orders_by_day', orders_by_day_chart)
             st.plotly_chart(fig, use_container_width=True)
 
+        with st.container():
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown('### Pedidos por Tráfego')
+                fig = view('orders_by_traffic', traffic_pie)
+                st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                st.markdown('### Tráfego por Cidade')
+                fig = view('traffic_by_city', city_traffic_scatter)
+                st.plotly_chart(fig, use_container_width=True)
+
 with tab2:
-    with st.container():
-        st.markdown("### Order by Week")
-        df_aux = df.loc[:, ['ID', 'week_of_year']].groupby('week_of_year').count().reset_index()
-        fig = px.line(df_aux, x='week_of_year', y='ID')
-        st.plotly_chart(fig, use_container_width=True)
-
-    with st.container():
-        st.markdown("### Order Share by Week")
-        df_aux01 = df.loc[:, ['ID', 'week_of_year']].groupby('week_of_year').count().reset_index()
-        df_aux02 = df.loc[:, ['Delivery_person_ID', 'week_of_year']].groupby('week_of_year').nunique().reset_index()
-        
-        df_aux = pd.merge(df_aux01, df_aux02, how='inner', on='week_of_year')
-        df_aux['order_by_deliverer'] = df_aux['ID'] / df_aux['Delivery_person_ID']
-        
-        fig = px.line(df_aux, x='week_of_year', y='order_by_deliverer')
-        st.plotly_chart(fig, use_container_width=True)
+    if tab2.open:
+        with st.container():
+            st.markdown("### Order by Week")
+            fig = view('orders_by_week', lambda: line_chart(orders_by_week(filtered_cube()),
+                                                            'week_of_year', 'orders'))
+            st.plotly_chart(fig, use_container_width=True)
+
+        with st.container():
+            st.markdown("### Order Share by Week")
+            fig = view('orders_share_by_week', lambda: line_chart(
+                orders_share_by_week(filtered_cube(), filtered_sketches()),
+                'week_of_year', 'order_by_deliverer'), state=(contagem_aproximada,))
+            st.plotly_chart(fig, use_container_width=True)
 
 with tab3:
-    st.markdown("### Country Maps")
-    country_maps(df)
\ No newline at end of file
+    if tab3.open:
+        st.markdown("### Country Maps")
+        modo = st.radio('Camada do mapa', MAP_MODES, horizontal=True)
+        html = filtered_map(modo)
+        with stage('figure:map'):
+            st.iframe(html, width=1024, height=610)
+
+# ====================================================
+# Painel de Desempenho (CURRY_COMPANY_PROFILE=1)
+# ====================================================
+render_panel(st, finish_render())
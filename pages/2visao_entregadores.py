@@ -1,54 +1,30 @@
-import pandas as pd
 import streamlit as st
 from datetime import datetime
-from PIL import Image
+from functools import partial
 
-# ====================================================
-# Funções de Processamento (Lógica)
-# ====================================================
-
-def clean_code(df):
-    """ Faz a limpeza do dataframe e conversão de tipos """
-    # Removendo espaços
-    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
-
-    # Limpeza de tipos e NaNs
-    df = df.loc[df['Delivery_person_Age'] != 'NaN', :].copy()
-    df['Delivery_person_Age'] = df['Delivery_person_Age'].astype(int)
-    df['Delivery_person_Ratings'] = df['Delivery_person_Ratings'].astype(float)
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
-    
-    # Limpeza do tempo de entrega
-    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1]).astype(int)
-    
-    return df
-
-def top_delivers(df, top_asc):
-    """ Calcula os entregadores mais rápidos ou lentos por cidade """
-    df_result = ( df.loc[:, ['Delivery_person_ID', 'City', 'Time_taken(min)']]
-                    .groupby(['City', 'Delivery_person_ID'])
-                    .mean()
-                    .sort_values(['City', 'Time_taken(min)'], ascending=top_asc)
-                    .reset_index() )
-    return df_result.head(10)
+from core.assets import sidebar_logo
+from core.cleaning import REQUIRED_ENTREGADORES
+from core.columnar import epoch_day
+from core.loader import filtered_view, load_cube, load_data, load_filtered_cube, load_profiles, load_totals
+from core.metrics import age_min_max, rating_mean_std, ratings_by_driver, top_delivers, vehicle_condition_min_max
+from core.profiles import PROFILE_COLUMNS, entity_orders, profile
+from core.profiling import finish_render, render_panel, start_render
+from core.ranking import select_totals
 
 # ====================================================
 # Configuração da Página
 # ====================================================
 st.set_page_config(page_title='Visão Entregadores', layout='wide')
-
-# Carregamento e Limpeza Inicial
-df_raw = pd.read_csv('dataset/train.csv', low_memory=False)
-df = clean_code(df_raw)
+start_render('Visão Entregadores')
 
 # ====================================================
 # Barra Lateral (Sidebar)
 # ====================================================
 
-try:
-    image = Image.open('image.png')
-    st.sidebar.image(image, width=120)
-except:
+logo = sidebar_logo()
+if logo is not None:
+    st.sidebar.image(logo, width=120)
+else:
     st.sidebar.markdown('### [Logo J]')
 
 st.sidebar.markdown('# Curry Company')
@@ -69,9 +45,20 @@ traffic_options = st.sidebar.multiselect(
     default=['Low', 'Medium', 'High', 'Jam'] 
 )
 
-# Filtro dinâmico
-linhas_selecionadas = (df['Order_Date'] <= date_slider) & (df['Road_traffic_density'].isin(traffic_options))
-df = df.loc[linhas_selecionadas, :]
+# Cada tabela é memorizada pelos filtros da sidebar no cache do processo,
+# então sessões com os mesmos filtros compartilham o resultado
+view = partial(filtered_view, date_max=date_slider, traffic_options=traffic_options, required=REQUIRED_ENTREGADORES)
+filtered_cube = partial(load_filtered_cube, date_slider, traffic_options, required=REQUIRED_ENTREGADORES)
+
+def ranking_totals():
+    """
+    Somas por entregador pré-calculadas (`load_totals`) quando a data da
+    sidebar cobre o histórico inteiro, ou seja, só o trânsito filtra o ranking
+    """
+    drivers = load_cube(required=REQUIRED_ENTREGADORES).drivers
+    if not len(drivers) or epoch_day(date_slider) < drivers['Order_Date'].max():
+        return None
+    return select_totals(load_totals(required=REQUIRED_ENTREGADORES), traffic_options)
 
 # ====================================================
 # Layout no Streamlit - Visão Entregadores
@@ -81,14 +68,16 @@ st.header('Marketplace - Visão Entregadores')
 # --- Container 1: Métricas Gerais ---
 with st.container():
     col1, col2, col3, col4 = st.columns(4)
+    (menor_idade, maior_idade), (pior_condicao, melhor_condicao) = view(
+        'overall_metrics', lambda: (age_min_max(filtered_cube()), vehicle_condition_min_max(filtered_cube())))
     with col1:
-        st.metric('Maior idade', df['Delivery_person_Age'].max())
+        st.metric('Maior idade', maior_idade)
     with col2:
-        st.metric('Menor idade', df['Delivery_person_Age'].min())
+        st.metric('Menor idade', menor_idade)
     with col3:
-        st.metric('Melhor condição de veículo', df['Vehicle_condition'].max())
+        st.metric('Melhor condição de veículo', melhor_condicao)
     with col4:
-        st.metric('Pior condição de veículo', df['Vehicle_condition'].min())
+        st.metric('Pior condição de veículo', pior_condicao)
 
 st.markdown("""---""")
 
@@ -98,26 +87,19 @@ with st.container():
     
     with col1:
         st.markdown('### Avaliações médias por entregador')
-        df_avg_ratings_per_deliverer = ( df.loc[:, ['Delivery_person_ID', 'Delivery_person_Ratings']]
-                                         .groupby('Delivery_person_ID')
-                                         .mean()
-                                         .reset_index() )
+        df_avg_ratings_per_deliverer = view('ratings_by_driver', lambda: ratings_by_driver(filtered_cube()))
         st.dataframe(df_avg_ratings_per_deliverer)
         
     with col2:
         st.markdown('### Avaliações médias por trânsito')
-        df_avg_std_traffic = ( df.loc[:, ['Delivery_person_Ratings', 'Road_traffic_density']]
-                                 .groupby('Road_traffic_density')
-                                 .agg({'Delivery_person_Ratings': ['mean', 'std']}) )
-        df_avg_std_traffic.columns = ['delivery_mean', 'delivery_std']
-        st.dataframe(df_avg_std_traffic.reset_index())
+        df_avg_std_traffic = view('rating_by_traffic',
+                                  lambda: rating_mean_std(filtered_cube(), 'Road_traffic_density'))
+        st.dataframe(df_avg_std_traffic)
         
         st.markdown('### Avaliações médias por clima')
-        df_avg_std_weather = ( df.loc[:, ['Delivery_person_Ratings', 'Weatherconditions']]
-                                 .groupby('Weatherconditions')
-                                 .agg({'Delivery_person_Ratings': ['mean', 'std']}) )
-        df_avg_std_weather.columns = ['delivery_mean', 'delivery_std']
-        st.dataframe(df_avg_std_weather.reset_index())
+        df_avg_std_weather = view('rating_by_weather',
+                                  lambda: rating_mean_std(filtered_cube(), 'Weatherconditions'))
+        st.dataframe(df_avg_std_weather)
 
 st.markdown("""---""")
 
@@ -125,13 +107,49 @@ st.markdown("""---""")
 with st.container():
     st.title('Velocidade de Entrega')
     col1, col2 = st.columns(2)
+    with col1:
+        top_k = st.slider('Entregadores por cidade', min_value=1, max_value=30, value=10)
+    with col2:
+        min_pedidos = st.number_input('Mínimo de pedidos', min_value=1, value=1)
     
     with col1:
         st.markdown('### Top entregadores mais rápidos')
-        df_fastest = top_delivers(df, top_asc=True)
+        df_fastest = view('top_fastest', lambda: top_delivers(filtered_cube(), top_asc=True, k=top_k,
+                                                             min_orders=min_pedidos, totals=ranking_totals()),
+                          state=(top_k, min_pedidos))
         st.dataframe(df_fastest)
         
     with col2:
         st.markdown('### Top entregadores mais lentos')
-        df_slowest = top_delivers(df, top_asc=False)
-        st.dataframe(df_slowest)
\ No newline at end of file
+        df_slowest = view('top_slowest', lambda: top_delivers(filtered_cube(), top_asc=False, k=top_k,
+                                                             min_orders=min_pedidos, totals=ranking_totals()),
+                          state=(top_k, min_pedidos))
+        st.dataframe(df_slowest)
+
+st.markdown("""---""")
+
+# --- Container 4: Perfil do Entregador (índice pré-calculado, busca em tempo constante) ---
+with st.container():
+    st.title('Perfil do Entregador')
+    st.caption('Todos os pedidos do entregador, sem os filtros da sidebar')
+    perfis = load_profiles('driver')
+    entregador = st.selectbox('Entregador', perfis.labels, index=None, placeholder='Escolha um entregador')
+    if entregador is not None:
+        perfil = profile(perfis, entregador)
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric('Pedidos', int(perfil['orders']))
+        with col2:
+            st.metric('Avaliação média', f"{perfil['rating_mean']:.2f}", help=f"Desvio {perfil['rating_std']:.2f}")
+        with col3:
+            st.metric('Tempo médio', f"{perfil['time_mean']:.2f}", help=f"Desvio {perfil['time_std']:.2f}")
+        with col4:
+            st.metric('Distância média', f"{perfil['distance_mean']:.2f}")
+        with col5:
+            st.metric('Veículo', str(perfil['vehicle']))
+        st.dataframe(entity_orders(perfis, load_data(columns=PROFILE_COLUMNS), entregador), hide_index=True)
+
+# ====================================================
+# Painel de Desempenho (CURRY_COMPANY_PROFILE=1)
+# ====================================================
+render_panel(st, finish_render())
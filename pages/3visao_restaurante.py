@@ -1,68 +1,29 @@
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 from datetime import datetime
-from PIL import Image
-from haversine import haversine
+from functools import partial
 
-# ====================================================
-# Funções de Processamento (Lógica)
-# ====================================================
-
-def clean_code(df):
-    """ Faz a limpeza, conversão de tipos e cálculo de distância """
-    # Removendo espaços
-    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
-
-    # Filtros de NaNs
-    df = df.loc[df['City'] != 'NaN', :]
-    df = df.loc[df['Festival'] != 'NaN', :]
-    df = df.loc[df['Road_traffic_density'] != 'NaN', :]
-
-    # Conversão de tipos
-    df['Order_Date'] = pd.to_datetime(df['Order_Date'], format='%d-%m-%Y')
-    df['Time_taken(min)'] = df['Time_taken(min)'].str.extract(r'(\d+)').astype(int)
-
-    # Cálculo de distância usando Haversine
-    df['distance'] = df.apply(lambda x: haversine(
-        (x['Restaurant_latitude'], x['Restaurant_longitude']), 
-        (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1)
-    
-    return df
-
-def avg_std_time_delivery(df, festival, op):
-    """ 
-    Calcula o tempo médio ou desvio padrão durante ou fora de festivais 
-    festival: 'Yes' ou 'No'
-    op: 'avg_time' ou 'std_time'
-    """
-    df_aux = df.loc[df['Festival'] == festival, 'Time_taken(min)'].agg(['mean', 'std'])
-    df_aux.columns = ['avg_time', 'std_time']
-    
-    if op == 'avg_time':
-        return df_aux['mean']
-    elif op == 'std_time':
-        return df_aux['std']
+from core.assets import sidebar_logo
+from core.cleaning import REQUIRED_RESTAURANTES
+from core.loader import filtered_view, load_data, load_filtered_cube, load_profiles, load_sketches
+from core.metrics import avg_std_time_delivery, distance_by_city, drivers_count, mean_distance, time_mean_std
+from core.profiles import PROFILE_COLUMNS, entity_orders, profile
+from core.profiling import finish_render, render_panel, stage, start_render
+from core.sketch import filter_sketches
 
 # ====================================================
 # Configuração da Página
 # ====================================================
 st.set_page_config(page_title='Visão Restaurantes', layout='wide', initial_sidebar_state='expanded')
-
-# Carregamento e Limpeza
-df_raw = pd.read_csv('dataset/train.csv', low_memory=False)
-df = clean_code(df_raw)
+start_render('Visão Restaurantes')
 
 # ====================================================
 # Barra Lateral (Sidebar)
 # ====================================================
 
-try:
-    image = Image.open('image.png') 
-    st.sidebar.image(image, width=120)
-except:
+logo = sidebar_logo()
+if logo is not None:
+    st.sidebar.image(logo, width=120)
+else:
     st.sidebar.markdown('### Logo')
 
 st.sidebar.markdown('# Curry Company')
@@ -83,8 +44,54 @@ traffic_options = st.sidebar.multiselect(
     default=['Low', 'Medium', 'High', 'Jam'] 
 )
 
-# Aplicando Filtros
-df = df.loc[(df['Order_Date'] <= date_slider) & (df['Road_traffic_density'].isin(traffic_options)), :]
+contagem_aproximada = st.sidebar.toggle('Contagem aproximada de entregadores', value=False,
+                                        help='Estima os entregadores distintos com HyperLogLog (erro ~2%)')
+
+# Métricas e gráficos são memorizados pelos filtros da sidebar no cache do
+# processo, então sessões com os mesmos filtros compartilham o resultado
+view = partial(filtered_view, date_max=date_slider, traffic_options=traffic_options, required=REQUIRED_RESTAURANTES)
+filtered_cube = partial(load_filtered_cube, date_slider, traffic_options, required=REQUIRED_RESTAURANTES)
+
+def overall_metrics():
+    """ Valores do container de métricas gerais """
+    cube = filtered_cube()
+    sketches = None
+    if contagem_aproximada:
+        sketches = filter_sketches(load_sketches(required=REQUIRED_RESTAURANTES), date_slider, traffic_options)
+    return (drivers_count(cube, sketches), mean_distance(cube),
+            avg_std_time_delivery(cube, 'Yes', 'avg_time'), avg_std_time_delivery(cube, 'Yes', 'std_time'),
+            avg_std_time_delivery(cube, 'No', 'avg_time'), avg_std_time_delivery(cube, 'No', 'std_time'))
+
+# Os gráficos importam o plotly só quando são desenhados (depois das métricas já enviadas ao navegador)
+
+def time_by_city_chart():
+    """ Tempo médio de entrega por cidade, com o desvio como barra de erro """
+    import plotly.graph_objects as go
+
+    df_aux = time_mean_std(filtered_cube(), ['City'])
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='Control', x=df_aux['City'], y=df_aux['avg_time'],
+                         error_y=dict(type='data', array=df_aux['std_time'])))
+    fig.update_layout(template='plotly_dark', margin=dict(l=20, r=20, t=20, b=20))
+    return fig
+
+def distance_by_city_pie():
+    """ Distância média por cidade """
+    import plotly.express as px
+
+    fig = px.pie(distance_by_city(filtered_cube()), values='distance', names='City')
+    fig.update_layout(template='plotly_dark')
+    return fig
+
+def time_by_city_traffic_sunburst():
+    """ Tempo médio e desvio por cidade e trânsito """
+    import plotly.express as px
+
+    fig = px.sunburst(time_mean_std(filtered_cube(), ['City', 'Road_traffic_density']),
+                      path=['City', 'Road_traffic_density'], values='avg_time',
+                      color='std_time', color_continuous_scale='RdBu')
+    fig.update_layout(template='plotly_dark')
+    return fig
 
 # ====================================================
 # Layout Principal
@@ -95,23 +102,21 @@ st.title('Marketplace - Visão Restaurantes')
 st.markdown("## Overal Metrics")
 with st.container():
     col1, col2, col3, col4, col5, col6 = st.columns(6)
-    
+    entregadores, distancia, tempo_festival, std_festival, tempo_sem_festival, std_sem_festival = \
+        view('overall_metrics', overall_metrics, state=(contagem_aproximada,))
+
     with col1:
-        st.metric('Entregadores', df['Delivery_person_ID'].nunique())
+        st.metric('Entregadores', entregadores)
     with col2:
-        st.metric('A distancia media', f"{df['distance'].mean():.2f}")
+        st.metric('A distancia media', f"{distancia:.2f}")
     with col3:
-        res = avg_std_time_delivery(df, 'Yes', 'avg_time')
-        st.metric('Tempo Médio', f"{res:.2f}")
+        st.metric('Tempo Médio', f"{tempo_festival:.2f}")
     with col4:
-        res = avg_std_time_delivery(df, 'Yes', 'std_time')
-        st.metric('STD Entrega', f"{res:.2f}")
+        st.metric('STD Entrega', f"{std_festival:.2f}")
     with col5:
-        res = avg_std_time_delivery(df, 'No', 'avg_time')
-        st.metric('Tempo Médio', f"{res:.2f}")
+        st.metric('Tempo Médio', f"{tempo_sem_festival:.2f}")
     with col6:
-        res = avg_std_time_delivery(df, 'No', 'std_time')
-        st.metric('STD Entrega', f"{res:.1f}")
+        st.metric('STD Entrega', f"{std_sem_festival:.1f}")
 
 st.markdown("""---""")
 
@@ -121,23 +126,14 @@ with st.container():
     
     with col1:
         st.markdown("### Tempo Medio de entrega por cidade")
-        df_aux = df.loc[:, ['City', 'Time_taken(min)']].groupby('City').agg({'Time_taken(min)': ['mean', 'std']})
-        df_aux.columns = ['avg_time', 'std_time']
-        df_aux = df_aux.reset_index()
-        
-        fig = go.Figure()
-        fig.add_trace(go.Bar(name='Control', x=df_aux['City'], y=df_aux['avg_time'], 
-                             error_y=dict(type='data', array=df_aux['std_time'])))
-        fig.update_layout(template='plotly_dark', margin=dict(l=20, r=20, t=20, b=20))
-        st.plotly_chart(fig, use_container_width=True)
+        fig = view('time_by_city', time_by_city_chart)
+        with stage('figure:time_by_city'):
+            st.plotly_chart(fig, use_container_width=True)
         
     with col2:
         st.markdown("### Tempo médio por tipo de entrega")
-        df_aux = (df.loc[:, ['City', 'Type_of_order', 'Time_taken(min)']]
-                    .groupby(['City', 'Type_of_order'])
-                    .agg({'Time_taken(min)': ['mean', 'std']}))
-        df_aux.columns = ['avg_time', 'std_time']
-        st.dataframe(df_aux.reset_index(), use_container_width=True)
+        df_aux = view('time_by_city_order', lambda: time_mean_std(filtered_cube(), ['City', 'Type_of_order']))
+        st.dataframe(df_aux, use_container_width=True)
 
 st.markdown("""---""")
 
@@ -147,19 +143,39 @@ with st.container():
     col1, col2 = st.columns(2)
     
     with col1:
-        df_aux = df.loc[:, ['City', 'distance']].groupby('City').mean().reset_index()
-        fig = px.pie(df_aux, values='distance', names='City')
-        fig.update_layout(template='plotly_dark')
-        st.plotly_chart(fig, use_container_width=True)
+        fig = view('distance_by_city', distance_by_city_pie)
+        with stage('figure:distance_by_city'):
+            st.plotly_chart(fig, use_container_width=True)
         
     with col2:
-        df_aux = (df.loc[:, ['City', 'Road_traffic_density', 'Time_taken(min)']]
-                    .groupby(['City', 'Road_traffic_density'])
-                    .agg({'Time_taken(min)': ['mean', 'std']})
-                    .reset_index())
-        df_aux.columns = ['City', 'Road_traffic_density', 'avg_time', 'std_time']
-        
-        fig = px.sunburst(df_aux, path=['City', 'Road_traffic_density'], values='avg_time',
-                          color='std_time', color_continuous_scale='RdBu')
-        fig.update_layout(template='plotly_dark')
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+        fig = view('time_by_city_traffic', time_by_city_traffic_sunburst)
+        with stage('figure:time_by_city_traffic'):
+            st.plotly_chart(fig, use_container_width=True)
+
+st.markdown("""---""")
+
+# --- CONTAINER 4: Perfil do Restaurante (índice pré-calculado, busca em tempo constante) ---
+st.markdown("## Perfil do Restaurante")
+with st.container():
+    st.caption('Todos os pedidos do restaurante (código no ID do entregador), sem os filtros da sidebar')
+    perfis = load_profiles('restaurant')
+    restaurante = st.selectbox('Restaurante', perfis.labels, index=None, placeholder='Escolha um restaurante')
+    if restaurante is not None:
+        perfil = profile(perfis, restaurante)
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric('Pedidos', int(perfil['orders']))
+        with col2:
+            st.metric('Entregadores', int(perfil['drivers']))
+        with col3:
+            st.metric('Avaliação média', f"{perfil['rating_mean']:.2f}", help=f"Desvio {perfil['rating_std']:.2f}")
+        with col4:
+            st.metric('Tempo médio', f"{perfil['time_mean']:.2f}", help=f"Desvio {perfil['time_std']:.2f}")
+        with col5:
+            st.metric('Distância média', f"{perfil['distance_mean']:.2f}")
+        st.dataframe(entity_orders(perfis, load_data(columns=PROFILE_COLUMNS), restaurante), hide_index=True)
+
+# ====================================================
+# Painel de Desempenho (CURRY_COMPANY_PROFILE=1)
+# ====================================================
+render_panel(st, finish_render())
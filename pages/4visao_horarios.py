@@ -0,0 +1,143 @@
+import streamlit as st
+from datetime import datetime
+from functools import partial
+
+from core.assets import sidebar_logo
+from core.cleaning import REQUIRED_HORARIOS
+from core.hourly import batching_impact, hourly_summary, orders_heatmap, prep_by
+from core.loader import filtered_view, load_hourly
+from core.profiling import finish_render, render_panel, stage, start_render
+from core.store import select
+
+# ====================================================
+# Configuração da Página
+# ====================================================
+st.set_page_config(page_title='Visão Horários', layout='wide')
+start_render('Visão Horários')
+
+# ====================================================
+# Barra Lateral (Sidebar)
+# ====================================================
+
+logo = sidebar_logo()
+if logo is not None:
+    st.sidebar.image(logo, width=120)
+else:
+    st.sidebar.markdown('### Logo')
+
+st.sidebar.markdown('# Curry Company')
+st.sidebar.markdown('## Fastest Delivery in Town')
+st.sidebar.markdown("""---""")
+
+date_slider = st.sidebar.slider(
+    'Até qual data?',
+    value=datetime(2022, 4, 13),
+    min_value=datetime(2022, 2, 11),
+    max_value=datetime(2022, 4, 13),
+    format='DD-MM-YYYY'
+)
+
+traffic_options = st.sidebar.multiselect(
+    'Condições do trânsito',
+    ['Low', 'Medium', 'High', 'Jam'],
+    default=['Low', 'Medium', 'High', 'Jam']
+)
+
+# Métricas e gráficos são memorizados pelos filtros da sidebar no cache do
+# processo, então sessões com os mesmos filtros compartilham o resultado
+view = partial(filtered_view, date_max=date_slider, traffic_options=traffic_options, required=REQUIRED_HORARIOS)
+
+def filtered_cells():
+    """ Células de horários (carregadas depois da sidebar já desenhada) com os filtros da sidebar """
+    return view('hourly', lambda: select(load_hourly(required=REQUIRED_HORARIOS), date_slider, traffic_options))
+
+# Os gráficos importam o plotly só quando são desenhados (depois das métricas já enviadas ao navegador)
+
+def heatmap_chart():
+    """ Pedidos por dia da semana e hora do pedido """
+    import plotly.express as px
+
+    fig = px.imshow(orders_heatmap(filtered_cells()), aspect='auto', color_continuous_scale='Viridis',
+                    labels={'x': 'Hora do pedido', 'y': 'Dia da semana', 'color': 'Pedidos'})
+    fig.update_layout(template='plotly_dark', margin=dict(l=20, r=20, t=20, b=20))
+    return fig
+
+def prep_by_hour_chart():
+    """ Tempo de preparo médio por hora do pedido, com o desvio como barra de erro """
+    import plotly.express as px
+
+    fig = px.bar(prep_by(filtered_cells(), 'order_hour'), x='order_hour', y='avg_prep', error_y='std_prep',
+                 labels={'order_hour': 'Hora do pedido', 'avg_prep': 'Preparo médio (min)'})
+    fig.update_layout(template='plotly_dark', margin=dict(l=20, r=20, t=20, b=20))
+    return fig
+
+def batching_chart():
+    """ Tempo de entrega médio por entregas múltiplas, cidade e trânsito """
+    import plotly.express as px
+
+    df_aux = batching_impact(filtered_cells(), ['City', 'Road_traffic_density'])
+    fig = px.bar(df_aux, x='multiple_deliveries', y='avg_time', color='City', barmode='group',
+                 facet_col='Road_traffic_density',
+                 labels={'multiple_deliveries': 'Entregas múltiplas', 'avg_time': 'Tempo médio (min)'})
+    fig.update_layout(template='plotly_dark')
+    return fig
+
+# ====================================================
+# Layout Principal
+# ====================================================
+st.title('Marketplace - Visão Horários')
+
+# --- CONTAINER 1: Métricas Gerais ---
+with st.container():
+    resumo = view('hourly_summary', lambda: hourly_summary(filtered_cells()))
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric('Pedidos', resumo['orders'])
+    with col2:
+        st.metric('Preparo médio (min)', f"{resumo['prep_mean']:.2f}")
+    with col3:
+        st.metric('Hora de pico', '-' if resumo['peak_hour'] is None else f"{resumo['peak_hour']:02d}h")
+    with col4:
+        st.metric('Com entregas múltiplas', f"{resumo['batched_share']:.1%}")
+
+st.markdown("""---""")
+
+# --- CONTAINER 2: Pedidos por Hora ---
+with st.container():
+    st.markdown('### Pedidos por dia da semana e hora')
+    fig = view('orders_heatmap', heatmap_chart)
+    with stage('figure:orders_heatmap'):
+        st.plotly_chart(fig, use_container_width=True)
+
+st.markdown("""---""")
+
+# --- CONTAINER 3: Tempo de Preparo (coleta - pedido) ---
+with st.container():
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown('### Preparo médio por hora do pedido')
+        fig = view('prep_by_hour', prep_by_hour_chart)
+        with stage('figure:prep_by_hour'):
+            st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        st.markdown('### Preparo por cidade e trânsito')
+        df_aux = view('prep_by_city_traffic', lambda: prep_by(filtered_cells(), ['City', 'Road_traffic_density']))
+        st.dataframe(df_aux, hide_index=True, use_container_width=True)
+
+st.markdown("""---""")
+
+# --- CONTAINER 4: Entregas Múltiplas ---
+with st.container():
+    st.markdown('### Tempo de entrega por entregas múltiplas, cidade e trânsito')
+    fig = view('batching_by_city_traffic', batching_chart)
+    with stage('figure:batching_by_city_traffic'):
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown('### Tempo de entrega por entregas múltiplas e veículo')
+    df_aux = view('batching_by_vehicle', lambda: batching_impact(filtered_cells(), ['Type_of_vehicle']))
+    st.dataframe(df_aux, hide_index=True, use_container_width=True)
+
+# ====================================================
+# Painel de Desempenho (CURRY_COMPANY_PROFILE=1)
+# ====================================================
+render_panel(st, finish_render())
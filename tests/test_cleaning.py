@@ -0,0 +1,42 @@
+"""
+Paridade da limpeza unificada (`core.cleaning.clean_orders`) com o
+`clean_code` original de cada página, nos CSVs do repositório: os pedidos
+do dataset/test.csv (com o 'Time_taken(min)' sintético de
+`benchmarks.synthetic`) e o dataset/train.csv, quando presente.
+
+Uso (na raiz do repositório):
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from benchmarks import legacy
+from benchmarks.synthetic import TEST_PATH, write_train_csv
+from core.cleaning import REQUIRED_EMPRESA, REQUIRED_ENTREGADORES, REQUIRED_RESTAURANTES, clean_orders
+from core.loader import TRAIN_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    'empresa': (legacy.clean_empresa, REQUIRED_EMPRESA),
+    'entregadores': (legacy.clean_entregadores, REQUIRED_ENTREGADORES),
+    'restaurantes': (legacy.clean_restaurantes, REQUIRED_RESTAURANTES),
+}
+
+@pytest.fixture(scope='module', params=['test', 'train'])
+def raw_orders(request, tmp_path_factory):
+    """ CSV lido como as páginas liam (colunas texto com dtype object) """
+    if request.param == 'test':
+        path = str(tmp_path_factory.mktemp('orders') / 'train.csv')
+        write_train_csv(path, base=os.path.join(ROOT, TEST_PATH))
+    else:
+        path = os.path.join(ROOT, TRAIN_PATH)
+        if not os.path.exists(path):
+            pytest.skip(f'{TRAIN_PATH} não encontrado')
+    return legacy.read_raw(path)
+
+@pytest.mark.parametrize('page', PAGES)
+def test_clean_orders_matches_page_clean_code(raw_orders, page):
+    clean_code, required = PAGES[page]
+    legacy.assert_parity(clean_code(raw_orders), clean_orders(raw_orders, required))